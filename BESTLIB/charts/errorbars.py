@@ -5,6 +5,7 @@ Gráfico con barras de error
 from .base import ChartBase
 from ..data.preparators import prepare_scatter_data
 from ..data.validators import validate_scatter_data
+from ..data.aggregators import aggregate_errorbars, VALID_ERROR_MODES
 from ..utils.figsize import process_figsize_in_kwargs
 from ..core.exceptions import ChartError, DataError
 
@@ -135,33 +136,97 @@ class ErrorbarsChart(ChartBase):
         
         return processed_data, original_data
     
+    def prepare_aggregated_data(self, data, x_col=None, y_col=None, error='sem', confidence=0.95,
+                                n_boot=1000, n_jobs=None, random_state=None):
+        """
+        Prepara errorbars agregando valores crudos por grupo (media ± error).
+        
+        Args:
+            data: DataFrame o lista de diccionarios con valores crudos
+            x_col: Columna de agrupación (numérica o categórica)
+            y_col: Columna de valores crudos
+            error: 'std', 'sem' o 'ci' (bootstrap)
+            confidence, n_boot, n_jobs, random_state: Parámetros del bootstrap
+        
+        Returns:
+            tuple: (datos_procesados, etiquetas_x o None si x es numérico)
+        """
+        if not x_col or not y_col:
+            raise ChartError("x_col e y_col son requeridos para errorbars")
+        try:
+            stats = aggregate_errorbars(
+                data, value_col=y_col, group_col=x_col, error=error, confidence=confidence,
+                n_boot=n_boot, n_jobs=n_jobs, random_state=random_state
+            )
+        except DataError as e:
+            raise ChartError(f"Datos inválidos para errorbars: {e}")
+        
+        groups = stats['group']
+        numeric_x = pd.api.types.is_numeric_dtype(groups)
+        x_values = groups.astype(float).tolist() if numeric_x else list(range(len(groups)))
+        x_labels = None if numeric_x else [str(g) for g in groups]
+        
+        processed_data = []
+        for x_val, group, mean, lower, upper, count in zip(
+            x_values, groups.tolist(), stats['mean'].tolist(), stats['lower'].tolist(),
+            stats['upper'].tolist(), stats['count'].tolist()
+        ):
+            processed_data.append({
+                'x': x_val,
+                'y': mean,
+                'yerr': max(mean - lower, upper - mean),
+                'ylo': lower,
+                'yhi': upper,
+                'count': count,
+                '_original_row': {x_col: group, y_col: mean, 'count': count}
+            })
+        return processed_data, x_labels
+    
     def get_spec(self, data, x_col=None, y_col=None, yerr=None, xerr=None, **kwargs):
         """
         Genera la especificación del errorbars.
         
+        Modo agregación: si se pasa ``error`` ('std', 'sem' o 'ci') y no hay
+        ``yerr``, ``y_col`` se interpreta como valores crudos y ``x_col`` como
+        grupo; se grafica la media ± error de cada grupo.
+        
         Args:
             data: DataFrame o lista de diccionarios
             x_col: Nombre de columna para eje X
             y_col: Nombre de columna para eje Y
             yerr: Nombre de columna para error en Y (opcional)
             xerr: Nombre de columna para error en X (opcional)
-            **kwargs: Opciones adicionales (color, strokeWidth, axes, etc.)
+            **kwargs: Opciones adicionales (color, strokeWidth, axes, error,
+                confidence, n_boot, n_jobs, random_state, etc.)
         
         Returns:
             dict: Spec conforme a BESTLIB Visualization Spec
         """
-        # Validar datos
-        self.validate_data(data, x_col=x_col, y_col=y_col, yerr=yerr, xerr=xerr, **kwargs)
+        error = kwargs.pop('error', None)
+        agg_params = {key: kwargs.pop(key) for key in ('confidence', 'n_boot', 'n_jobs', 'random_state')
+                      if key in kwargs}
+        aggregate = error is not None and yerr is None and xerr is None
+        x_labels = None
         
-        # Preparar datos
-        processed_data, original_data = self.prepare_data(
-            data,
-            x_col=x_col,
-            y_col=y_col,
-            yerr=yerr,
-            xerr=xerr,
-            **kwargs
-        )
+        if aggregate:
+            if error not in VALID_ERROR_MODES:
+                raise ChartError(f"error debe ser uno de {VALID_ERROR_MODES}, recibido: {error}")
+            processed_data, x_labels = self.prepare_aggregated_data(
+                data, x_col=x_col, y_col=y_col, error=error, **agg_params
+            )
+        else:
+            # Validar datos
+            self.validate_data(data, x_col=x_col, y_col=y_col, yerr=yerr, xerr=xerr, **kwargs)
+            
+            # Preparar datos
+            processed_data, original_data = self.prepare_data(
+                data,
+                x_col=x_col,
+                y_col=y_col,
+                yerr=yerr,
+                xerr=xerr,
+                **kwargs
+            )
         
         # Procesar figsize si está en kwargs
         process_figsize_in_kwargs(kwargs)
@@ -188,9 +253,14 @@ class ErrorbarsChart(ChartBase):
             encoding['yerr'] = {'field': yerr}
         if xerr:
             encoding['xerr'] = {'field': xerr}
+        if aggregate:
+            encoding['y']['aggregate'] = 'mean'
+            encoding['yerr'] = {'aggregate': error}
         
         if encoding:
             spec['encoding'] = encoding
+        if x_labels is not None:
+            spec['xTickLabels'] = x_labels
         
         # Agregar options
         options = {}
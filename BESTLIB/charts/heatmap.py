@@ -1,6 +1,7 @@
 """Heatmap Chart"""
 from .base import ChartBase
 from ..data.preparators import prepare_heatmap_data
+from ..data.pyramid import build_heatmap_pyramid, DEFAULT_TILE_SIZE
 from ..core.exceptions import ChartError
 
 
@@ -8,16 +9,43 @@ class HeatmapChart(ChartBase):
     @property
     def chart_type(self):
         return 'heatmap'
-    
+
     def validate_data(self, data, **kwargs):
         pass
-    
+
     def prepare_data(self, data, x_col=None, y_col=None, value_col=None, **kwargs):
         cells, x_labels, y_labels = prepare_heatmap_data(data, x_col=x_col, y_col=y_col, value_col=value_col)
         return {'cells': cells, 'x_labels': x_labels, 'y_labels': y_labels}
-    
+
+    def prepare_pyramid(self, data, x_col=None, y_col=None, value_col=None,
+                        agg='mean', tile_size=DEFAULT_TILE_SIZE):
+        """
+        Prepara el nivel más grueso de una pirámide multi-resolución.
+
+        Los tiles más finos se sirven bajo demanda desde la cache de pirámides
+        (evento 'heatmap_tile').
+        """
+        pyramid = build_heatmap_pyramid(data, x_col=x_col, y_col=y_col, value_col=value_col,
+                                        agg=agg, tile_size=tile_size)
+        tile = pyramid.get_tile(pyramid.coarsest_level, 0, 0)
+        return {
+            'cells': tile['cells'],
+            'x_labels': tile['x_labels'],
+            'y_labels': tile['y_labels'],
+            'pyramid': pyramid.metadata(),
+        }
+
     def get_spec(self, data, x_col=None, y_col=None, value_col=None, **kwargs):
-        prepared = self.prepare_data(data, x_col=x_col, y_col=y_col, value_col=value_col, **kwargs)
+        pyramid = kwargs.pop('pyramid', False)
+        tile_size = kwargs.pop('tile_size', DEFAULT_TILE_SIZE)
+        pyramid_agg = kwargs.pop('pyramid_agg', 'mean')
+        if pyramid:
+            try:
+                prepared = self.prepare_pyramid(data, x_col=x_col, y_col=y_col, value_col=value_col,
+                                                agg=pyramid_agg, tile_size=tile_size)
+            except Exception as e:
+                raise ChartError(f"No se pudo construir la pirámide del heatmap: {e}")
+        else:
+            prepared = self.prepare_data(data, x_col=x_col, y_col=y_col, value_col=value_col, **kwargs)
         # Agregar 'data' para compatibilidad con validate_spec
         return {'type': self.chart_type, 'data': prepared['cells'], **prepared, **kwargs}
-
@@ -74,6 +74,29 @@ class PolarChart(ChartBase):
         except DataError as e:
             raise ChartError(f"Datos inválidos para polar plot: {e}")
     
+    @staticmethod
+    def _extract_columns(data, angle_col, radius_col, value_col=None):
+        """Extrae ángulo, radio (y valor opcional) como arrays de numpy."""
+        if HAS_PANDAS and isinstance(data, pd.DataFrame):
+            angles = pd.to_numeric(data[angle_col], errors='coerce').to_numpy(dtype=float)
+            radii = pd.to_numeric(data[radius_col], errors='coerce').to_numpy(dtype=float)
+            values = (pd.to_numeric(data[value_col], errors='coerce').to_numpy(dtype=float)
+                      if value_col else None)
+        else:
+            rows = [d for d in data if angle_col in d and radius_col in d]
+            angles = np.fromiter((d[angle_col] for d in rows), dtype=float, count=len(rows))
+            radii = np.fromiter((d[radius_col] for d in rows), dtype=float, count=len(rows))
+            values = (np.fromiter((d.get(value_col, np.nan) for d in rows), dtype=float, count=len(rows))
+                      if value_col else None)
+        return angles, radii, values
+    
+    @staticmethod
+    def _to_radians(angles, angle_unit='rad'):
+        """Convierte ángulos a radianes de forma vectorizada."""
+        if angle_unit == 'deg':
+            return np.deg2rad(angles)
+        return angles
+    
     def prepare_data(self, data, angle_col=None, radius_col=None, angle_unit='rad', **kwargs):
         """
         Prepara datos para polar plot.
@@ -88,43 +111,108 @@ class PolarChart(ChartBase):
         Returns:
             dict: Datos preparados con x, y (coordenadas cartesianas)
         """
-        if HAS_PANDAS and isinstance(data, pd.DataFrame):
-            angles = data[angle_col].values
-            radii = data[radius_col].values
-        else:
-            angles = [d[angle_col] for d in data if angle_col in d and angle_col in d]
-            radii = [d[radius_col] for d in data if radius_col in d and radius_col in d]
-            if HAS_NUMPY:
-                angles = np.array(angles)
-                radii = np.array(radii)
+        if not HAS_NUMPY:
+            raise ChartError("numpy es requerido para polar plot")
+        angles, radii, _ = self._extract_columns(data, angle_col, radius_col)
         
         # Convertir ángulos a radianes si es necesario
-        if angle_unit == 'deg':
-            if HAS_NUMPY:
-                angles = np.deg2rad(angles)
-            else:
-                angles = [np.pi * a / 180.0 for a in angles]
+        angles = self._to_radians(angles, angle_unit)
         
         # Convertir a coordenadas cartesianas
-        if HAS_NUMPY:
-            x_coords = radii * np.cos(angles)
-            y_coords = radii * np.sin(angles)
-        else:
-            import math
-            x_coords = [r * math.cos(a) for r, a in zip(radii, angles)]
-            y_coords = [r * math.sin(a) for r, a in zip(radii, angles)]
-        
-        polar_data = []
-        for x, y, angle, radius in zip(x_coords, y_coords, angles, radii):
-            polar_data.append({
-                'x': float(x),
-                'y': float(y),
-                'angle': float(angle),
-                'radius': float(radius)
-            })
+        x_coords = radii * np.cos(angles)
+        y_coords = radii * np.sin(angles)
+        
+        polar_data = [
+            {'x': x, 'y': y, 'angle': angle, 'radius': radius}
+            for x, y, angle, radius in zip(x_coords.tolist(), y_coords.tolist(),
+                                           angles.tolist(), radii.tolist())
+        ]
         
         return {'data': polar_data}
     
+    def prepare_binned_data(self, data, angle_col=None, radius_col=None, angle_unit='rad',
+                            sectors=16, rings=5, value_col=None, agg='count', ring_edges=None):
+        """
+        Agrupa lecturas en sectores angulares x anillos de radio (rosa de vientos).
+        
+        El payload resultante tiene como máximo sectors x rings celdas,
+        independientemente del número de filas.
+        
+        Args:
+            data: DataFrame o lista de diccionarios
+            angle_col: Nombre de columna para ángulo
+            radius_col: Nombre de columna para radio
+            angle_unit: Unidad del ángulo ('rad' o 'deg')
+            sectors: Número de sectores angulares
+            rings: Número de anillos de radio (ignorado si se pasa ring_edges)
+            value_col: Columna a promediar cuando agg='mean'
+            agg: 'count' o 'mean'
+            ring_edges: Bordes explícitos de los anillos (opcional)
+        
+        Returns:
+            dict: {'data': celdas, 'ring_edges': bordes}
+        """
+        if not HAS_NUMPY:
+            raise ChartError("numpy es requerido para polar plot agrupado")
+        if agg not in ('count', 'mean'):
+            raise ChartError(f"agg debe ser 'count' o 'mean', recibido: {agg}")
+        if agg == 'mean' and not value_col:
+            raise ChartError("value_col es requerido cuando agg='mean'")
+        sectors = int(sectors)
+        if sectors < 1:
+            raise ChartError("sectors debe ser >= 1")
+        
+        angles, radii, values = self._extract_columns(data, angle_col, radius_col, value_col)
+        angles = self._to_radians(angles, angle_unit)
+        valid = np.isfinite(angles) & np.isfinite(radii)
+        if values is not None and agg == 'mean':
+            valid &= np.isfinite(values)
+        angles, radii = angles[valid], radii[valid]
+        if values is not None:
+            values = values[valid]
+        
+        if ring_edges is not None:
+            edges = np.asarray(ring_edges, dtype=float)
+        else:
+            r_max = float(radii.max()) if radii.size else 1.0
+            edges = np.linspace(0.0, r_max if r_max > 0 else 1.0, int(rings) + 1)
+        n_rings = len(edges) - 1
+        if n_rings < 1:
+            raise ChartError("Se requiere al menos un anillo")
+        
+        two_pi = 2.0 * np.pi
+        sector_width = two_pi / sectors
+        sector_idx = np.minimum((np.mod(angles, two_pi) // sector_width).astype(np.int64), sectors - 1)
+        ring_idx = np.clip(np.searchsorted(edges, radii, side='right') - 1, 0, n_rings - 1)
+        flat = sector_idx * n_rings + ring_idx
+        
+        counts = np.bincount(flat, minlength=sectors * n_rings)
+        if agg == 'mean':
+            sums = np.bincount(flat, weights=values, minlength=sectors * n_rings)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cell_values = sums / counts
+        else:
+            cell_values = counts.astype(float)
+        
+        occupied = np.nonzero(counts)[0]
+        sec = occupied // n_rings
+        ring = occupied % n_rings
+        cells = [
+            {
+                'sector': s_i,
+                'ring': r_i,
+                'angle_start': s_i * sector_width,
+                'angle_end': (s_i + 1) * sector_width,
+                'r_inner': float(edges[r_i]),
+                'r_outer': float(edges[r_i + 1]),
+                'value': v,
+                'count': c,
+            }
+            for s_i, r_i, v, c in zip(sec.tolist(), ring.tolist(),
+                                      cell_values[occupied].tolist(), counts[occupied].tolist())
+        ]
+        return {'data': cells, 'ring_edges': edges.tolist()}
+    
     def get_spec(self, data, angle_col=None, radius_col=None, angle_unit='rad', **kwargs):
         """
         Genera la especificación del polar plot.
@@ -134,20 +222,36 @@ class PolarChart(ChartBase):
             angle_col: Nombre de columna para ángulo
             radius_col: Nombre de columna para radio
             angle_unit: Unidad del ángulo ('rad' o 'deg')
-            **kwargs: Opciones adicionales
+            **kwargs: Opciones adicionales. Modo agrupado: sectors, rings,
+                value_col, agg ('count' o 'mean'), ring_edges
         
         Returns:
             dict: Spec conforme a BESTLIB Visualization Spec
         """
         self.validate_data(data, angle_col=angle_col, radius_col=radius_col, **kwargs)
         
-        polar_data = self.prepare_data(
-            data,
-            angle_col=angle_col,
-            radius_col=radius_col,
-            angle_unit=angle_unit,
-            **kwargs
-        )
+        sectors = kwargs.pop('sectors', None)
+        binned = kwargs.pop('binned', sectors is not None)
+        bin_params = {key: kwargs.pop(key) for key in ('rings', 'value_col', 'agg', 'ring_edges')
+                      if key in kwargs}
+        
+        if binned:
+            polar_data = self.prepare_binned_data(
+                data,
+                angle_col=angle_col,
+                radius_col=radius_col,
+                angle_unit=angle_unit,
+                sectors=sectors or 16,
+                **bin_params
+            )
+        else:
+            polar_data = self.prepare_data(
+                data,
+                angle_col=angle_col,
+                radius_col=radius_col,
+                angle_unit=angle_unit,
+                **kwargs
+            )
         
         process_figsize_in_kwargs(kwargs)
         
@@ -155,6 +259,10 @@ class PolarChart(ChartBase):
             'type': self.chart_type,
             'data': polar_data['data'],
         }
+        if binned:
+            spec['binned'] = True
+            spec['ring_edges'] = polar_data['ring_edges']
+            spec['agg'] = bin_params.get('agg', 'count')
         
         encoding = {}
         if angle_col:
@@ -39,3 +39,91 @@ def validate_spec(spec):
     
     return spec
 
+
+
+# Backend Canvas 2D para vistas densas: tipos soportados y número de marcas
+# a partir del cual el modo 'auto' deja de usar un nodo SVG por punto
+CANVAS_CHART_TYPES = frozenset({'scatter', 'line_plot', 'rug', 'parallel_coordinates'})
+CANVAS_AUTO_THRESHOLD = 10000
+VALID_RENDERERS = ('auto', 'svg', 'canvas')
+
+
+def spec_mark_count(spec):
+    """Número de marcas (puntos, ticks o líneas) que dibuja un spec."""
+    series = spec.get('series')
+    if isinstance(series, dict):
+        return sum(len(s) for s in series.values() if isinstance(s, list))
+    data = spec.get('data')
+    return len(data) if isinstance(data, list) else 0
+
+
+def resolve_renderer(spec):
+    """
+    Resuelve el backend de dibujo de un spec: ``renderer`` = 'svg' o 'canvas'.
+    
+    ``renderer`` puede venir en el spec o en ``spec['options']``. Con 'auto'
+    (o sin valor) se usa Canvas cuando el spec supera CANVAS_AUTO_THRESHOLD
+    marcas. Los tipos sin backend Canvas se retornan sin cambios.
+    
+    Returns:
+        dict: El mismo spec, o una copia superficial con ``renderer`` fijado
+    """
+    chart_type = spec.get('type')
+    options = spec.get('options') if isinstance(spec.get('options'), dict) else {}
+    requested = spec.get('renderer', options.get('renderer', 'auto')) or 'auto'
+    if requested not in VALID_RENDERERS:
+        raise ChartError(f"renderer debe ser uno de {VALID_RENDERERS}, recibido: {requested}")
+    if chart_type not in CANVAS_CHART_TYPES:
+        return spec
+    if requested == 'auto':
+        requested = 'canvas' if spec_mark_count(spec) > CANVAS_AUTO_THRESHOLD else 'svg'
+    if spec.get('renderer', 'svg') == requested:
+        return spec
+    resolved = dict(spec)
+    resolved['renderer'] = requested
+    return resolved
+
+
+class FrozenSpec(dict):
+    """
+    Spec registrado e inmutable (a nivel superior).
+    
+    Es un dict para que la serialización y las lecturas no cambien, pero
+    rechaza mutaciones: los cambios de metadata se hacen con ``replace()``,
+    que crea un spec nuevo compartiendo los datos (copy-on-write). Los datos
+    anidados (filas, series) no se copian y se tratan como de solo lectura.
+    """
+    __slots__ = ()
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Los specs registrados son inmutables; use update_spec_metadata()")
+    
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    update = pop = popitem = clear = setdefault = _readonly
+    
+    def replace(self, **changes):
+        """Retorna un nuevo FrozenSpec con ``changes`` aplicados."""
+        new = dict(self)
+        new.update(changes)
+        return FrozenSpec(new)
+    
+    def thaw(self):
+        """Copia superficial mutable del spec."""
+        return dict(self)
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        import copy
+        return FrozenSpec(copy.deepcopy(dict(self), memo))
+    
+    def __reduce__(self):
+        return (FrozenSpec, (dict(self),))
+
+
+def freeze_spec(spec):
+    """Congela un spec sin copiar sus datos (idempotente)."""
+    if isinstance(spec, FrozenSpec):
+        return spec
+    return FrozenSpec(spec)
@@ -46,6 +46,7 @@ class ViolinChart(ChartBase):
         """
         groups = defaultdict(list)
         original_rows = defaultdict(list)
+        positions = None
         
         # Agrupar valores por categoría
         if HAS_PANDAS and isinstance(data, pd.DataFrame):
@@ -53,12 +54,15 @@ class ViolinChart(ChartBase):
             if category_col:
                 cols.append(category_col)
             subset = data[cols].dropna()
-            for idx, row in subset.iterrows():
+            positions = defaultdict(list)
+            row_positions = np.flatnonzero(data[cols].notna().all(axis=1))
+            for pos, (idx, row) in zip(row_positions, subset.iterrows()):
                 cat = row[category_col] if category_col else 'All'
                 val = float(row[value_col])
                 groups[str(cat)].append(val)
-                # Guardar fila original completa para selección posterior
+                # Guardar fila original completa (y su posición) para selección posterior
                 original_rows[str(cat)].append(data.loc[idx].to_dict())
+                positions[str(cat)].append(int(pos))
         else:
             for item in data or []:
                 if value_col not in item:
@@ -118,12 +122,15 @@ class ViolinChart(ChartBase):
                     profile = self._histogram_fallback(values, bins)
             
             if profile:
-                violin_data.append({
+                item = {
                     'category': cat,
                     'profile': profile,
                     # Adjuntar filas originales para selección por categoría
                     '_original_rows': original_rows.get(cat, [])
-                })
+                }
+                if positions is not None:
+                    item['_positions'] = positions.get(cat, [])
+                violin_data.append(item)
         
         return violin_data
     
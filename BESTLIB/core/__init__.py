@@ -6,9 +6,11 @@ from .registry import Registry
 from .layout import LayoutEngine
 from .comm import CommManager, get_comm_engine
 from .events import EventManager
+from .binary import pack_columns, unpack_columns
 
 __all__ = [
     'BestlibError', 'LayoutError', 'ChartError', 'DataError', 'RenderError', 'CommunicationError',
-    'Registry', 'LayoutEngine', 'CommManager', 'get_comm_engine', 'EventManager'
+    'Registry', 'LayoutEngine', 'CommManager', 'get_comm_engine', 'EventManager',
+    'pack_columns', 'unpack_columns'
 ]
 
@@ -0,0 +1,92 @@
+"""
+Transporte binario de columnas numéricas sobre los buffers del comm de Jupyter.
+
+Las columnas numéricas viajan como buffers little-endian crudos (campo
+``buffers`` de los mensajes comm) y llegan a matrix.js como
+Float64Array/Float32Array/Int32Array. Un esquema JSON pequeño describe
+qué buffer corresponde a cada columna. Lo usan las posiciones de fila de los
+parches de vistas enlazadas (``reactive.patches.pack_patch_rows``).
+"""
+from ..data._imports import ensure_numpy, ensure_pandas
+from .exceptions import DataError
+
+np = ensure_numpy()
+pd = ensure_pandas()
+
+# dtype de numpy (little-endian) por nombre de tipo del esquema
+BINARY_DTYPES = {
+    'float64': '<f8',
+    'float32': '<f4',
+    'int32': '<i4',
+    'uint8': '|u1',
+}
+
+_INT32_MIN, _INT32_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def _binary_dtype_for(array):
+    """Elige el tipo binario para un array numérico (None si no es numérico)."""
+    kind = array.dtype.kind
+    if kind == 'b':
+        return 'uint8'
+    if kind == 'f':
+        return 'float32' if array.dtype.itemsize == 4 else 'float64'
+    if kind in 'iu':
+        if array.size == 0 or (array.min() >= _INT32_MIN and array.max() <= _INT32_MAX):
+            return 'int32'
+        return 'float64'
+    return None
+
+
+def pack_columns(columns):
+    """
+    Empaqueta columnas numéricas en buffers little-endian.
+
+    Args:
+        columns (dict): {nombre: array-like numérico}
+
+    Returns:
+        tuple: (schema, buffers) donde schema es serializable a JSON y
+            buffers es una lista de memoryview
+    """
+    if np is None:
+        raise DataError("numpy es requerido para el transporte binario")
+    schema_cols = []
+    buffers = []
+    length = None
+    for name, values in columns.items():
+        array = np.asarray(values)
+        dtype = _binary_dtype_for(array)
+        if dtype is None:
+            raise DataError(f"La columna '{name}' no es numérica")
+        if length is None:
+            length = len(array)
+        elif len(array) != length:
+            raise DataError("Todas las columnas deben tener la misma longitud")
+        data = np.ascontiguousarray(array, dtype=BINARY_DTYPES[dtype])
+        schema_cols.append({'name': str(name), 'dtype': dtype, 'buffer': len(buffers)})
+        buffers.append(memoryview(data).cast('B'))
+    return {'length': length or 0, 'columns': schema_cols}, buffers
+
+
+def unpack_columns(schema, buffers):
+    """
+    Reconstruye columnas desde un esquema y sus buffers (sin copiar).
+
+    Returns:
+        dict: {nombre: np.ndarray}
+    """
+    if np is None:
+        raise DataError("numpy es requerido para el transporte binario")
+    result = {}
+    for col in schema.get('columns', []):
+        dtype = BINARY_DTYPES.get(col.get('dtype'))
+        if dtype is None:
+            raise DataError(f"Tipo binario no soportado: {col.get('dtype')}")
+        try:
+            buf = buffers[col['buffer']]
+        except (IndexError, KeyError, TypeError):
+            raise DataError(f"Buffer faltante para la columna '{col.get('name')}'")
+        result[col['name']] = np.frombuffer(buf, dtype=dtype)
+    return result
+
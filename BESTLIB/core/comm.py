@@ -2,6 +2,7 @@
 Sistema de comunicación bidireccional JS ↔ Python
 """
 import weakref
+from collections import OrderedDict
 from .exceptions import CommunicationError
 
 
@@ -12,9 +13,18 @@ class CommManager:
     """
     
     _instances = {}  # dict[str, weakref.ReferenceType] - Instancias registradas
+    _comms = {}  # dict[str, Comm] - Comms abiertos por div_id (canal Python → JS)
     _comm_registered = False
+    _browser_comm_seen = False  # El frontend ya abrió un comm en esta sesión
     _debug = False
     
+    # Coalescing: solo el evento pendiente más reciente por (div_id, vista, tipo)
+    _coalesce_enabled = True
+    _coalesce_types = {'select'}
+    _pending = OrderedDict()  # (div_id, vista, tipo) -> (div_id, msg)
+    _drain_scheduled = False
+    _event_stats = {'received': 0, 'processed': 0, 'dropped': 0, 'dropped_by_key': {}}
+    
     @classmethod
     def set_debug(cls, enabled: bool):
         """Activa/desactiva mensajes de debug"""
@@ -64,6 +74,17 @@ class CommManager:
         
         return cls._ensure_comm_target()
     
+    @classmethod
+    def browser_comm_available(cls):
+        """
+        True si el navegador ya abrió un comm con este kernel.
+        
+        Tener el target registrado no alcanza: JupyterLab, Notebook 7 o
+        VS Code pueden no abrir comms desde matrix.js. Solo cuando el frontend
+        lo hizo al menos una vez se sabe que puede pedir datos al kernel.
+        """
+        return cls._browser_comm_seen
+    
     @classmethod
     def _ensure_comm_target(cls):
         """
@@ -92,9 +113,17 @@ class CommManager:
                 if cls._debug:
                     print(f"🔗 [CommManager] Comm abierto para div_id: {div_id}")
                 
+                cls._comms[div_id] = comm
+                cls._browser_comm_seen = True
+                
+                @comm.on_close
+                def _closed(msg):
+                    if cls._comms.get(div_id) is comm:
+                        del cls._comms[div_id]
+                
                 @comm.on_msg
                 def _recv(msg):
-                    cls._handle_message(div_id, msg)
+                    cls._enqueue_message(div_id, msg)
             
             km.register_target("bestlib_matrix", _target)
             cls._comm_registered = True
@@ -111,6 +140,179 @@ class CommManager:
                 traceback.print_exc()
             return False
     
+    @classmethod
+    def set_coalescing(cls, enabled=True, event_types=None):
+        """
+        Activa/desactiva el coalescing de eventos de alta frecuencia.
+        
+        Con coalescing, los eventos pendientes de un mismo (div_id, vista,
+        tipo) se reemplazan por el más reciente antes de ejecutar handlers.
+        
+        Args:
+            enabled (bool): Si True, activa el coalescing
+            event_types (iterable, optional): Tipos de evento a coalescer (default: {'select'})
+        """
+        cls._coalesce_enabled = bool(enabled)
+        if event_types is not None:
+            cls._coalesce_types = set(event_types)
+        if not cls._coalesce_enabled:
+            cls.flush_pending()
+    
+    @classmethod
+    def get_event_stats(cls):
+        """Contadores de eventos recibidos, procesados y descartados por coalescing."""
+        stats = dict(cls._event_stats)
+        stats['dropped_by_key'] = dict(cls._event_stats['dropped_by_key'])
+        stats['pending'] = len(cls._pending)
+        return stats
+    
+    @classmethod
+    def reset_event_stats(cls):
+        """Reinicia los contadores de eventos."""
+        cls._event_stats = {'received': 0, 'processed': 0, 'dropped': 0, 'dropped_by_key': {}}
+    
+    @classmethod
+    def _enqueue_message(cls, div_id, msg):
+        """
+        Recibe un mensaje del comm aplicando latest-wins por (div_id, vista, tipo).
+        
+        Los eventos coalescibles se guardan como pendientes y se procesan
+        cuando el kernel termina de leer los mensajes ya encolados. Los demás
+        se procesan de inmediato, después de los pendientes que llegaron
+        antes: latest-wins solo descarta selecciones obsoletas, nunca
+        reordena eventos.
+        """
+        cls._event_stats['received'] += 1
+        try:
+            data = msg["content"]["data"]
+            event_type = data.get("type")
+            payload = data.get("payload")
+        except (KeyError, TypeError, AttributeError):
+            event_type, payload = None, None
+        
+        if not cls._coalesce_enabled or event_type not in cls._coalesce_types:
+            cls.flush_pending()
+            cls._event_stats['processed'] += 1
+            cls._handle_message(div_id, msg)
+            return
+        
+        view = payload.get("__view_letter__") if isinstance(payload, dict) else None
+        key = (div_id, view, event_type)
+        if key in cls._pending:
+            # El evento pendiente quedó obsoleto: se descarta sin ejecutar handlers
+            del cls._pending[key]
+            cls._event_stats['dropped'] += 1
+            label = f"{div_id}:{view}:{event_type}"
+            by_key = cls._event_stats['dropped_by_key']
+            by_key[label] = by_key.get(label, 0) + 1
+        cls._pending[key] = (div_id, msg)
+        cls._schedule_drain()
+    
+    @classmethod
+    def _schedule_drain(cls):
+        """Programa el procesamiento de pendientes en el loop del kernel."""
+        if cls._drain_scheduled:
+            return
+        cls._drain_scheduled = True
+        try:
+            from IPython import get_ipython
+            ip = get_ipython()
+            io_loop = getattr(getattr(ip, "kernel", None), "io_loop", None)
+        except Exception:
+            io_loop = None
+        if io_loop is not None:
+            io_loop.add_callback(cls.flush_pending)
+        else:
+            # Sin loop de kernel (tests, scripts): procesar de inmediato
+            cls.flush_pending()
+    
+    @classmethod
+    def flush_pending(cls):
+        """Procesa los eventos pendientes (el más reciente de cada clave)."""
+        cls._drain_scheduled = False
+        while cls._pending:
+            _, (div_id, msg) = cls._pending.popitem(last=False)
+            cls._event_stats['processed'] += 1
+            cls._handle_message(div_id, msg)
+    
+    @classmethod
+    def _resolve_row_ids(cls, div_id, payload):
+        """
+        Resuelve una selección enviada como posiciones de fila.
+        
+        Las posiciones se resuelven contra el dataset compartido del layout
+        con un único ``take``. El payload recibe ``row_ids`` (np.ndarray),
+        ``__selection__`` (RowSelection, bitmask comparable en O(1)),
+        ``__frame__`` (DataFrame) e ``items`` (SelectionRows: los registros
+        solo se materializan si un handler los recorre).
+        """
+        row_ids = payload.pop("__row_ids__")
+        instance = cls.get_instance(div_id)
+        datasets = getattr(instance, "_datasets", None) or {}
+        table = datasets.get(row_ids.get("dataset"))
+        if table is None:
+            if cls._debug:
+                print(f"⚠️ [CommManager] Dataset '{row_ids.get('dataset')}' no registrado en '{div_id}'")
+            payload.setdefault("items", [])
+            return
+        from ..data.datasets import decode_row_ids
+        cls._attach_positions(payload, table, decode_row_ids(row_ids, len(table.data)))
+    
+    @classmethod
+    def _resolve_brush(cls, div_id, payload):
+        """
+        Evalúa en Python un brush enviado como geometría.
+        
+        El navegador envía solo ``{'dataset', 'extents': {columna: [min, max]}}``
+        (brush rectangular) o ``{'dataset', 'columns': [x, y], 'polygon': [...]}``
+        (lasso); la selección se calcula vectorizada sobre las columnas
+        cacheadas del dataset compartido, aunque el navegador tenga solo una
+        muestra.
+        """
+        brush = payload.pop("__brush__")
+        instance = cls.get_instance(div_id)
+        datasets = getattr(instance, "_datasets", None) or {}
+        table = datasets.get(brush.get("dataset"))
+        if table is None:
+            if cls._debug:
+                print(f"⚠️ [CommManager] Dataset '{brush.get('dataset')}' no registrado en '{div_id}'")
+            payload.setdefault("items", [])
+            return
+        if "polygon" in brush:
+            x_col, y_col = brush.get("columns") or (None, None)
+            payload["lasso"] = brush["polygon"]
+            positions = table.select_polygon(x_col, y_col, brush["polygon"])
+        else:
+            payload["brush"] = brush.get("extents")
+            positions = table.select_extent(brush.get("extents"))
+        cls._attach_positions(payload, table, positions)
+    
+    @classmethod
+    def _send_assets(cls, div_id):
+        """Envía matrix.js (con CSS y marca de versión) al navegador que lo pidió."""
+        from ..render.assets import AssetManager
+        if not cls.send(div_id, "assets", AssetManager.asset_payload()) and cls._debug:
+            print(f"⚠️ [CommManager] No se pudieron re-enviar los assets a '{div_id}'")
+    
+    @classmethod
+    def _send_d3(cls, div_id):
+        """Envía d3.min.js embebible al navegador que no pudo cargarlo desde un CDN."""
+        from ..render.assets import AssetManager
+        js = AssetManager.d3_bundle_js() if AssetManager.load_d3() else ""
+        if not cls.send(div_id, "d3_bundle", {"js": js}) and cls._debug:
+            print(f"⚠️ [CommManager] No se pudo enviar D3 a '{div_id}'")
+    
+    @staticmethod
+    def _attach_positions(payload, table, positions):
+        """Completa un payload de selección a partir de posiciones de la tabla."""
+        from ..reactive.selection import RowSelection, SelectionRows
+        selection = RowSelection(table.data, row_ids=positions)
+        payload["row_ids"] = positions
+        payload["__selection__"] = selection
+        payload["__frame__"] = table.take(positions)
+        payload["items"] = SelectionRows(selection)
+        payload["count"] = int(positions.size)
+    
     @classmethod
     def _handle_message(cls, div_id, msg):
         """
@@ -126,6 +328,33 @@ class CommManager:
             event_type = data.get("type")
             payload = data.get("payload")
             
+            # La página perdió matrix.js (recarga): re-enviar la librería
+            if event_type == "asset_request":
+                cls._send_assets(div_id)
+                return
+            
+            # El navegador no alcanzó ningún CDN de D3: enviar la copia local
+            if event_type == "d3_request":
+                cls._send_d3(div_id)
+                return
+            
+            # El navegador ejecutó la librería: las salidas siguientes pueden omitirla
+            if event_type == "assets_loaded":
+                from ..render.assets import AssetManager
+                AssetManager.confirm_injection((payload or {}).get("hash"))
+                return
+            
+            # Columnas numéricas enviadas como buffers binarios (typed arrays)
+            if isinstance(payload, dict) and "__binary__" in payload:
+                from .binary import unpack_columns
+                payload["__columns__"] = unpack_columns(payload.pop("__binary__"), msg.get("buffers") or [])
+            
+            # Selección compacta (posiciones de fila en un dataset compartido)
+            if isinstance(payload, dict) and "__row_ids__" in payload:
+                cls._resolve_row_ids(div_id, payload)
+            elif isinstance(payload, dict) and "__brush__" in payload:
+                cls._resolve_brush(div_id, payload)
+            
             # ✅ CORRECCIÓN: Validar estructura básica del payload
             if not isinstance(payload, dict):
                 if cls._debug:
@@ -142,8 +371,9 @@ class CommManager:
                     if cls._debug:
                         print(f"⚠️ [CommManager] Evento 'select' sin campo 'items', agregando items vacío")
                     payload['items'] = []
-                # Asegurar que items sea una lista
-                if not isinstance(payload.get('items'), list):
+                # Asegurar que items sea una lista (o una selección perezosa)
+                from ..reactive.selection import SelectionRows
+                if not isinstance(payload.get('items'), (list, SelectionRows)):
                     if cls._debug:
                         print(f"⚠️ [CommManager] items no es lista: {type(payload.get('items'))}, convirtiendo")
                     items = payload.get('items')
@@ -204,6 +434,36 @@ class CommManager:
                 import traceback
                 traceback.print_exc()
     
+    @classmethod
+    def send(cls, div_id, event_type, payload, buffers=None):
+        """
+        Envía un mensaje desde Python al JavaScript de un div_id.
+        
+        Usa el comm que JS abrió para ese contenedor. El mensaje tiene la misma
+        forma que los eventos JS → Python: {type, div_id, payload}.
+        
+        Args:
+            div_id (str): ID del div contenedor
+            event_type (str): Tipo de mensaje (ej: 'heatmap_tile')
+            payload (dict): Datos serializables a JSON
+            buffers (list, optional): Buffers binarios adjuntos al mensaje
+        
+        Returns:
+            bool: True si el mensaje se envió
+        """
+        comm = cls._comms.get(div_id)
+        if comm is None:
+            if cls._debug:
+                print(f"⚠️ [CommManager] No hay comm abierto para div_id '{div_id}'")
+            return False
+        try:
+            comm.send({"type": event_type, "div_id": div_id, "payload": payload}, buffers=buffers)
+            return True
+        except Exception as e:
+            if cls._debug:
+                print(f"❌ [CommManager] Error enviando '{event_type}' a '{div_id}': {e}")
+            return False
+    
     @classmethod
     def get_status(cls):
         """Retorna el estado actual del sistema de comunicación"""
@@ -217,6 +477,8 @@ class CommManager:
             "debug_mode": cls._debug,
             "active_instances": sum(active_instances.values()),
             "total_instances": len(cls._instances),
+            "open_comms": len(cls._comms),
+            "event_stats": cls.get_event_stats(),
             "instance_ids": list(cls._instances.keys()),
         }
 
@@ -1,35 +1,159 @@
 """
 Layout Engine - Parsing y gestión de layouts ASCII
 """
+from collections import OrderedDict
+
 from .exceptions import LayoutError
 
+# Valores por defecto de matrix.js para gap y padding de celda (px)
+DEFAULT_GAP = 12
+DEFAULT_CELL_PADDING = 15
+
+
+def _css_number(value):
+    """Número con el mismo formato que String(n) en JS (2.0 -> '2')."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _merge_key(merge):
+    """Normaliza la opción de merge (__merge__) a una clave hashable."""
+    if merge is True:
+        return True
+    if isinstance(merge, (list, tuple, set, frozenset)):
+        return frozenset(merge)
+    return False
+
 
 class Grid:
-    """Representación de un grid de layout"""
+    """
+    Representación de un grid de layout.
+    
+    Los grids que retorna LayoutEngine.parse_ascii_layout se cachean por
+    layout y se comparten: son de solo lectura (``add_cell`` lanza
+    LayoutError; ``copy()`` da un grid propio modificable).
+    """
     
-    def __init__(self, rows, cols):
+    def __init__(self, rows, cols, lines=None):
         """
         Inicializa un grid.
         
         Args:
             rows (int): Número de filas
             cols (int): Número de columnas
+            lines (tuple, optional): Filas del layout ASCII (una letra por celda)
         """
         self.rows = rows
         self.cols = cols
-        self.cells = {}  # {cell_id: {'row': int, 'col': int, 'letter': str}}
+        self.lines = tuple(lines) if lines is not None else None
+        self._cells = None if lines is not None else {}
+        self._regions = {}
+        self._shared = False  # True si está en el cache de LayoutEngine
+    
+    @property
+    def cells(self):
+        """{cell_id: {'row': int, 'col': int, 'letter': str}}, construido al primer acceso."""
+        if self._cells is None:
+            self._cells = {
+                f"{r}_{c}": {'row': r, 'col': c, 'letter': letter}
+                for r, line in enumerate(self.lines)
+                for c, letter in enumerate(line)
+            }
+        return self._cells
+    
+    @property
+    def letters(self):
+        """Caracteres no vacíos del layout (letras y '.')."""
+        if self.lines is None:
+            return {cell['letter'] for cell in self.cells.values() if cell['letter'].strip()}
+        return {ch for ch in ''.join(self.lines) if ch.strip()}
     
     def add_cell(self, cell_id, row, col, letter):
-        """Agrega una celda al grid"""
-        self.cells[cell_id] = {
+        """
+        Agrega una celda al grid.
+        
+        Raises:
+            LayoutError: Si el grid es compartido (cache de parse_ascii_layout)
+        """
+        if self._shared:
+            raise LayoutError(
+                "El grid de parse_ascii_layout es compartido y de solo lectura; "
+                "usa grid.copy() para modificarlo"
+            )
+        cells = self.cells
+        # Las celdas pasan a ser la fuente del layout: descartar filas y regiones
+        self.lines = None
+        self._regions = {}
+        cells[cell_id] = {
             'row': row,
             'col': col,
             'letter': letter
         }
     
+    def copy(self):
+        """Copia modificable del grid (no compartida)."""
+        grid = Grid(self.rows, self.cols, self.lines)
+        if self.lines is None:
+            grid._cells = {cell_id: dict(cell) for cell_id, cell in self.cells.items()}
+        return grid
+    
     def get_cell(self, cell_id):
         """Obtiene información de una celda"""
         return self.cells.get(cell_id)
+    
+    def regions(self, merge=False):
+        """
+        Regiones rectangulares de celdas, con la misma semántica de merge que matrix.js.
+        
+        Con merge activo para una letra, cada región se expande primero a la
+        derecha y luego hacia abajo mientras el rectángulo tenga la misma
+        letra; sin merge cada celda es su propia región. '.' no genera región.
+        
+        Args:
+            merge (bool|list): Opción ``__merge__`` (True, False o letras)
+        
+        Returns:
+            list: ``[letra, fila, columna, alto, ancho]`` en orden de lectura
+        """
+        key = _merge_key(merge)
+        cached = self._regions.get(key)
+        if cached is not None:
+            return cached
+        lines = self.lines
+        if lines is None:
+            lines = [''.join(self.cells[f"{r}_{c}"]['letter'] for c in range(self.cols))
+                     for r in range(self.rows)]
+        R, C = self.rows, self.cols
+        visited = [[False] * C for _ in range(R)]
+        regions = []
+        for r in range(R):
+            for c in range(C):
+                if visited[r][c]:
+                    continue
+                letter = lines[r][c]
+                if letter == '.':
+                    visited[r][c] = True
+                    continue
+                width = height = 1
+                if key is True or (key and letter in key):
+                    while c + width < C and not visited[r][c + width] and lines[r][c + width] == letter:
+                        width += 1
+                    while r + height < R and all(
+                        not visited[r + height][cc] and lines[r + height][cc] == letter
+                        for cc in range(c, c + width)
+                    ):
+                        height += 1
+                for rr in range(r, r + height):
+                    for cc in range(c, c + width):
+                        visited[rr][cc] = True
+                regions.append([letter, r, c, height, width])
+        self._regions[key] = regions
+        return regions
 
 
 class LayoutEngine:
@@ -38,11 +162,19 @@ class LayoutEngine:
     Convierte layouts ASCII en estructura de grid.
     """
     
-    @staticmethod
-    def parse_ascii_layout(ascii_layout):
+    # Grids parseados por layout ASCII (LRU)
+    grid_cache_size = 128
+    _grid_cache = OrderedDict()
+    
+    @classmethod
+    def parse_ascii_layout(cls, ascii_layout):
         """
         Parsea un layout ASCII en estructura de grid.
         
+        El resultado se cachea por layout: repetir el parseo del mismo
+        string retorna el mismo Grid, compartido y de solo lectura
+        (``Grid.copy()`` para modificarlo).
+        
         Args:
             ascii_layout (str): Layout ASCII (ej: "AB\nCD")
         
@@ -52,6 +184,19 @@ class LayoutEngine:
         Raises:
             LayoutError: Si el layout es inválido
         """
+        grid = cls._grid_cache.get(ascii_layout)
+        if grid is not None:
+            cls._grid_cache.move_to_end(ascii_layout)
+            return grid
+        grid = cls._parse(ascii_layout)
+        grid._shared = True
+        cls._grid_cache[ascii_layout] = grid
+        while len(cls._grid_cache) > cls.grid_cache_size:
+            cls._grid_cache.popitem(last=False)
+        return grid
+    
+    @staticmethod
+    def _parse(ascii_layout):
         if not ascii_layout:
             raise LayoutError("ascii_layout no puede estar vacío")
         
@@ -63,15 +208,57 @@ class LayoutEngine:
         if not all(len(r) == col_len for r in rows):
             raise LayoutError("Todas las filas del ascii_layout deben tener igual longitud")
         
-        grid = Grid(len(rows), col_len)
+        # Las celdas (dict por cell_id) se construyen solo si se piden (Grid.cells)
+        return Grid(len(rows), col_len, rows)
+    
+    @classmethod
+    def geometry(cls, grid, merge=False, row_heights=None, col_widths=None,
+                 gap=None, cell_padding=None, max_width=None):
+        """
+        Geometría lista para matrix.js (``__grid__`` del mapping).
         
-        # Parsear cada celda
-        for row_idx, row in enumerate(rows):
-            for col_idx, letter in enumerate(row):
-                cell_id = f"{row_idx}_{col_idx}"
-                grid.add_cell(cell_id, row_idx, col_idx, letter)
+        Incluye las regiones de celdas ya fusionadas y las plantillas CSS de
+        filas y columnas, calculadas igual que render() en matrix.js, para
+        que el navegador no vuelva a parsear el layout.
         
-        return grid
+        Returns:
+            dict: ``{'rows', 'cols', 'regions', 'templateRows', 'templateColumns'}``
+        """
+        R, C = grid.rows, grid.cols
+        if isinstance(col_widths, (list, tuple)) and len(col_widths) == C:
+            template_columns = ' '.join(
+                f"{_css_number(w)}fr" if _is_number(w) else str(w) for w in col_widths
+            )
+        else:
+            template_columns = f"repeat({C}, 1fr)"
+        
+        if isinstance(row_heights, (list, tuple)) and len(row_heights) == R:
+            template_rows = ' '.join(
+                f"minmax({_css_number(h)}px, auto)" if _is_number(h) else str(h) for h in row_heights
+            )
+        else:
+            gap = DEFAULT_GAP if gap is None else gap
+            cell_padding = DEFAULT_CELL_PADDING if cell_padding is None else cell_padding
+            total = R * C
+            min_height = 350
+            if max_width:
+                if total >= 9:
+                    # Alto proporcional al ancho estimado de celda (aspect ratio ~1.2:1)
+                    cell_width = (int(max_width) / C) - (gap * (C - 1) / C) - (cell_padding * 2)
+                    min_height = max(200, min(350, cell_width / 1.2))
+                elif total >= 6:
+                    min_height = 280
+            elif total >= 9:
+                min_height = 280
+            template_rows = f"repeat({R}, minmax({_css_number(min_height)}px, auto))"
+        
+        return {
+            'rows': R,
+            'cols': C,
+            'regions': grid.regions(merge),
+            'templateRows': template_rows,
+            'templateColumns': template_columns,
+        }
     
     @staticmethod
     def validate_grid(grid):
@@ -9,7 +9,8 @@ from .preparators import (
     prepare_heatmap_data,
     prepare_line_data,
     prepare_pie_data,
-    prepare_grouped_bar_data
+    prepare_grouped_bar_data,
+    split_series_arrays
 )
 from .validators import (
     validate_data_structure,
@@ -27,8 +28,19 @@ from .transformers import (
 from .aggregators import (
     group_by_category,
     bin_numeric_data,
-    calculate_statistics
+    calculate_statistics,
+    aggregate_errorbars
 )
+from .pyramid import (
+    HeatmapPyramid,
+    build_heatmap_pyramid,
+    get_heatmap_pyramid,
+    resolve_heatmap_pyramid,
+    clear_pyramid_cache
+)
+from .confusion import ConfusionMatrixEngine
+from .datasets import DatasetTable, dehydrate_mapping
+from .spatial import GridIndex, points_in_polygon
 
 __all__ = [
     'prepare_scatter_data',
@@ -39,6 +51,7 @@ __all__ = [
     'prepare_line_data',
     'prepare_pie_data',
     'prepare_grouped_bar_data',
+    'split_series_arrays',
     'validate_data_structure',
     'validate_columns',
     'validate_data_types',
@@ -50,6 +63,17 @@ __all__ = [
     'sanitize_data_for_json',
     'group_by_category',
     'bin_numeric_data',
-    'calculate_statistics'
+    'calculate_statistics',
+    'aggregate_errorbars',
+    'HeatmapPyramid',
+    'build_heatmap_pyramid',
+    'get_heatmap_pyramid',
+    'resolve_heatmap_pyramid',
+    'clear_pyramid_cache',
+    'ConfusionMatrixEngine',
+    'DatasetTable',
+    'dehydrate_mapping',
+    'GridIndex',
+    'points_in_polygon'
 ]
 
@@ -2,11 +2,15 @@
 Agregadores de datos para BESTLIB
 """
 from collections import defaultdict
-from ._imports import ensure_pandas
+from ._imports import ensure_pandas, ensure_numpy
+from ..core.exceptions import DataError
 
 pd = ensure_pandas()
+np = ensure_numpy()
 HAS_PANDAS = pd is not None
 
+VALID_ERROR_MODES = ('std', 'sem', 'ci')
+
 def group_by_category(data, category_col, value_col=None, agg_func='sum'):
     """
     Agrupa datos por categoría y agrega valores.
@@ -151,3 +155,117 @@ def calculate_statistics(data, column):
         'count': len(values)
     }
 
+
+def _bootstrap_means_chunk(values, codes, starts, sizes, n_reps, seed):
+    """
+    Calcula ``n_reps`` réplicas bootstrap de la media de cada grupo.
+
+    Los valores vienen ordenados por grupo; cada réplica remuestrea todos los
+    grupos a la vez (un índice aleatorio por fila dentro de su grupo) y suma
+    con ``np.bincount``. Es una función de módulo para poder usarse desde un
+    pool de procesos.
+
+    Returns:
+        ndarray (n_reps, n_grupos) con las medias remuestreadas
+    """
+    rng = np.random.default_rng(seed)
+    n_groups = len(starts)
+    row_starts = starts[codes]
+    row_sizes = sizes[codes]
+    out = np.empty((n_reps, n_groups))
+    for b in range(n_reps):
+        idx = row_starts + (rng.random(len(values)) * row_sizes).astype(np.int64)
+        out[b] = np.bincount(codes, weights=values[idx], minlength=n_groups) / sizes
+    return out
+
+
+def _bootstrap_ci(values, codes, sizes, confidence, n_boot, n_jobs, random_state):
+    """Intervalo de confianza bootstrap (percentil) de la media por grupo."""
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+    seeds = np.random.SeedSequence(random_state)
+
+    n_jobs = int(n_jobs or 1)
+    if n_jobs > 1 and n_boot >= n_jobs:
+        from concurrent.futures import ProcessPoolExecutor
+        chunks = [len(c) for c in np.array_split(np.arange(n_boot), n_jobs)]
+        child_seeds = seeds.spawn(len(chunks))
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                futures = [
+                    pool.submit(_bootstrap_means_chunk, values, codes, starts, sizes, reps, seed)
+                    for reps, seed in zip(chunks, child_seeds)
+                ]
+                boot = np.vstack([f.result() for f in futures])
+        except (OSError, RuntimeError):
+            # Entornos sin soporte de procesos (p. ej. algunos kernels remotos)
+            boot = _bootstrap_means_chunk(values, codes, starts, sizes, n_boot, seeds)
+    else:
+        boot = _bootstrap_means_chunk(values, codes, starts, sizes, n_boot, seeds)
+
+    alpha = (1.0 - confidence) / 2.0
+    lower, upper = np.quantile(boot, [alpha, 1.0 - alpha], axis=0)
+    return lower, upper
+
+
+def aggregate_errorbars(data, value_col, group_col, error='sem', confidence=0.95,
+                        n_boot=1000, n_jobs=None, random_state=None):
+    """
+    Calcula media ± error por grupo en un único groupby vectorizado.
+
+    Args:
+        data: DataFrame o lista de diccionarios con valores crudos
+        value_col: Columna numérica a agregar
+        group_col: Columna de agrupación (categórica o eje X numérico)
+        error: 'std' (desviación estándar), 'sem' (error estándar) o
+            'ci' (intervalo de confianza bootstrap)
+        confidence: Nivel de confianza para error='ci'
+        n_boot: Número de réplicas bootstrap para error='ci'
+        n_jobs: Si > 1, reparte las réplicas bootstrap en un pool de procesos
+        random_state: Semilla del bootstrap
+
+    Returns:
+        DataFrame con columnas: group, mean, lower, upper, count
+    """
+    if not HAS_PANDAS or np is None:
+        raise DataError("pandas y numpy son requeridos para agregar errorbars")
+    if error not in VALID_ERROR_MODES:
+        raise DataError(f"error debe ser uno de {VALID_ERROR_MODES}, recibido: {error}")
+    if not isinstance(data, pd.DataFrame):
+        data = pd.DataFrame(data)
+    for col in (value_col, group_col):
+        if col not in data.columns:
+            raise DataError(f"Columna '{col}' no encontrada")
+
+    values = pd.to_numeric(data[value_col], errors='coerce')
+    mask = values.notna() & data[group_col].notna()
+    values = values[mask].to_numpy(dtype=float)
+    groups = data.loc[mask, group_col]
+
+    codes, uniques = pd.factorize(groups, sort=True)
+    n_groups = len(uniques)
+    counts = np.bincount(codes, minlength=n_groups).astype(float)
+    sums = np.bincount(codes, weights=values, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+        sq = np.bincount(codes, weights=(values - means[codes]) ** 2, minlength=n_groups)
+        std = np.where(counts > 1, np.sqrt(sq / np.maximum(counts - 1, 1)), 0.0)
+
+    if error == 'std':
+        lower, upper = means - std, means + std
+    elif error == 'sem':
+        sem = std / np.sqrt(counts)
+        lower, upper = means - sem, means + sem
+    else:
+        order = np.argsort(codes, kind='stable')
+        lower, upper = _bootstrap_ci(
+            values[order], codes[order].astype(np.int64), counts.astype(np.int64),
+            confidence, int(n_boot), n_jobs, random_state
+        )
+
+    return pd.DataFrame({
+        'group': uniques,
+        'mean': means,
+        'lower': lower,
+        'upper': upper,
+        'count': counts.astype(int),
+    })
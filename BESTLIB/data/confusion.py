@@ -0,0 +1,126 @@
+"""
+Motor vectorizado de matrices de confusión.
+
+Factoriza las etiquetas una sola vez y cuenta pares (real, predicho) con
+``np.bincount`` sobre ``true_code * k + pred_code``. Las actualizaciones
+enlazadas reutilizan el mapeo de etiquetas cacheado, de modo que recalcular
+la matriz para un subconjunto es O(n) en numpy, sin DataFrames intermedios.
+"""
+from ._imports import ensure_numpy, ensure_pandas
+from ..core.exceptions import DataError
+
+np = ensure_numpy()
+pd = ensure_pandas()
+
+VALID_NORMALIZE = (None, 'true', 'pred', 'all')
+
+
+class ConfusionMatrixEngine:
+    """
+    Matriz de confusión con etiquetas factorizadas y cacheadas.
+
+    Args:
+        y_true: Secuencia de etiquetas reales
+        y_pred: Secuencia de etiquetas predichas (misma longitud)
+        labels (list, optional): Orden explícito de etiquetas. Por defecto,
+            la unión ordenada de etiquetas reales y predichas.
+    """
+
+    def __init__(self, y_true, y_pred, labels=None):
+        if np is None or pd is None:
+            raise DataError("numpy y pandas son requeridos para la matriz de confusión")
+        y_true = pd.Series(y_true).reset_index(drop=True)
+        y_pred = pd.Series(y_pred).reset_index(drop=True)
+        if len(y_true) != len(y_pred):
+            raise DataError("y_true e y_pred deben tener la misma longitud")
+
+        if labels is None:
+            # Factorizar la unión una sola vez (sort=True = orden de sklearn)
+            both = pd.concat([y_true, y_pred], ignore_index=True)
+            codes, uniques = pd.factorize(both, sort=True)
+            n = len(y_true)
+            self._true_codes = codes[:n].astype(np.int64)
+            self._pred_codes = codes[n:].astype(np.int64)
+            self._index = pd.Index(uniques)
+        else:
+            self._index = pd.Index(labels)
+            self._true_codes = self._index.get_indexer(y_true).astype(np.int64)
+            self._pred_codes = self._index.get_indexer(y_pred).astype(np.int64)
+
+        self.labels = self._index.tolist()
+        self.k = len(self.labels)
+        # Filas con etiquetas nulas o fuera de 'labels' quedan fuera del conteo
+        self._valid = (self._true_codes >= 0) & (self._pred_codes >= 0)
+        self._full_counts = None
+
+    def encode(self, values):
+        """Convierte etiquetas a códigos usando el mapeo cacheado (-1 si no existe)."""
+        return self._index.get_indexer(pd.Series(values)).astype(np.int64)
+
+    def _bincount(self, true_codes, pred_codes):
+        k = self.k
+        valid = (true_codes >= 0) & (pred_codes >= 0)
+        flat = true_codes[valid] * k + pred_codes[valid]
+        return np.bincount(flat, minlength=k * k).reshape(k, k)
+
+    def counts(self, positions=None):
+        """
+        Conteos (k x k) para todas las filas o para un subconjunto.
+
+        Args:
+            positions (array-like, optional): Posiciones (0..n-1) de las filas
+                a incluir. Si es None se usan todas (resultado cacheado).
+        """
+        if positions is None:
+            if self._full_counts is None:
+                self._full_counts = self._bincount(self._true_codes, self._pred_codes)
+            return self._full_counts
+        positions = np.asarray(positions, dtype=np.int64)
+        return self._bincount(self._true_codes.take(positions), self._pred_codes.take(positions))
+
+    def counts_from_labels(self, y_true, y_pred):
+        """Conteos para un subconjunto dado por sus etiquetas (reusa el mapeo cacheado)."""
+        return self._bincount(self.encode(y_true), self.encode(y_pred))
+
+    @staticmethod
+    def normalize(counts, normalize='true'):
+        """
+        Normaliza una matriz de conteos de forma vectorizada.
+
+        Args:
+            counts: Matriz k x k de conteos
+            normalize: 'true' (por fila), 'pred' (por columna), 'all' o None
+        """
+        if normalize not in VALID_NORMALIZE:
+            raise DataError(f"normalize debe ser uno de {VALID_NORMALIZE}, recibido: {normalize}")
+        counts = np.asarray(counts, dtype=float)
+        if normalize is None:
+            return counts
+        if normalize == 'true':
+            denom = counts.sum(axis=1, keepdims=True)
+        elif normalize == 'pred':
+            denom = counts.sum(axis=0, keepdims=True)
+        else:
+            denom = counts.sum()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = np.where(denom > 0, counts / np.where(denom > 0, denom, 1), 0.0)
+        return result
+
+    def matrix(self, positions=None, normalize='true'):
+        """Matriz de confusión (opcionalmente normalizada) para un subconjunto."""
+        return self.normalize(self.counts(positions), normalize)
+
+    def to_long(self, matrix, true_name='index', pred_name='Pred', value_name='Value'):
+        """
+        Convierte una matriz k x k a formato largo para el heatmap (sin melt).
+
+        Returns:
+            DataFrame con columnas (pred_name, true_name, value_name)
+        """
+        k = self.k
+        labels = np.asarray(self.labels, dtype=object)
+        return pd.DataFrame({
+            true_name: np.repeat(labels, k),
+            pred_name: np.tile(labels, k),
+            value_name: np.asarray(matrix, dtype=float).ravel(),
+        })
@@ -0,0 +1,311 @@
+"""
+Tabla de datasets compartidos por las vistas de un layout.
+
+Cada vista embebe en su spec las filas originales (``_original_row`` /
+``_original_rows``) para poder reconstruir selecciones. Con varias vistas
+sobre el mismo DataFrame esas filas se repetían una vez por vista. Aquí la
+tabla base se serializa una sola vez (por columnas) en ``__datasets__`` y
+los specs guardan solo posiciones de fila (``_row`` / ``_rows``), que
+matrix.js resuelve al renderizar. Las posiciones las emiten los preparadores
+(``_position`` / ``_positions``) al recorrer el DataFrame: no se buscan por
+valor, así que las filas duplicadas conservan cada una su posición.
+"""
+import base64
+
+from ._imports import ensure_numpy, ensure_pandas
+from ..core.exceptions import DataError
+
+np = ensure_numpy()
+pd = ensure_pandas()
+
+DEFAULT_DATASET = 'main'
+
+# Ejes de brush por tipo de vista: eje -> argumento del chart con la columna.
+# Con un dataset compartido el navegador envía solo las extensiones del brush
+# y la selección se evalúa en Python (ver DatasetTable.select_extent). Solo
+# figuran los renderers que envían extensiones: scatter (SVG y Canvas) y
+# line_plot con el backend Canvas (ver BRUSH_CANVAS_ONLY).
+BRUSH_AXES = {
+    'scatter': {'x': 'x_col', 'y': 'y_col'},
+    'line_plot': {'x': 'x_col', 'y': 'y_col'},
+}
+
+# Tipos cuyo renderer SVG no envía extensiones de brush
+BRUSH_CANVAS_ONLY = frozenset({'line_plot'})
+
+# Contenedores de un spec que pueden llevar filas originales
+_ROW_CONTAINERS = ('data', 'series')
+
+
+class DatasetTable:
+    """
+    Tabla base de un layout, serializable una sola vez.
+
+    Args:
+        name (str): Nombre con el que los specs referencian la tabla
+        data (DataFrame): Datos originales
+    """
+
+    def __init__(self, name, data):
+        if pd is None or not isinstance(data, pd.DataFrame):
+            raise DataError("Los datasets compartidos requieren un DataFrame de pandas")
+        self.name = name
+        self.data = data
+        self.columns = [str(c) for c in data.columns]
+        self._column_set = frozenset(data.columns)
+        self._arrays = {}
+        self._indexes = {}
+
+    def _valid_position(self, pos):
+        return isinstance(pos, (int, np.integer)) and 0 <= pos < len(self.data)
+
+    def take(self, positions):
+        """Filas de la tabla en las posiciones dadas (una sola indexación vectorizada)."""
+        return self.data.take(positions)
+
+    def column_array(self, column):
+        """Columna como np.ndarray float64 (cacheada; no numéricos -> NaN)."""
+        array = self._arrays.get(column)
+        if array is None:
+            if column not in self._column_set:
+                raise DataError(f"La columna '{column}' no existe en el dataset '{self.name}'")
+            array = pd.to_numeric(self.data[column], errors='coerce').to_numpy(dtype=np.float64)
+            self._arrays[column] = array
+        return array
+
+    def select_extent(self, extents):
+        """
+        Posiciones de las filas dentro de un brush rectangular (bordes incluidos).
+
+        Args:
+            extents (dict): {columna: [mínimo, máximo]}, una entrada por eje
+
+        Returns:
+            np.ndarray: Posiciones ordenadas (int64)
+        """
+        if not extents:
+            raise DataError("El brush no tiene extensiones")
+        if len(extents) == 2:
+            (cx, bx), (cy, by) = extents.items()
+            index = self._indexes.get((cx, cy))
+            if index is None and (cy, cx) in self._indexes:
+                (cx, bx), (cy, by) = (cy, by), (cx, bx)
+                index = self._indexes[(cx, cy)]
+            if index is not None:
+                try:
+                    return index.query_rect(bx[0], bx[1], by[0], by[1])
+                except (TypeError, ValueError, IndexError):
+                    raise DataError(f"Extensión de brush inválida: {extents}")
+        mask = np.ones(len(self.data), dtype=bool)
+        for column, bounds in extents.items():
+            try:
+                lo, hi = sorted(float(b) for b in bounds)
+            except (TypeError, ValueError):
+                raise DataError(f"Extensión de brush inválida para '{column}': {bounds}")
+            values = self.column_array(column)
+            mask &= (values >= lo) & (values <= hi)
+        return np.flatnonzero(mask).astype(np.int64)
+
+    def select_polygon(self, x_col, y_col, vertices):
+        """
+        Posiciones de las filas dentro de un polígono (lasso) en el plano (x_col, y_col).
+
+        Usa el índice espacial de las columnas: solo los puntos de las celdas
+        que cubren el bounding box del polígono pasan por la prueba exacta.
+        """
+        try:
+            return self.spatial_index(x_col, y_col).query_polygon(vertices)
+        except (TypeError, ValueError):
+            raise DataError(f"Polígono de lasso inválido: {vertices}")
+
+    def spatial_index(self, x_col, y_col):
+        """Índice espacial (GridIndex) sobre dos columnas, construido una sola vez."""
+        key = (x_col, y_col)
+        index = self._indexes.get(key)
+        if index is None:
+            from .spatial import GridIndex
+            index = GridIndex(self.column_array(x_col), self.column_array(y_col))
+            self._indexes[key] = index
+        return index
+
+    def to_payload(self):
+        """Tabla por columnas para ``__datasets__`` del mapping."""
+        return {
+            'columns': self.columns,
+            'length': len(self.data),
+            'data': {str(c): self.data[c].tolist() for c in self.data.columns},
+        }
+
+    def dehydrate_item(self, item):
+        """
+        Reemplaza las filas originales de un registro por posiciones (retorna (item, cambió)).
+
+        Usa las posiciones que dejó el preparador (``_position`` /
+        ``_positions``); sin ellas el registro queda igual.
+        """
+        if not isinstance(item, dict):
+            return item, False
+        changed = False
+        new_item = item
+        pos = item.get('_position')
+        if '_original_row' in item and self._valid_position(pos):
+            new_item = {k: v for k, v in item.items() if k not in ('_original_row', '_position')}
+            new_item['_row'] = int(pos)
+            changed = True
+        positions = item.get('_positions')
+        rows = item.get('_original_rows')
+        if isinstance(rows, list) and isinstance(positions, list) and len(positions) == len(rows) \
+                and all(self._valid_position(p) for p in positions):
+            if not changed:
+                new_item = dict(item)
+            new_item.pop('_original_rows', None)
+            new_item.pop('_positions', None)
+            new_item['_rows'] = [int(p) for p in positions]
+            changed = True
+        return new_item, changed
+
+    def _dehydrate_list(self, items):
+        result = []
+        changed = False
+        for item in items:
+            new_item, item_changed = self.dehydrate_item(item)
+            result.append(new_item)
+            changed = changed or item_changed
+        return (result, True) if changed else (items, False)
+
+    def dehydrate_spec(self, spec):
+        """
+        Reemplaza filas originales por posiciones en la tabla.
+
+        No modifica el spec recibido: retorna una copia superficial sólo si
+        hubo cambios. Las filas que no pertenecen a la tabla se dejan inline.
+
+        Returns:
+            dict: Spec con ``__dataset__`` y ``_row``/``_rows``, o el original
+        """
+        if not isinstance(spec, dict):
+            return spec
+        new_spec = None
+        for container in _ROW_CONTAINERS:
+            value = spec.get(container)
+            if isinstance(value, list):
+                new_value, changed = self._dehydrate_list(value)
+            elif isinstance(value, dict):
+                new_value, changed = {}, False
+                for key, series in value.items():
+                    if isinstance(series, list):
+                        series, series_changed = self._dehydrate_list(series)
+                        changed = changed or series_changed
+                    new_value[key] = series
+            else:
+                continue
+            if changed:
+                if new_spec is None:
+                    new_spec = dict(spec)
+                new_spec[container] = new_value
+        if new_spec is None:
+            return spec
+        new_spec['__dataset__'] = self.name
+        return new_spec
+
+
+def dehydrate_mapping(mapping, datasets):
+    """
+    Aplica los datasets compartidos a un mapping listo para serializar.
+
+    Args:
+        mapping (dict): Mapping letra -> spec (más metadata ``__*__``)
+        datasets (dict): nombre -> DatasetTable
+
+    Returns:
+        dict: Nuevo mapping con ``__datasets__`` (sólo tablas referenciadas)
+    """
+    if not datasets:
+        return mapping
+    result = {}
+    used = set()
+    for key, spec in mapping.items():
+        if key.startswith('__') or not isinstance(spec, dict):
+            result[key] = spec
+            continue
+        name = spec.get('__dataset__')
+        table = datasets.get(name) if name else None
+        if table is None:
+            result[key] = spec
+            continue
+        new_spec = table.dehydrate_spec(spec)
+        if new_spec is not spec:
+            used.add(name)
+        result[key] = new_spec
+    if used:
+        result['__datasets__'] = {name: datasets[name].to_payload() for name in sorted(used)}
+    return result
+
+
+def encode_row_ids(positions, length):
+    """
+    Codifica posiciones de fila en la forma más compacta (igual que matrix.js).
+
+    Formatos:
+        - ``{'ids': [...]}``: posiciones ordenadas
+        - ``{'ranges': [[inicio, fin), ...]}``: tramos contiguos
+        - ``{'bitmask': base64}``: un bit por fila (orden little-endian)
+
+    Returns:
+        dict: ``{'count', 'length', <formato>}``
+    """
+    ids = np.unique(np.asarray(positions, dtype=np.int64))
+    count = int(ids.size)
+    result = {'count': count, 'length': int(length)}
+    if count == 0:
+        result['ids'] = []
+        return result
+    breaks = np.flatnonzero(np.diff(ids) != 1) + 1
+    starts = np.concatenate(([ids[0]], ids[breaks]))
+    stops = np.concatenate((ids[breaks - 1] + 1, [ids[-1] + 1]))
+    # Costo aproximado en caracteres JSON de cada formato
+    digits = len(str(int(length)))
+    cost_ids = count * (digits + 1)
+    cost_ranges = starts.size * 2 * (digits + 2)
+    cost_mask = (int(length) + 7) // 8 * 4 // 3
+    best = min(cost_ids, cost_ranges, cost_mask)
+    if best == cost_ranges:
+        result['ranges'] = np.column_stack((starts, stops)).tolist()
+    elif best == cost_ids:
+        result['ids'] = ids.tolist()
+    else:
+        mask = np.zeros(int(length), dtype=np.uint8)
+        mask[ids] = 1
+        result['bitmask'] = base64.b64encode(np.packbits(mask, bitorder='little').tobytes()).decode('ascii')
+    return result
+
+
+def decode_row_ids(row_ids, length=None):
+    """
+    Decodifica una selección compacta a posiciones ordenadas (np.ndarray int64).
+
+    Args:
+        row_ids (dict): Selección en formato ``ids``, ``ranges`` o ``bitmask``
+        length (int, optional): Filas de la tabla (para validar rangos)
+    """
+    if 'ids' in row_ids:
+        ids = np.asarray(row_ids['ids'], dtype=np.int64)
+    elif 'ranges' in row_ids:
+        ranges = np.asarray(row_ids['ranges'], dtype=np.int64).reshape(-1, 2)
+        lengths = ranges[:, 1] - ranges[:, 0]
+        if (lengths < 0).any():
+            raise DataError("Rangos de filas inválidos")
+        total = int(lengths.sum())
+        # Expansión vectorizada de tramos [inicio, fin)
+        offsets = np.repeat(ranges[:, 0] - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        ids = np.arange(total, dtype=np.int64) + offsets
+    elif 'bitmask' in row_ids:
+        raw = np.frombuffer(base64.b64decode(row_ids['bitmask']), dtype=np.uint8)
+        bits = np.unpackbits(raw, bitorder='little')
+        n = int(row_ids.get('length', length if length is not None else bits.size))
+        ids = np.flatnonzero(bits[:n]).astype(np.int64)
+    else:
+        raise DataError("Formato de selección compacta desconocido")
+    if length is not None and ids.size and (ids.min() < 0 or ids.max() >= length):
+        raise DataError("Posiciones de fila fuera de rango")
+    return ids
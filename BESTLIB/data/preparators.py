@@ -3,10 +3,11 @@ Preparadores de datos para diferentes tipos de gráficos
 """
 from .validators import validate_scatter_data, validate_bar_data, validate_data_structure
 from ..core.exceptions import DataError
-from ._imports import ensure_pandas
+from ._imports import ensure_pandas, ensure_numpy
 from datetime import datetime
 
 pd = ensure_pandas()
+np = ensure_numpy()
 HAS_PANDAS = pd is not None
 
 
@@ -121,10 +122,11 @@ def prepare_scatter_data(data, x_col=None, y_col=None, category_col=None, size_c
         
         processed_data = df_work.to_dict('records')
         
-        # Agregar referencias a filas originales e índices
+        # Agregar referencias a filas originales, índices y posiciones en el DataFrame
         for idx, item in enumerate(processed_data):
             item['_original_row'] = original_data[idx]
             item['_original_index'] = int(data.index[idx])
+            item['_position'] = idx
         
         return processed_data, original_data
     else:
@@ -167,11 +169,13 @@ def prepare_bar_data(data, category_col=None, value_col=None):
         else:
             raise DataError("Debe especificar category_col")
         
-        # Agregar datos originales para referencia
+        # Agregar datos originales (y sus posiciones en el DataFrame) para referencia
         original_data = data.to_dict('records')
-        for i, bar_item in enumerate(bar_data):
-            matching_rows = [row for row in original_data if row.get(category_col) == bar_item['category']]
-            bar_item['_original_rows'] = matching_rows
+        group_positions = data.groupby(category_col, sort=False).indices
+        for bar_item in bar_data:
+            positions = group_positions.get(bar_item['category'], ())
+            bar_item['_original_rows'] = [original_data[p] for p in positions]
+            bar_item['_positions'] = [int(p) for p in positions]
         
         return bar_data
     else:
@@ -251,12 +255,14 @@ def prepare_histogram_data(data, value_col=None, bins=10):
         edges = list(bins)
         edges.sort()
     
-    # Almacenar filas originales para cada bin
+    # Almacenar filas originales para cada bin (y sus posiciones si hay DataFrame)
     bin_rows = [[] for _ in range(len(edges) - 1)]
+    bin_positions = None
     
     if HAS_PANDAS and isinstance(data, pd.DataFrame):
         original_data = data.to_dict('records')
-        for row in original_data:
+        bin_positions = [[] for _ in range(len(edges) - 1)]
+        for pos, row in enumerate(original_data):
             v = row.get(value_col)
             if v is not None:
                 try:
@@ -269,6 +275,7 @@ def prepare_histogram_data(data, value_col=None, bins=10):
                             break
                     if idx is not None:
                         bin_rows[idx].append(row)
+                        bin_positions[idx].append(pos)
                 except Exception:
                     continue
     else:
@@ -297,6 +304,9 @@ def prepare_histogram_data(data, value_col=None, bins=10):
         }
         for i in range(len(bin_rows))
     ]
+    if bin_positions is not None:
+        for item, positions in zip(hist_data, bin_positions):
+            item['_positions'] = positions
     
     return hist_data
 
@@ -398,7 +408,8 @@ def prepare_heatmap_data(data, x_col=None, y_col=None, value_col=None):
             df = data[[x_col, y_col, value_col]].dropna()
             x_labels = df[x_col].astype(str).unique().tolist()
             y_labels = df[y_col].astype(str).unique().tolist()
-            for idx, r in df.iterrows():
+            positions = np.flatnonzero(data[[x_col, y_col, value_col]].notna().all(axis=1))
+            for pos, (idx, r) in zip(positions, df.iterrows()):
                 # Recuperar la fila original completa (todas las columnas)
                 try:
                     original_row = data.loc[idx].to_dict()
@@ -408,7 +419,8 @@ def prepare_heatmap_data(data, x_col=None, y_col=None, value_col=None):
                     'x': str(r[x_col]),
                     'y': str(r[y_col]),
                     'value': float(r[value_col]),
-                    '_original_row': original_row
+                    '_original_row': original_row,
+                    '_position': int(pos)
                 })
         elif x_col is None and y_col is None and value_col is None:
             # Matriz: usar índices y columnas automáticamente
@@ -455,6 +467,59 @@ def prepare_heatmap_data(data, x_col=None, y_col=None, value_col=None):
     return cells, x_labels, y_labels
 
 
+def _column_to_float_array(series):
+    """
+    Convierte una columna a un array float64 de forma vectorizada.
+    
+    Numéricos se convierten directamente; fechas (datetime64, con o sin zona
+    horaria) y periodos a segundos desde epoch. Otros tipos recurren a
+    _safe_to_number elemento a elemento.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=float)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype='datetime64[ns]').astype('int64') / 1e9
+    if isinstance(series.dtype, pd.PeriodDtype):
+        return series.dt.to_timestamp().to_numpy(dtype='datetime64[ns]').astype('int64') / 1e9
+    return np.fromiter((_safe_to_number(v) for v in series), dtype=float, count=len(series))
+
+
+def split_series_arrays(data, x_col, y_col, series_col=None):
+    """
+    Separa un DataFrame en arrays (x, y) por serie, ordenados por x.
+    
+    Hace un único ordenamiento estable por (serie, x) y corta los bloques con
+    ``np.unique(return_index=True)``: O(n log n) sin importar el número de
+    series. Las series conservan el orden de primera aparición.
+    
+    Args:
+        data: DataFrame de pandas
+        x_col: Columna para eje X
+        y_col: Columna para eje Y
+        series_col: Columna para series (opcional)
+    
+    Returns:
+        dict: {nombre_serie: (x_array, y_array)} ('default' si no hay series_col)
+    """
+    df = data[[x_col, y_col] + ([series_col] if series_col else [])].dropna()
+    x = _column_to_float_array(df[x_col])
+    y = _column_to_float_array(df[y_col])
+    if not series_col:
+        order = np.argsort(x, kind='stable')
+        return {'default': (x[order], y[order])}
+    
+    codes, names = pd.factorize(df[series_col], sort=False)
+    order = np.lexsort((x, codes))
+    codes, x, y = codes[order], x[order], y[order]
+    _, starts = np.unique(codes, return_index=True)
+    bounds = np.append(starts, len(codes))
+    names = names.tolist()
+    return {
+        names[codes[start]]: (x[start:end], y[start:end])
+        for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist())
+    }
+
+
 def prepare_line_data(data, x_col=None, y_col=None, series_col=None):
     """
     Prepara datos para line chart.
@@ -475,17 +540,16 @@ def prepare_line_data(data, x_col=None, y_col=None, series_col=None):
     if HAS_PANDAS and isinstance(data, pd.DataFrame):
         if x_col is None or y_col is None:
             raise DataError("x_col e y_col son requeridos para line plot")
-        df = data[[x_col, y_col] + ([series_col] if series_col else [])].dropna()
+        arrays = split_series_arrays(data, x_col, y_col, series_col)
         if series_col:
-            series_names = df[series_col].unique().tolist()
             series = {}
-            for name in series_names:
-                sdf = df[df[series_col] == name].sort_values(by=x_col)
-                series[name] = [{'x': _safe_to_number(x), 'y': _safe_to_number(y), 'series': str(name)} for x, y in zip(sdf[x_col], sdf[y_col])]
+            for name, (xs, ys) in arrays.items():
+                label = str(name)
+                series[name] = [{'x': xv, 'y': yv, 'series': label} for xv, yv in zip(xs.tolist(), ys.tolist())]
             return {'series': series}
         else:
-            sdf = df.sort_values(by=x_col)
-            return {'series': {'default': [{'x': _safe_to_number(x), 'y': _safe_to_number(y)} for x, y in zip(sdf[x_col], sdf[y_col])]}}
+            xs, ys = arrays['default']
+            return {'series': {'default': [{'x': xv, 'y': yv} for xv, yv in zip(xs.tolist(), ys.tolist())]}}
     else:
         items = [d for d in (data or []) if x_col in d and y_col in d]
         if series_col:
@@ -522,11 +586,13 @@ def prepare_pie_data(data, category_col=None, value_col=None):
         
         original_data = data.to_dict('records')
         category_rows = defaultdict(list)
+        category_positions = defaultdict(list)
         
-        for row in original_data:
+        for pos, row in enumerate(original_data):
             cat = row.get(category_col)
             if cat is not None:
                 category_rows[str(cat)].append(row)
+                category_positions[str(cat)].append(pos)
         
         if value_col and value_col in data.columns:
             agg = data.groupby(category_col)[value_col].sum().reset_index()
@@ -534,7 +600,8 @@ def prepare_pie_data(data, category_col=None, value_col=None):
                 {
                     'category': str(r[category_col]),
                     'value': float(r[value_col]),
-                    '_original_rows': category_rows.get(str(r[category_col]), [])
+                    '_original_rows': category_rows.get(str(r[category_col]), []),
+                    '_positions': category_positions.get(str(r[category_col]), [])
                 }
                 for _, r in agg.iterrows()
             ]
@@ -544,7 +611,8 @@ def prepare_pie_data(data, category_col=None, value_col=None):
                 {
                     'category': str(cat),
                     'value': int(cnt),
-                    '_original_rows': category_rows.get(str(cat), [])
+                    '_original_rows': category_rows.get(str(cat), []),
+                    '_positions': category_positions.get(str(cat), [])
                 }
                 for cat, cnt in counts.items()
             ]
@@ -0,0 +1,312 @@
+"""
+Pirámide multi-resolución para heatmaps grandes.
+
+Construye niveles agregados (mean/max) sobre una matriz densa. El navegador
+recibe primero el nivel más grueso y solicita por comm los tiles más finos
+cuando el usuario hace zoom. Las pirámides se cachean por dataset para que
+los tiles se sirvan sin recalcular; si la cache ya descartó una, se
+reconstruye desde su DataFrame de origen (ver resolve_heatmap_pyramid).
+"""
+from collections import OrderedDict
+import hashlib
+import weakref
+
+from ._imports import ensure_numpy, ensure_pandas
+from ..core.exceptions import DataError
+
+np = ensure_numpy()
+pd = ensure_pandas()
+
+VALID_PYRAMID_AGGS = ('mean', 'max')
+DEFAULT_TILE_SIZE = 64
+
+# Cache LRU de pirámides: pyramid_id -> HeatmapPyramid
+_PYRAMID_CACHE = OrderedDict()
+_PYRAMID_CACHE_MAX = 8
+
+# Origen de cada pirámide: pyramid_id -> (weakref al DataFrame, parámetros)
+_PYRAMID_SOURCES = {}
+
+
+def _pool_level(sums, counts, maxs):
+    """
+    Reduce un nivel a la mitad en cada eje (bloques 2x2).
+
+    Se agregan sumas y conteos (no medias) para que la media de cualquier
+    nivel sea exacta respecto a los datos originales.
+    """
+    rows, cols = sums.shape
+    pad_r, pad_c = rows % 2, cols % 2
+    if pad_r or pad_c:
+        sums = np.pad(sums, ((0, pad_r), (0, pad_c)), constant_values=0.0)
+        counts = np.pad(counts, ((0, pad_r), (0, pad_c)), constant_values=0)
+        maxs = np.pad(maxs, ((0, pad_r), (0, pad_c)), constant_values=-np.inf)
+    r2, c2 = sums.shape[0] // 2, sums.shape[1] // 2
+    sums = sums.reshape(r2, 2, c2, 2).sum(axis=(1, 3))
+    counts = counts.reshape(r2, 2, c2, 2).sum(axis=(1, 3))
+    maxs = maxs.reshape(r2, 2, c2, 2).max(axis=(1, 3))
+    return sums, counts, maxs
+
+
+def _block_labels(labels, factor):
+    """Etiquetas de los bloques de un nivel (rango 'inicio…fin' si agrupa varias)."""
+    result = []
+    n = len(labels)
+    for start in range(0, n, factor):
+        end = min(start + factor, n) - 1
+        if end == start:
+            result.append(str(labels[start]))
+        else:
+            result.append(f"{labels[start]}…{labels[end]}")
+    return result
+
+
+class HeatmapPyramid:
+    """
+    Pirámide de resolución de una matriz de heatmap.
+
+    El nivel 0 es la matriz original; cada nivel siguiente agrupa bloques
+    de 2x2 del anterior. El último nivel es el primero que cabe en un único
+    tile de ``tile_size`` x ``tile_size``.
+    """
+
+    def __init__(self, matrix, x_labels, y_labels, agg='mean', tile_size=DEFAULT_TILE_SIZE,
+                 pyramid_id=None):
+        if np is None:
+            raise DataError("numpy es requerido para heatmaps multi-resolución")
+        if agg not in VALID_PYRAMID_AGGS:
+            raise DataError(f"agg debe ser uno de {VALID_PYRAMID_AGGS}, recibido: {agg}")
+        tile_size = int(tile_size)
+        if tile_size < 2:
+            raise DataError("tile_size debe ser >= 2")
+
+        matrix = np.asarray(matrix, dtype=float)
+        if matrix.ndim != 2:
+            raise DataError("La matriz del heatmap debe ser 2D")
+
+        self.pyramid_id = pyramid_id
+        self.agg = agg
+        self.tile_size = tile_size
+        self.x_labels = [str(v) for v in x_labels]
+        self.y_labels = [str(v) for v in y_labels]
+
+        valid = ~np.isnan(matrix)
+        sums = np.where(valid, matrix, 0.0)
+        counts = valid.astype(np.int64)
+        maxs = np.where(valid, matrix, -np.inf)
+
+        self._levels = []
+        self._store_level(sums, counts, maxs)
+        while sums.shape[0] > tile_size or sums.shape[1] > tile_size:
+            sums, counts, maxs = _pool_level(sums, counts, maxs)
+            self._store_level(sums, counts, maxs)
+
+    def _store_level(self, sums, counts, maxs):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if self.agg == 'mean':
+                values = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+            else:
+                values = np.where(counts > 0, maxs, np.nan)
+        factor = 2 ** len(self._levels)
+        self._levels.append({
+            'values': values,
+            'factor': factor,
+            'x_labels': _block_labels(self.x_labels, factor),
+            'y_labels': _block_labels(self.y_labels, factor),
+        })
+
+    @property
+    def n_levels(self):
+        return len(self._levels)
+
+    @property
+    def coarsest_level(self):
+        return len(self._levels) - 1
+
+    def level_shape(self, level):
+        """Retorna (filas, columnas) de un nivel."""
+        return self._levels[level]['values'].shape
+
+    def metadata(self):
+        """Metadata serializable que se envía al navegador junto al spec."""
+        levels = []
+        for idx, lvl in enumerate(self._levels):
+            rows, cols = lvl['values'].shape
+            levels.append({
+                'level': idx,
+                'rows': int(rows),
+                'cols': int(cols),
+                'factor': int(lvl['factor']),
+                'tiles_x': int(-(-cols // self.tile_size)),
+                'tiles_y': int(-(-rows // self.tile_size)),
+            })
+        base = self._levels[0]['values']
+        finite = base[~np.isnan(base)]
+        return {
+            'id': self.pyramid_id,
+            'agg': self.agg,
+            'vmin': float(finite.min()) if finite.size else None,
+            'vmax': float(finite.max()) if finite.size else None,
+            'tile_size': self.tile_size,
+            'levels': levels,
+            'coarsest': self.coarsest_level,
+        }
+
+    def get_tile(self, level, tx=0, ty=0):
+        """
+        Extrae un tile de un nivel.
+
+        Args:
+            level (int): Nivel de la pirámide (0 = resolución completa)
+            tx (int): Índice de tile en columnas
+            ty (int): Índice de tile en filas
+
+        Returns:
+            dict: {'level','tx','ty','cells','x_labels','y_labels'}
+        """
+        level, tx, ty = int(level), int(tx), int(ty)
+        if level < 0 or level >= len(self._levels):
+            raise DataError(f"Nivel de pirámide inválido: {level}")
+        lvl = self._levels[level]
+        values = lvl['values']
+        rows, cols = values.shape
+        t = self.tile_size
+        r0, c0 = ty * t, tx * t
+        if tx < 0 or ty < 0 or r0 >= rows or c0 >= cols:
+            raise DataError(f"Tile fuera de rango: nivel={level}, tx={tx}, ty={ty}")
+        r1, c1 = min(r0 + t, rows), min(c0 + t, cols)
+
+        block = values[r0:r1, c0:c1]
+        x_labels = lvl['x_labels'][c0:c1]
+        y_labels = lvl['y_labels'][r0:r1]
+        rr, cc = np.nonzero(~np.isnan(block))
+        vals = block[rr, cc].tolist()
+        cells = [
+            {'x': x_labels[c], 'y': y_labels[r], 'value': v,
+             '_row': int(r + r0), '_col': int(c + c0), '_level': level}
+            for r, c, v in zip(rr.tolist(), cc.tolist(), vals)
+        ]
+        return {
+            'level': level,
+            'tx': tx,
+            'ty': ty,
+            'cells': cells,
+            'x_labels': x_labels,
+            'y_labels': y_labels,
+        }
+
+
+def _dataset_fingerprint(frame, params):
+    """Huella estable del contenido de un DataFrame + parámetros de la pirámide."""
+    h = hashlib.sha1(repr(params).encode('utf-8'))
+    hashed = pd.util.hash_pandas_object(frame, index=True).to_numpy()
+    h.update(hashed.tobytes())
+    h.update(repr(list(frame.columns)).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def _to_matrix(data, x_col=None, y_col=None, value_col=None):
+    """Convierte datos largos (x, y, valor) o una matriz a (matriz, x_labels, y_labels)."""
+    if x_col is None and y_col is None and value_col is None:
+        matrix = data.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        return matrix, list(data.columns), list(data.index)
+    if not (x_col and y_col and value_col):
+        raise DataError("Especifique x_col, y_col y value_col para heatmap, o pase una matriz sin especificar columnas")
+    df = data[[x_col, y_col, value_col]].dropna()
+    x_codes, x_labels = pd.factorize(df[x_col].astype(str), sort=False)
+    y_codes, y_labels = pd.factorize(df[y_col].astype(str), sort=False)
+    values = pd.to_numeric(df[value_col], errors='coerce').to_numpy(dtype=float)
+    shape = (len(y_labels), len(x_labels))
+    # Celdas duplicadas se promedian
+    sums = np.zeros(shape)
+    counts = np.zeros(shape)
+    ok = ~np.isnan(values)
+    np.add.at(sums, (y_codes[ok], x_codes[ok]), values[ok])
+    np.add.at(counts, (y_codes[ok], x_codes[ok]), 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        matrix = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return matrix, list(x_labels), list(y_labels)
+
+
+def build_heatmap_pyramid(data, x_col=None, y_col=None, value_col=None,
+                          agg='mean', tile_size=DEFAULT_TILE_SIZE):
+    """
+    Construye (o recupera de cache) la pirámide de un heatmap.
+
+    Args:
+        data: DataFrame largo (x_col, y_col, value_col) o matriz (index x columns)
+        x_col, y_col, value_col: Columnas del formato largo
+        agg (str): 'mean' o 'max'
+        tile_size (int): Tamaño de tile en celdas
+
+    Returns:
+        HeatmapPyramid
+    """
+    if pd is None or np is None:
+        raise DataError("pandas y numpy son requeridos para heatmaps multi-resolución")
+    if not isinstance(data, pd.DataFrame):
+        raise DataError("Los heatmaps multi-resolución requieren un DataFrame de pandas")
+    if agg not in VALID_PYRAMID_AGGS:
+        raise DataError(f"agg debe ser uno de {VALID_PYRAMID_AGGS}, recibido: {agg}")
+
+    if x_col is None and y_col is None and value_col is None:
+        frame = data
+    else:
+        missing = [c for c in (x_col, y_col, value_col) if c and c not in data.columns]
+        if missing:
+            raise DataError(f"Columnas no encontradas para heatmap: {missing}")
+        frame = data[[c for c in (x_col, y_col, value_col) if c]]
+    pyramid_id = _dataset_fingerprint(frame, (x_col, y_col, value_col, agg, int(tile_size)))
+    _remember_source(pyramid_id, data, {'x_col': x_col, 'y_col': y_col, 'value_col': value_col,
+                                        'agg': agg, 'tile_size': tile_size})
+
+    cached = _PYRAMID_CACHE.get(pyramid_id)
+    if cached is not None:
+        _PYRAMID_CACHE.move_to_end(pyramid_id)
+        return cached
+
+    matrix, x_labels, y_labels = _to_matrix(data, x_col, y_col, value_col)
+    pyramid = HeatmapPyramid(matrix, x_labels, y_labels, agg=agg,
+                             tile_size=tile_size, pyramid_id=pyramid_id)
+    _PYRAMID_CACHE[pyramid_id] = pyramid
+    while len(_PYRAMID_CACHE) > _PYRAMID_CACHE_MAX:
+        _PYRAMID_CACHE.popitem(last=False)
+    return pyramid
+
+
+def _remember_source(pyramid_id, data, params):
+    """Guarda (sin retenerlo) el DataFrame del que sale una pirámide."""
+    _PYRAMID_SOURCES[pyramid_id] = (weakref.ref(data), params)
+    for key in [k for k, (ref, _) in _PYRAMID_SOURCES.items() if ref() is None]:
+        del _PYRAMID_SOURCES[key]
+
+
+def get_heatmap_pyramid(pyramid_id):
+    """Obtiene una pirámide cacheada por id (None si ya fue descartada)."""
+    return _PYRAMID_CACHE.get(pyramid_id)
+
+
+def resolve_heatmap_pyramid(pyramid_id):
+    """
+    Obtiene una pirámide por id, reconstruyéndola desde su DataFrame de
+    origen si la cache LRU ya la descartó.
+
+    Returns:
+        HeatmapPyramid o None si el DataFrame de origen ya no existe o
+        cambió desde que se construyó la pirámide.
+    """
+    cached = _PYRAMID_CACHE.get(pyramid_id)
+    if cached is not None:
+        _PYRAMID_CACHE.move_to_end(pyramid_id)
+        return cached
+    source = _PYRAMID_SOURCES.get(pyramid_id)
+    data = source[0]() if source is not None else None
+    if data is None:
+        return None
+    pyramid = build_heatmap_pyramid(data, **source[1])
+    return pyramid if pyramid.pyramid_id == pyramid_id else None
+
+
+def clear_pyramid_cache():
+    """Vacía la cache de pirámides."""
+    _PYRAMID_CACHE.clear()
@@ -0,0 +1,151 @@
+"""
+Índice espacial para consultas sobre coordenadas de puntos (scatter).
+
+Una grilla uniforme en numpy: los puntos se ordenan por celda (fila mayor) y
+se guarda el offset de inicio de cada celda. Las celdas de una misma fila de
+la grilla que cubre un rectángulo son contiguas en ese orden, así que una
+consulta rectangular toca un slice por fila de celdas y solo filtra de forma
+exacta los candidatos. Polígonos (lasso) y k vecinos más cercanos parten de
+la misma consulta rectangular.
+"""
+from ._imports import ensure_numpy
+from ..core.exceptions import DataError
+
+np = ensure_numpy()
+
+# Puntos promedio por celda al elegir el tamaño de la grilla
+DEFAULT_POINTS_PER_CELL = 8
+
+
+def points_in_polygon(x, y, vertices):
+    """
+    Prueba punto-en-polígono vectorizada (regla par-impar, ray casting).
+
+    Args:
+        x, y (np.ndarray): Coordenadas de los puntos
+        vertices (array-like): Vértices del polígono [[x, y], ...] (cerrado implícitamente)
+
+    Returns:
+        np.ndarray: Máscara booleana, True si el punto está dentro
+    """
+    poly = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    if poly.shape[0] < 3:
+        raise DataError("Un polígono requiere al menos 3 vértices")
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    inside = np.zeros(x.shape, dtype=bool)
+    xj, yj = poly[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for xi, yi in poly:
+            crosses = (yi > y) != (yj > y)
+            inside ^= crosses & (x < (xj - xi) * (y - yi) / (yj - yi) + xi)
+            xj, yj = xi, yi
+    return inside
+
+
+class GridIndex:
+    """
+    Grilla uniforme sobre dos columnas numéricas.
+
+    Args:
+        x, y (array-like): Coordenadas (filas con NaN/inf no se indexan)
+        points_per_cell (int): Densidad objetivo de la grilla
+
+    Las consultas retornan posiciones de fila (0..n-1) ordenadas, igual que
+    ``DatasetTable.select_extent``.
+    """
+
+    def __init__(self, x, y, points_per_cell=DEFAULT_POINTS_PER_CELL):
+        if np is None:
+            raise DataError("numpy es requerido para el índice espacial")
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if x.shape != y.shape:
+            raise DataError("x e y deben tener la misma longitud")
+        self.length = int(x.size)
+        positions = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+        x, y = x[positions], y[positions]
+        self.size = int(positions.size)
+
+        if self.size:
+            self.bounds = (float(x.min()), float(x.max()), float(y.min()), float(y.max()))
+        else:
+            self.bounds = (0.0, 0.0, 0.0, 0.0)
+        side = max(1, int(np.sqrt(self.size / max(1, points_per_cell))))
+        self.nx = self.ny = side
+        x0, x1, y0, y1 = self.bounds
+        self._cell_w = (x1 - x0) / side or 1.0
+        self._cell_h = (y1 - y0) / side or 1.0
+
+        cells = self._cell_y(y) * self.nx + self._cell_x(x)
+        order = np.argsort(cells, kind='stable')
+        self._positions = positions[order]
+        self._x = x[order]
+        self._y = y[order]
+        self._offsets = np.searchsorted(cells[order], np.arange(self.nx * self.ny + 1))
+
+    def _cell_x(self, values):
+        cells = np.floor((np.asarray(values, dtype=np.float64) - self.bounds[0]) / self._cell_w)
+        return np.clip(cells, 0, self.nx - 1).astype(np.int64)
+
+    def _cell_y(self, values):
+        cells = np.floor((np.asarray(values, dtype=np.float64) - self.bounds[2]) / self._cell_h)
+        return np.clip(cells, 0, self.ny - 1).astype(np.int64)
+
+    def _candidates(self, x0, x1, y0, y1):
+        """Índices (en orden de grilla) de los puntos en las celdas que cubren el rectángulo."""
+        bx0, bx1, by0, by1 = self.bounds
+        if not self.size or x1 < bx0 or x0 > bx1 or y1 < by0 or y0 > by1:
+            return np.empty(0, dtype=np.int64)
+        i0, i1 = int(self._cell_x(x0)), int(self._cell_x(x1))
+        rows = np.arange(int(self._cell_y(y0)), int(self._cell_y(y1)) + 1) * self.nx
+        starts = self._offsets[rows + i0]
+        stops = self._offsets[rows + i1 + 1]
+        lengths = stops - starts
+        total = int(lengths.sum())
+        # Expansión vectorizada de los slices [inicio, fin) de cada fila de celdas
+        shift = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return np.arange(total, dtype=np.int64) + shift
+
+    def query_rect(self, x0, x1, y0, y1):
+        """Posiciones de los puntos dentro del rectángulo (bordes incluidos)."""
+        x0, x1 = sorted((float(x0), float(x1)))
+        y0, y1 = sorted((float(y0), float(y1)))
+        idx = self._candidates(x0, x1, y0, y1)
+        xs, ys = self._x[idx], self._y[idx]
+        hit = idx[(xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1)]
+        return np.sort(self._positions[hit])
+
+    def query_polygon(self, vertices):
+        """Posiciones de los puntos dentro de un polígono (lasso)."""
+        poly = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        if poly.shape[0] < 3:
+            raise DataError("Un polígono requiere al menos 3 vértices")
+        (x0, y0), (x1, y1) = poly.min(axis=0), poly.max(axis=0)
+        idx = self._candidates(x0, x1, y0, y1)
+        hit = idx[points_in_polygon(self._x[idx], self._y[idx], poly)]
+        return np.sort(self._positions[hit])
+
+    def query_knn(self, x, y, k=1):
+        """
+        Posiciones de los k puntos más cercanos a (x, y), del más cercano al más lejano.
+
+        Se expande un cuadrado de celdas hasta tener k candidatos; la distancia
+        al k-ésimo acota un rectángulo que contiene con seguridad a los k vecinos.
+        """
+        k = min(int(k), self.size)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        x, y = float(x), float(y)
+        radius = max(self._cell_w, self._cell_h)
+        while True:
+            idx = self._candidates(x - radius, x + radius, y - radius, y + radius)
+            if idx.size >= k or idx.size == self.size:
+                break
+            radius *= 2
+        dist = np.hypot(self._x[idx] - x, self._y[idx] - y)
+        bound = float(np.partition(dist, k - 1)[k - 1])
+        idx = self._candidates(x - bound, x + bound, y - bound, y + bound)
+        dist = np.hypot(self._x[idx] - x, self._y[idx] - y)
+        nearest = np.argsort(dist, kind='stable')[:k]
+        return self._positions[idx[nearest]]
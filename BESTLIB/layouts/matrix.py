@@ -2,7 +2,6 @@
 MatrixLayout - Refactorizado para usar módulos modulares
 """
 import uuid
-import copy
 import weakref
 from ..core.events import EventManager
 from ..core.comm import CommManager
@@ -12,7 +11,9 @@ from ..render.builder import JSBuilder
 from ..render.assets import AssetManager
 from ..utils.figsize import figsize_to_pixels, process_figsize_in_kwargs
 from ..core.exceptions import LayoutError
-from ..charts.spec_utils import validate_spec
+from ..charts.spec_utils import validate_spec, freeze_spec, resolve_renderer
+from ..data.datasets import DatasetTable, dehydrate_mapping
+from ..utils.json import sanitize_for_json
 
 try:
     import ipywidgets as widgets
@@ -64,8 +65,15 @@ class MatrixLayout:
     _instances = weakref.WeakSet()
     _current_theme = 'light'  # Tema actual: 'light', 'dark', o 'christmas'
     
+    # Render perezoso de grillas grandes: las celdas se dibujan al entrar en
+    # el viewport y, con kernel, sus specs se piden recién entonces
+    LAZY_CELL_THRESHOLD = 12  # gráficos a partir de los cuales lazy=None lo activa
+    LAZY_EAGER_ROWS = 2  # filas de la grilla que siempre viajan completas
+    _DEFERRED_FIELDS = frozenset({'data', 'series', 'cells', 'rows', 'rugData'})
+    
     def __init__(self, ascii_layout=None, figsize=None, row_heights=None, 
-                 col_widths=None, gap=None, cell_padding=None, max_width=None):
+                 col_widths=None, gap=None, cell_padding=None, max_width=None,
+                 lazy=None):
         """
         Crea una nueva instancia de MatrixLayout.
         
@@ -77,6 +85,8 @@ class MatrixLayout:
             gap (int, optional): Espaciado entre celdas en píxeles.
             cell_padding (int, optional): Padding de celdas en píxeles.
             max_width (int, optional): Ancho máximo del layout en píxeles.
+            lazy (bool, optional): Render perezoso de celdas fuera del viewport.
+                None (default) lo activa desde LAZY_CELL_THRESHOLD gráficos.
         """
         # Si no se proporciona layout, crear uno simple
         if ascii_layout is None:
@@ -85,6 +95,10 @@ class MatrixLayout:
         self.ascii_layout = ascii_layout
         self.div_id = "matrix-" + str(uuid.uuid4())
         self._map = {}  # Cada instancia tiene su propio mapeo independiente
+        self._datasets = {}  # Tablas compartidas por las vistas (nombre -> DatasetTable)
+        self._version = 0  # Versión de los specs (ver _bump_version)
+        self._repr_cache = None  # (clave, datos) del último _prepare_repr_data
+        self._render_cache = {}  # {clave: JS} del último render (ver JSBuilder.build_render_call)
         self.__class__._instances.add(self)
         
         # Usar CommManager para registro de instancia
@@ -99,6 +113,12 @@ class MatrixLayout:
         # Registrar handler por defecto para eventos 'select' que muestre los datos
         self._register_default_select_handler()
         
+        # Servir tiles de heatmaps multi-resolución solicitados desde JS
+        self._event_manager.on('heatmap_tile', self._handle_heatmap_tile)
+        
+        # Servir specs diferidos por el render perezoso (ver _apply_lazy)
+        self._event_manager.on('cell_spec', self._handle_cell_spec)
+        
         # Configuración del layout
         self._reactive_model = None
         self._merge_opt = None
@@ -108,6 +128,7 @@ class MatrixLayout:
         self._gap = gap
         self._cell_padding = cell_padding
         self._max_width = max_width
+        self._lazy = lazy
         self._instance_theme = None  # Tema específico de esta instancia (None = usar tema global)
         
         # Validar y parsear layout usando LayoutEngine
@@ -130,6 +151,25 @@ class MatrixLayout:
         """
         cls._debug = bool(enabled)
     
+    @classmethod
+    def set_compression(cls, enabled='auto', threshold=None):
+        """
+        Configura la compresión del mapping embebido en el output.
+        
+        Con compresión, el mapping se guarda en el notebook como gzip+base64
+        y se descomprime en el navegador con DecompressionStream (o pako en
+        navegadores sin soporte).
+        
+        Args:
+            enabled (bool|str): True (siempre), False (nunca) o 'auto' (según umbral)
+            threshold (int, optional): Bytes de JSON a partir de los que se comprime en modo 'auto'
+        """
+        if enabled not in (True, False, 'auto'):
+            raise LayoutError(f"enabled debe ser True, False o 'auto', recibido: {enabled}")
+        JSBuilder.compress_mappings = enabled
+        if threshold is not None:
+            JSBuilder.compress_threshold = int(threshold)
+    
     @classmethod
     def set_theme(cls, theme_name: str):
         """
@@ -218,7 +258,10 @@ class MatrixLayout:
             
             # Mostrar los primeros elementos (máximo 10 para no saturar)
             display_count = min(count, 10)
-            for i, item in enumerate(items[:display_count]):
+            frame = payload.get('__frame__')
+            # Selección por posiciones: leer solo las primeras filas del DataFrame
+            head = frame.head(display_count).to_dict('records') if frame is not None else items[:display_count]
+            for i, item in enumerate(head):
                 print(f"\n[{i+1}]")
                 for key, value in item.items():
                     if key != 'index' and key != '_original_row':
@@ -231,6 +274,80 @@ class MatrixLayout:
         
         self._event_manager.on('select', default_select_handler)
     
+    def _handle_heatmap_tile(self, payload):
+        """
+        Responde a una solicitud de tile de un heatmap con pirámide (pyramid=True).
+        
+        Si la pirámide salió de la cache se reconstruye desde sus datos; si
+        ya no es posible, responde un tile con ``error`` para que el
+        navegador lo indique en la celda.
+        """
+        from ..data.pyramid import resolve_heatmap_pyramid
+        from ..core.exceptions import DataError
+        pyramid_id = payload.get('pyramid_id')
+        reply = {'pyramid_id': pyramid_id, '__view_letter__': payload.get('__view_letter__')}
+        try:
+            pyramid = resolve_heatmap_pyramid(pyramid_id)
+            if pyramid is None:
+                raise DataError("Los datos del heatmap ya no están disponibles; vuelve a ejecutar la celda")
+            tile = pyramid.get_tile(payload.get('level', 0), payload.get('tx', 0), payload.get('ty', 0))
+        except DataError as e:
+            if self._debug:
+                print(f"⚠️ [MatrixLayout] Tile de pirámide '{pyramid_id}' no disponible: {e}")
+            reply['error'] = str(e)
+            CommManager.send(self.div_id, 'heatmap_tile', reply)
+            return
+        tile.update(reply)
+        CommManager.send(self.div_id, 'heatmap_tile', tile)
+    
+    def _handle_cell_spec(self, payload):
+        """Envía el spec completo de una celda diferida por el render perezoso."""
+        letter = payload.get('letter')
+        spec = self._map.get(letter)
+        if not isinstance(spec, dict):
+            if self._debug:
+                print(f"⚠️ [MatrixLayout] No hay spec para la celda diferida '{letter}'")
+            return
+        table = self._datasets.get(spec.get('__dataset__'))
+        spec = table.dehydrate_spec(spec) if table is not None else dict(spec)
+        CommManager.send(self.div_id, 'cell_spec', {
+            'letter': letter,
+            'spec': sanitize_for_json(spec),
+            '__view_letter__': letter,
+        })
+    
+    def _apply_lazy(self, mapping, layout, comm_ready):
+        """
+        Marca el mapping para render perezoso y difiere los specs lejanos.
+        
+        Por defecto solo se difiere el dibujo: los specs viajan completos, así
+        que la salida guardada en el .ipynb (nbconvert, nbviewer) es
+        autocontenida. Solo si el navegador ya demostró que puede abrir un comm
+        (CommManager.browser_comm_available) las celdas fuera de las primeras
+        LAZY_EAGER_ROWS filas quedan como stubs sin datos (``__deferred__``)
+        que matrix.js pide vía 'cell_spec' al entrar en el viewport.
+        """
+        charts = [k for k, v in mapping.items()
+                  if not k.startswith('__') and isinstance(v, dict) and v.get('type')]
+        lazy = self._lazy
+        if lazy is None:
+            lazy = len(charts) >= self.LAZY_CELL_THRESHOLD
+        if not lazy:
+            return mapping
+        mapping = dict(mapping)
+        mapping['__lazy__'] = True
+        if not comm_ready:
+            return mapping
+        rows = [r for r in layout.strip().split("\n") if r]
+        eager = set(''.join(rows[:self.LAZY_EAGER_ROWS]))
+        for letter in charts:
+            if letter in eager:
+                continue
+            stub = {k: v for k, v in mapping[letter].items() if k not in self._DEFERRED_FIELDS}
+            stub['__deferred__'] = True
+            mapping[letter] = stub
+        return mapping
+    
     @classmethod
     def register_comm(cls, force=False):
         """Registra manualmente el comm target de Jupyter"""
@@ -256,6 +373,12 @@ class MatrixLayout:
             if scatter_letter and event_scatter_letter and event_scatter_letter != scatter_letter:
                 return
             
+            # Selección por posiciones: el modelo guarda solo el bitmask
+            selection = payload.get('__selection__')
+            if selection is not None and hasattr(reactive_model, 'update_rows'):
+                reactive_model.update(selection)
+                return
+            
             items = payload.get('items', [])
             original_rows = []
             for item in items:
@@ -292,18 +415,56 @@ class MatrixLayout:
         )
         return mapping
     
+    def _bump_version(self):
+        """
+        Marca un cambio de specs o de configuración del mapping.
+        
+        _prepare_repr_data y JSBuilder memoizan su salida por versión: mientras
+        no cambie, repetir la visualización no vuelve a serializar el mapping.
+        """
+        self._version += 1
+        self._repr_cache = None
+        self._render_cache.clear()
+    
     def _register_spec(self, letter, spec):
-        """Registra un spec en el mapeo de esta instancia."""
+        """
+        Registra un spec en el mapeo de esta instancia.
+        
+        El spec se guarda congelado (FrozenSpec) sin copiar sus datos; los
+        cambios posteriores pasan por update_spec_metadata(). Los tipos con
+        backend Canvas quedan con ``renderer`` resuelto (ver resolve_renderer).
+        """
         validate_spec(spec)
-        self._map[letter] = copy.deepcopy(spec)
+        spec = resolve_renderer(spec)
+        self._map[letter] = freeze_spec(spec)
+        self._bump_version()
         return spec
     
+    def register_dataset(self, name, data):
+        """
+        Registra una tabla compartida por varias vistas de este layout.
+        
+        Los specs marcados con ``__dataset__=name`` envían sus filas originales
+        como posiciones en la tabla, que se serializa una sola vez en
+        ``__datasets__`` del mapping.
+        
+        Args:
+            name (str): Nombre de la tabla
+            data (DataFrame): Datos originales
+        """
+        current = self._datasets.get(name)
+        if current is None or current.data is not data:
+            self._datasets[name] = DatasetTable(name, data)
+            self._bump_version()
+        return self
+    
     def update_spec_metadata(self, letter, **metadata):
-        """Actualiza metadata en un spec de esta instancia."""
+        """Actualiza metadata en un spec de esta instancia (copy-on-write)."""
         spec = self._map.get(letter)
         if not spec:
             return
-        spec.update(metadata)
+        self._map[letter] = freeze_spec(spec).replace(**metadata)
+        self._bump_version()
     
     @classmethod
     def _register_spec_legacy(cls, letter, spec):
@@ -669,23 +830,23 @@ class MatrixLayout:
         """
         Define un mapeo específico para esta instancia (sin afectar el global).
         """
-        mapping_copy = copy.deepcopy(mapping)
+        # Los specs se congelan sin copiar sus datos (la metadata __*__ se copia tal cual)
+        mapping_copy = {
+            key: freeze_spec(value) if isinstance(value, dict) and not key.startswith('__') else value
+            for key, value in mapping.items()
+        }
         if merge and hasattr(self, '_map'):
             self._map.update(mapping_copy)
         else:
             self._map = mapping_copy
+        self._bump_version()
         return self
     
     def _layout_letters(self):
         """Retorna las letras únicas definidas en el layout ASCII."""
-        if not hasattr(self, '_grid') or not getattr(self._grid, 'cells', None):
+        if not hasattr(self, '_grid') or self._grid is None:
             return set()
-        letters = set()
-        for cell in self._grid.cells.values():
-            letter = cell.get('letter')
-            if letter and letter.strip():
-                letters.add(letter)
-        return letters
+        return self._grid.letters
     
     def _validate_mapping_letters(self, mapping):
         """
@@ -706,6 +867,9 @@ class MatrixLayout:
         """
         Prepara datos comunes para _repr_html_ y _repr_mimebundle_.
         Usa AssetManager y módulos de renderizado.
+        
+        El resultado se memoiza por versión de specs (ver _bump_version) y
+        su ``cache_key`` permite a JSBuilder reutilizar el mapping serializado.
         """
         # Cargar JS y CSS usando AssetManager
         js_code = AssetManager.load_js()
@@ -714,6 +878,11 @@ class MatrixLayout:
         # Usar el layout proporcionado o el de la instancia
         layout = layout_to_use if layout_to_use is not None else self.ascii_layout
         
+        comm_ready = CommManager.browser_comm_available()
+        cache_key = (self._version, layout, bool(self._safe_html), comm_ready)
+        if self._repr_cache is not None and self._repr_cache[0] == cache_key and not self._debug:
+            return {**self._repr_cache[1], 'js_code': js_code, 'css_code': css_code}
+        
         # Validar layout usando LayoutEngine
         try:
             grid = LayoutEngine.parse_ascii_layout(layout)
@@ -727,9 +896,15 @@ class MatrixLayout:
                 raise LayoutError("Todas las filas del ascii_layout deben tener igual longitud")
             row_count = len(rows)
             col_count = col_len
+            geometry = None
         else:
             row_count = grid.rows
             col_count = grid.cols
+            # Regiones fusionadas y plantillas CSS precalculadas (Grid cacheado por layout)
+            geometry = LayoutEngine.geometry(
+                grid, self._merge_opt, self._row_heights, self._col_widths,
+                self._gap, self._cell_padding, self._max_width
+            )
         
         # Escapar layout ASCII
         escaped_layout = layout.replace("`", "\\`")
@@ -757,11 +932,14 @@ class MatrixLayout:
             figsize_px = figsize_to_pixels(self._figsize)
             if figsize_px:
                 meta["__figsize__"] = figsize_px
+        if geometry is not None:
+            meta["__grid__"] = geometry
         
         # Combinar mapping con metadata
         # Filtrar solo las letras que están en el layout actual
         valid_letters = self._layout_letters()
-        active_map = copy.deepcopy(getattr(self, '_map', {}))
+        # Los specs registrados son inmutables: se reutilizan sin copiar
+        active_map = getattr(self, '_map', {})
         
         # Filtrar mapping para incluir solo letras del layout actual y metadatos
         filtered_map = {
@@ -814,20 +992,45 @@ class MatrixLayout:
         mapping_merged = {**filtered_map, **meta}
         if self._merge_opt is not None:
             mapping_merged["__merge__"] = self._merge_opt
+        # Filas originales compartidas: una sola copia por dataset
+        mapping_merged = dehydrate_mapping(mapping_merged, self._datasets)
+        # Grillas grandes: render perezoso y specs diferidos
+        mapping_merged = self._apply_lazy(mapping_merged, layout, comm_ready)
         
         # Generar estilo inline
         inline_style = ""
         if self._max_width is not None:
             inline_style = f' style="max-width: {self._max_width}px; margin: 0 auto; box-sizing: border-box;"'
         
-        return {
+        data = {
             'js_code': js_code,
             'css_code': css_code,
             'escaped_layout': escaped_layout,
             'meta': meta,
             'mapping_merged': mapping_merged,
-            'inline_style': inline_style
+            'inline_style': inline_style,
+            'cache_key': cache_key
         }
+        self._repr_cache = (cache_key, data)
+        return data
+    
+    @staticmethod
+    def _session_assets(data):
+        """
+        CSS y librería JS para una salida con assets deduplicados por sesión.
+        
+        Returns:
+            tuple: (css_code, js_lib, modules_js, renderers) donde js_lib es
+                None si la librería ya se inyectó en esta sesión (la salida solo
+                lleva el render con guard), modules_js son los renderers que
+                faltan y renderers los que la salida espera ya cargados
+        """
+        if not AssetManager.dedupe_assets:
+            modules_js, renderers = AssetManager.split_modules(data['mapping_merged'])
+            return data['css_code'], AssetManager.library_js(), modules_js, renderers
+        js_lib = AssetManager.library_js() if AssetManager.claim_injection() else None
+        modules_js, renderers = AssetManager.split_modules(data['mapping_merged'])
+        return "", js_lib, modules_js, renderers
     
     def _repr_html_(self):
         """Representación HTML del layout (compatible con Jupyter Notebook clásico)"""
@@ -841,7 +1044,9 @@ class MatrixLayout:
         render_js = JSBuilder.build_render_call(
             self.div_id,
             data['escaped_layout'],
-            data['mapping_merged']
+            data['mapping_merged'],
+            cache_key=data['cache_key'],
+            cache=self._render_cache
         ).strip()
         
         # Generar HTML usando HTMLGenerator
@@ -850,7 +1055,8 @@ class MatrixLayout:
             data['css_code'],
             render_js,
             data['inline_style'],
-            theme_class
+            theme_class,
+            d3_source=AssetManager.resolve_d3_mode()
         )
         
         return html
@@ -875,24 +1081,31 @@ class MatrixLayout:
         CommManager.register_comm()
         
         data = self._prepare_repr_data()
+        css_code, js_lib, modules_js, renderers = self._session_assets(data)
         
         # Generar HTML
         html = HTMLGenerator.generate_full_html(
             self.div_id,
-            data['css_code'],
+            css_code,
             "",  # JS va en bundle separado
             data['inline_style'],
-            theme_class
+            theme_class,
+            d3_source=AssetManager.resolve_d3_mode()
         )
         
         # Generar JavaScript completo usando JSBuilder
         # En Colab, esperar a que D3 esté disponible antes de renderizar
-        js = JSBuilder.build_full_js(
-            data['js_code'],
+        js = JSBuilder.build_session_js(
+            js_lib,
+            AssetManager.asset_hash(),
             self.div_id,
             data['escaped_layout'],
             data['mapping_merged'],
-            wait_for_d3=is_colab  # Esperar D3 solo en Colab
+            wait_for_d3=is_colab,  # Esperar D3 solo en Colab
+            modules_js=modules_js,
+            renderers=renderers,
+            cache_key=data['cache_key'],
+            cache=self._render_cache
         )
         
         return {
@@ -917,6 +1130,7 @@ class MatrixLayout:
             CommManager.register_comm()
             
             data = self._prepare_repr_data(ascii_layout)
+            css_code, js_lib, modules_js, renderers = self._session_assets(data)
             
             # Determinar tema a usar (instancia específica o global)
             theme = getattr(self, '_instance_theme', None) or self._current_theme
@@ -925,19 +1139,25 @@ class MatrixLayout:
             # Generar HTML completo (incluye wrapper seguro de D3.js)
             html_content = HTMLGenerator.generate_full_html(
                 self.div_id,
-                data['css_code'],
+                css_code,
                 "",  # JS va separado
                 data['inline_style'],
-                theme_class
+                theme_class,
+                d3_source=AssetManager.resolve_d3_mode()
             )
             # Generar JavaScript usando JSBuilder
             # En Colab, esperar a que D3 esté disponible antes de renderizar
-            js_content = JSBuilder.build_full_js(
-                data['js_code'],
+            js_content = JSBuilder.build_session_js(
+                js_lib,
+                AssetManager.asset_hash(),
                 self.div_id,
                 data['escaped_layout'],
                 data['mapping_merged'],
-                wait_for_d3=is_colab  # Esperar D3 solo en Colab
+                wait_for_d3=is_colab,  # Esperar D3 solo en Colab
+                modules_js=modules_js,
+                renderers=renderers,
+                cache_key=data['cache_key'],
+                cache=self._render_cache
             )
             ipython_display(HTML(html_content))
             ipython_display(Javascript(js_content))
@@ -961,20 +1181,24 @@ class MatrixLayout:
     def merge(self, letters=True):
         """Configura merge explícito para este layout"""
         self._merge_opt = letters
+        self._bump_version()
         return self
     
     def merge_all(self):
         """Activa merge para todas las letras"""
         self._merge_opt = True
+        self._bump_version()
         return self
     
     def merge_off(self):
         """Desactiva merge"""
         self._merge_opt = False
+        self._bump_version()
         return self
     
     def merge_only(self, letters):
         """Activa merge solo para las letras indicadas"""
         self._merge_opt = list(letters) if letters is not None else []
+        self._bump_version()
         return self
 
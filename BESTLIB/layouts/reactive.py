@@ -44,8 +44,29 @@ except (ImportError, AttributeError, ModuleNotFoundError, Exception):
 
 # Importar desde módulos modulares
 from .matrix import MatrixLayout
-from ..reactive.selection import SelectionModel
+from ..reactive.selection import SelectionModel, SelectionRows
 from ..reactive.selection import _items_to_dataframe
+from ..utils.json import dumps_json
+from ..core.comm import CommManager
+from ..data.datasets import DEFAULT_DATASET, BRUSH_AXES, BRUSH_CANVAS_ONLY
+from ..charts.spec_utils import resolve_renderer
+from ..reactive.patches import PATCH_KEYS, encode_records, diff_records, pack_patch_rows
+from ..reactive.engine import DataflowGraph
+
+
+def _selection_frame(items, default):
+    """
+    DataFrame de una selección no vacía.
+    
+    Una selección por posiciones (SelectionRows) se toma del DataFrame
+    original con un solo ``take``, sin materializar diccionarios; una lista
+    de dicts se convierte con pandas. En otro caso retorna ``default``.
+    """
+    if hasattr(items, 'to_dataframe'):
+        return items.to_dataframe()
+    if HAS_PANDAS and isinstance(items[0], dict):
+        return pd.DataFrame(items)
+    return default
 
 class ReactiveMatrixLayout:
     """
@@ -188,6 +209,60 @@ class ReactiveMatrixLayout:
         # Sistema para guardar selecciones en variables Python accesibles
         self._selection_variables = {}  # {view_letter: variable_name} - Variables donde guardar selecciones
         self._selection_store = {}
+        self._confusion_engines = {}  # {(id(data), y_true_col, y_pred_col): ConfusionMatrixEngine} - Mapeo de etiquetas cacheado
+        # Protocolo de parches: último agregado conocido por el navegador, por letra
+        self._patch_state = {}  # {letter: registros codificados}
+        # Grafo de dataflow de las vistas enlazadas (selecciones -> vistas)
+        self._graph = DataflowGraph()
+        self._graph_sources = {}  # {id(SelectionModel): nombre del nodo fuente}
+        self._graph_models = {}  # {nombre del nodo fuente: SelectionModel}
+    
+    def _selection_source(self, selection):
+        """
+        Nodo fuente del grafo para un SelectionModel (creado una sola vez).
+        
+        El modelo notifica al grafo con un único callback; las vistas
+        enlazadas cuelgan del nodo en lugar de registrar cada una su closure.
+        """
+        name = self._graph_sources.get(id(selection))
+        if name is not None:
+            return name
+        owner = next((l for l, m in {**self._scatter_selection_models, **self._primary_view_models}.items()
+                      if m is selection), None)
+        name = f"selection:{owner}" if owner is not None else f"selection:{id(selection)}"
+        self._graph.add_source(name, selection.get_items())
+        self._graph_sources[id(selection)] = name
+        self._graph_models[name] = selection
+        selection.on_change(lambda items, count: self._graph.set_source(name, items))
+        # La selección de una vista que a su vez está enlazada depende de lo que dibuja
+        if owner is not None and f"view:{owner}" in self._graph:
+            self._add_order_edge(f"view:{owner}", name)
+        return name
+    
+    def _add_order_edge(self, upstream, downstream):
+        # Vistas enlazadas en ciclo (B -> C -> B): sin arista de orden; el
+        # grafo igual ejecuta cada vista a lo sumo una vez por propagación
+        try:
+            self._graph.add_edge(upstream, downstream)
+        except ValueError:
+            if self._debug or MatrixLayout._debug:
+                print(f"⚠️ [ReactiveMatrixLayout] Enlace circular entre '{upstream}' y '{downstream}'")
+    
+    def _link_view(self, letter, selection, update):
+        """
+        Enlaza la vista ``letter`` a una selección a través del grafo de dataflow.
+        
+        ``update(items, count)`` se ejecuta cuando la selección cambia, en
+        orden topológico y a lo sumo una vez por propagación; en cadenas
+        (A -> B -> C) la vista C solo se recalcula si la selección de B
+        realmente cambió.
+        """
+        source = self._selection_source(selection)
+        view = f"view:{letter}"
+        self._graph.add_node(view, lambda items: update(items, len(items) if items else 0), [source])
+        own = self._graph_sources.get(id(self._primary_view_models.get(letter)))
+        if own is not None and own != source:
+            self._add_order_edge(view, own)
     
     def set_data(self, data):
         """
@@ -197,6 +272,8 @@ class ReactiveMatrixLayout:
             data: DataFrame de pandas o lista de diccionarios
         """
         self._data = data
+        # Los motores cacheados dependen de los datos originales
+        self._confusion_engines = {}
         return self
     
     def _empty_selection(self):
@@ -217,6 +294,8 @@ class ReactiveMatrixLayout:
         """
         if not items:
             return self._data
+        if hasattr(items, 'to_dataframe'):
+            return items.to_dataframe()
         
         processed_items = []
         for item in items:
@@ -239,6 +318,85 @@ class ReactiveMatrixLayout:
         
         return processed_items if processed_items else self._data
     
+    def _reset_patch_state(self):
+        """Olvida lo enviado: tras un render el navegador vuelve a tener los specs registrados."""
+        self._patch_state = {}
+        # El navegador vuelve a mostrar los datos completos: la próxima
+        # selección se propaga aunque coincida con la última calculada
+        for selection in self._graph_models.values():
+            selection.mark_stale()
+        self._graph.forget('view')
+    
+    def _table_positions(self, items, frame):
+        """
+        Posiciones en la tabla compartida de cada fila de ``frame``.
+        
+        ``frame`` es el DataFrame filtrado con el que se calculó un agregado:
+        sin selección es el propio ``self._data`` y una selección por
+        posiciones (SelectionRows) aporta sus ``row_ids``. En otro caso
+        (p. ej. una lista de dicts) retorna None y las filas viajan inline.
+        """
+        if not (HAS_PANDAS and isinstance(self._data, pd.DataFrame) and isinstance(frame, pd.DataFrame)):
+            return None
+        if frame is self._data:
+            return range(len(frame))
+        selection = getattr(items, 'selection', None)
+        if selection is not None and selection.source is self._data and selection.count == len(frame):
+            return selection.row_ids
+        return None
+    
+    def _send_patch_update(self, letter, kind, records, positions=None):
+        """
+        Envía solo los registros que cambiaron respecto al último envío.
+        
+        Los registros se identifican por una clave estable (PATCH_KEYS) y
+        matrix.js aplica el parche sobre los datos de la celda ('view_patch').
+        Cada registro lleva sus filas como posiciones en la tabla compartida
+        (ver ``_table_positions``), así el parche se compara por valores y
+        filas; las posiciones viajan en un buffer binario del comm.
+        
+        Args:
+            letter: Letra de la vista en el layout
+            kind: Tipo de vista ('bar', 'histogram', 'boxplot', 'pie')
+            records: Agregado nuevo (lista de dicts)
+            positions: Posiciones en la tabla de las filas del DataFrame
+                agregado (None = las filas viajan inline)
+        
+        Returns:
+            bool: True si el navegador quedó actualizado (parche enviado o sin cambios)
+        """
+        div_id = self._layout.div_id
+        if div_id not in CommManager._comms:
+            return False
+        try:
+            key_field = PATCH_KEYS[kind]
+            previous = self._patch_state.get(letter)
+            if previous is None:
+                previous = self._encode_spec_records(self._layout._map.get(letter))
+            if DEFAULT_DATASET not in self._layout._datasets:
+                positions = None
+            current = encode_records(records, positions)
+            patch = diff_records(previous, current, key_field)
+            if patch is not None:
+                patch.update(letter=letter, key=key_field, dataset=DEFAULT_DATASET)
+                message, buffers = pack_patch_rows(patch)
+                if not CommManager.send(div_id, 'view_patch', message, buffers=buffers):
+                    return False
+            self._patch_state[letter] = current
+            return True
+        except Exception as e:
+            if self._debug or MatrixLayout._debug:
+                print(f"⚠️ Error enviando parche de '{letter}': {e}")
+            return False
+    
+    def _encode_spec_records(self, spec):
+        """Registros de un spec registrado tal como los codifica ``_send_patch_update``."""
+        spec = spec or {}
+        positions = None
+        if spec.get('__dataset__') == DEFAULT_DATASET and DEFAULT_DATASET in self._layout._datasets:
+            positions = range(len(self._layout._datasets[DEFAULT_DATASET].data))
+        return encode_records(spec.get('data') or [], positions)
+    
     def _register_chart(self, letter, chart_type, data, **kwargs):
         """
         Helper para registrar un chart en el layout interno usando el método de instancia.
@@ -255,6 +413,20 @@ class ReactiveMatrixLayout:
         from ..charts import ChartRegistry
         chart = ChartRegistry.get(chart_type)
         spec = chart.get_spec(data, **kwargs)
+        # Re-registro de una vista parcheable: conservar lo que muestra el navegador
+        previous = self._layout._map.get(letter)
+        if chart_type in PATCH_KEYS and previous is not None and letter not in self._patch_state:
+            self._patch_state[letter] = self._encode_spec_records(previous)
+        # Vistas sobre los datos del layout comparten una sola tabla de filas
+        if data is not None and data is self._data and HAS_PANDAS and isinstance(data, pd.DataFrame):
+            self._layout.register_dataset(DEFAULT_DATASET, data)
+            spec['__dataset__'] = DEFAULT_DATASET
+            # Columnas de cada eje: el brush viaja como geometría y se evalúa en Python
+            axes = {axis: kwargs.get(arg) for axis, arg in BRUSH_AXES.get(chart_type, {}).items()}
+            if chart_type in BRUSH_CANVAS_ONLY and resolve_renderer(spec).get('renderer') != 'canvas':
+                axes = {}
+            if axes and all(col in data.columns for col in axes.values()):
+                spec['__brush_columns__'] = axes
         return self._layout._register_spec(letter, spec)
     
     def add_scatter(self, letter, data=None, x_col=None, y_col=None, category_col=None, interactive=True, selection_var=None, **kwargs):
@@ -269,7 +441,10 @@ class ReactiveMatrixLayout:
             category_col: Nombre de columna para categorías (opcional)
             interactive: Si True, habilita brush selection
             selection_var: Nombre de variable Python donde guardar selecciones (ej: 'selected_data')
-            **kwargs: Argumentos adicionales (colorMap, pointRadius, axes, etc.)
+            **kwargs: Argumentos adicionales (colorMap, pointRadius, axes, etc.).
+                ``selectionMode='lasso'`` reemplaza el brush rectangular por un lasso.
+                ``renderer='canvas'`` dibuja en Canvas 2D ('auto' lo activa con
+                muchos puntos; ver charts/spec_utils.resolve_renderer).
         
         Returns:
             self para encadenamiento
@@ -308,7 +483,7 @@ class ReactiveMatrixLayout:
             """Handler que actualiza el SelectionModel de este scatter plot Y el modelo principal"""
             # ✅ CORRECCIÓN: Validar items primero
             items = payload.get('items', [])
-            if not isinstance(items, list):
+            if not isinstance(items, (list, SelectionRows)):
                 if self._debug or MatrixLayout._debug:
                     print(f"⚠️ [ReactiveMatrixLayout] items no es lista: {type(items)}")
                 items = []
@@ -325,6 +500,17 @@ class ReactiveMatrixLayout:
             if self._debug or MatrixLayout._debug:
                 print(f"✅ [ReactiveMatrixLayout] Evento recibido para scatter '{scatter_letter_capture}': {len(items)} items")
             
+            # Selección por posiciones: los modelos guardan solo el bitmask
+            selection = payload.get('__selection__')
+            if selection is not None:
+                scatter_selection_capture.update(selection)
+                self.selection_model.update(selection)
+                items_df = scatter_selection_capture.to_dataframe()
+                self._selected_data = items_df
+                if hasattr(self, '_selection_variables') and scatter_letter_capture in self._selection_variables:
+                    self.set_selection(self._selection_variables[scatter_letter_capture], items_df)
+                return
+            
             # ✅ CORRECCIÓN: Validar conversión a DataFrame
             items_df = _items_to_dataframe(items)
             if items_df is None or (hasattr(items_df, 'empty') and items_df.empty and len(items) > 0):
@@ -334,6 +520,8 @@ class ReactiveMatrixLayout:
             
             # ✅ CORRECCIÓN: Guardar DataFrame en SelectionModel también
             data_to_update = items_df if items_df is not None and not (hasattr(items_df, 'empty') and items_df.empty) else items
+            if isinstance(items, SelectionRows):
+                data_to_update = items  # Solo el bitmask, sin materializar registros
             
             # Actualizar el SelectionModel específico de este scatter plot
             # Esto disparará los callbacks registrados (como update_histogram, update_boxplot)
@@ -379,6 +567,10 @@ class ReactiveMatrixLayout:
             **kwargs_with_identifier  # ✅ interactive ya está aquí
         )
         
+        # Índice espacial por (x_col, y_col): brushes y lassos se resuelven sin escaneo completo
+        if scatter_spec.get('__brush_columns__'):
+            self._layout._datasets[DEFAULT_DATASET].spatial_index(x_col, y_col)
+        
         # ✅ CORRECCIÓN CRÍTICA: Verificar que interactive esté en el spec final
         if 'interactive' not in scatter_spec or scatter_spec.get('interactive') is None:
             scatter_spec['interactive'] = interactive
@@ -499,7 +691,7 @@ class ReactiveMatrixLayout:
                 """Handler que actualiza el SelectionModel de este bar chart"""
                 # ✅ CORRECCIÓN: Validar items primero
                 items = payload.get('items', [])
-                if not isinstance(items, list):
+                if not isinstance(items, (list, SelectionRows)):
                     if self._debug or MatrixLayout._debug:
                         print(f"⚠️ [ReactiveMatrixLayout] items no es lista: {type(items)}")
                     items = []
@@ -548,6 +740,8 @@ class ReactiveMatrixLayout:
                     
                     # ✅ CORRECCIÓN: Usar DataFrame si está disponible, sino lista
                     data_to_update = items_df if items_df is not None and not (hasattr(items_df, 'empty') and items_df.empty) else items
+                    if isinstance(items, SelectionRows):
+                        data_to_update = items  # Solo el bitmask, sin materializar registros
                     
                     # IMPORTANTE: Actualizar el SelectionModel de este bar chart
                     # Esto disparará callbacks registrados (como update_pie para el pie chart 'P')
@@ -711,16 +905,7 @@ class ReactiveMatrixLayout:
                     import time
                     
                     # Usar datos seleccionados o todos los datos
-                    data_to_use = self._data
-                    if items and len(items) > 0:
-                        # Convertir lista de dicts a DataFrame si es necesario
-                        if HAS_PANDAS and isinstance(items[0], dict):
-                            import pandas as pd
-                            data_to_use = pd.DataFrame(items)
-                        else:
-                            data_to_use = items
-                    else:
-                        data_to_use = self._data
+                    data_to_use = self._data if not items else _selection_frame(items, items)
                     
                     # Preparar datos del bar chart
                     bar_data = self._prepare_barchart_data(
@@ -739,8 +924,11 @@ class ReactiveMatrixLayout:
                     
                     # Crear JavaScript para actualizar el gráfico de forma más robusta
                     div_id = barchart_params['layout_div_id']
+                    if self._send_patch_update(letter, 'bar', bar_data,
+                                               self._table_positions(items, data_to_use)):
+                        return
                     # Sanitizar para evitar numpy.int64 en JSON
-                    bar_data_json = json.dumps(_sanitize_for_json(bar_data))
+                    bar_data_json = dumps_json(bar_data)
                     color_map = barchart_params['kwargs'].get('colorMap', {})
                     color_map_json = json.dumps(color_map)
                     default_color = barchart_params['kwargs'].get('color', '#4a90e2')
@@ -1051,7 +1239,7 @@ class ReactiveMatrixLayout:
             # Registrar callback en el modelo de selección de la vista principal
             # Solo si update_barchart fue definido (es decir, si es vista enlazada)
             if update_barchart is not None:
-                primary_selection.on_change(update_barchart)
+                self._link_view(letter, primary_selection, update_barchart)
                 
                 # Marcar como callback registrado
                 self._barchart_callbacks[letter] = update_barchart
@@ -1187,12 +1375,12 @@ class ReactiveMatrixLayout:
                     print(f"💡 Grouped bar chart '{letter}' enlazado automáticamente a vista principal '{primary_letter}'")
             
             def update(items, count):
-                data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+                data_to_use = self._data if not items else _selection_frame(items, items)
                 try:
                     self._register_chart(letter, 'grouped_bar', data_to_use, main_col=main_col, sub_col=sub_col, value_col=value_col, **kwargs)
                 except Exception:
                     pass
-            primary_selection.on_change(update)
+            self._link_view(letter, primary_selection, update)
         
         return self
     
@@ -1259,7 +1447,7 @@ class ReactiveMatrixLayout:
         
         # Registrar callback en el modelo de selección del scatter plot
         scatter_selection = self._scatter_selection_models[scatter_letter]
-        scatter_selection.on_change(update_func)
+        self._link_view(letter, scatter_selection, update_func)
         
         return self
     
@@ -1525,7 +1713,10 @@ class ReactiveMatrixLayout:
             if primary_letter is not None:
                 # Verificar si hay una selección activa
                 current_items = primary_selection.get_items()
-                if current_items and len(current_items) > 0:
+                if current_items and hasattr(current_items, 'to_dataframe'):
+                    # Selección por posiciones: un solo take sobre el DataFrame original
+                    initial_data = current_items.to_dataframe()
+                elif current_items and len(current_items) > 0:
                     # Procesar items para obtener DataFrame filtrado
                     processed_items = []
                     for item in current_items:
@@ -1594,7 +1785,10 @@ class ReactiveMatrixLayout:
                     
                     # Usar datos seleccionados o todos los datos
                     data_to_use = self._data
-                    if items and len(items) > 0:
+                    if items and hasattr(items, 'to_dataframe'):
+                        # Selección por posiciones: un solo take sobre el DataFrame original
+                        data_to_use = items.to_dataframe()
+                    elif items and len(items) > 0:
                         # Procesar items: extraer filas originales si están disponibles
                         processed_items = []
                         for item in items:
@@ -1686,6 +1880,7 @@ class ReactiveMatrixLayout:
                     
                     # IMPORTANTE: Almacenar filas originales para cada bin
                     bin_rows = [[] for _ in range(len(bin_edges) - 1)]  # Lista de listas para cada bin
+                    bin_positions = None  # Posiciones de esas filas en data_to_use (solo DataFrame)
                     
                     # Asegurar que pd esté disponible (usar globals para evitar UnboundLocalError)
                     if HAS_PANDAS:
@@ -1700,7 +1895,8 @@ class ReactiveMatrixLayout:
                         if pd_module is not None and isinstance(data_to_use, pd_module.DataFrame):
                             # Para DataFrame: almacenar todas las filas originales que caen en cada bin
                             original_data = data_to_use.to_dict('records')
-                            for row in original_data:
+                            bin_positions = [[] for _ in range(len(bin_edges) - 1)]
+                            for pos, row in enumerate(original_data):
                                 val = row.get(column)
                                 if val is not None:
                                     try:
@@ -1714,6 +1910,7 @@ class ReactiveMatrixLayout:
                                                 break
                                         if idx is not None:
                                             bin_rows[idx].append(row)
+                                            bin_positions[idx].append(pos)
                                     except Exception:
                                         continue
                         else:
@@ -1747,6 +1944,9 @@ class ReactiveMatrixLayout:
                         }
                         for i, center in enumerate(bin_centers)
                     ]
+                    if bin_positions is not None:
+                        for item, positions in zip(hist_data, bin_positions):
+                            item['_positions'] = positions
                     
                     # IMPORTANTE: NO actualizar el mapping aquí para evitar bucles infinitos
                     # Solo actualizar visualmente el gráfico con JavaScript
@@ -1755,7 +1955,10 @@ class ReactiveMatrixLayout:
                     
                     # JavaScript para actualizar el gráfico (similar a bar chart)
                     div_id = hist_params['layout_div_id']
-                    hist_data_json = json.dumps(_sanitize_for_json(hist_data))
+                    if self._send_patch_update(letter, 'histogram', hist_data,
+                                               self._table_positions(items, data_to_use)):
+                        return
+                    hist_data_json = dumps_json(hist_data)
                     default_color = kwargs.get('color', '#4a90e2')
                     show_axes = kwargs.get('axes', True)
                     
@@ -1916,14 +2119,17 @@ class ReactiveMatrixLayout:
                         print(f"   ✅ Histogram '{letter}' callback completado")
             
             # Registrar callback en el modelo de selección de la vista principal
-            primary_selection.on_change(update_histogram)
+            self._link_view(letter, primary_selection, update_histogram)
             
             # CRÍTICO: Si ya hay una selección activa en la vista principal, usar esos datos desde el inicio
             initial_data = self._data
             if not is_primary and primary_letter is not None:
                 # Verificar si hay una selección activa
                 current_items = primary_selection.get_items()
-                if current_items and len(current_items) > 0:
+                if current_items and hasattr(current_items, 'to_dataframe'):
+                    # Selección por posiciones: un solo take sobre el DataFrame original
+                    initial_data = current_items.to_dataframe()
+                elif current_items and len(current_items) > 0:
                     # Procesar items para obtener DataFrame filtrado
                     processed_items = []
                     for item in current_items:
@@ -2213,8 +2419,11 @@ class ReactiveMatrixLayout:
                     import json
                     from IPython.display import Javascript, display
                     
+                    if self._send_patch_update(letter, 'boxplot', spec['data'],
+                                               self._table_positions(items, data_to_use)):
+                        return
                     # Preparar datos para JavaScript
-                    box_data_json = json.dumps(spec['data'])
+                    box_data_json = dumps_json(spec['data'])
                     title = spec.get('title', '')
                     x_label = spec.get('xLabel', '')
                     y_label = spec.get('yLabel', '')
@@ -2377,7 +2586,7 @@ class ReactiveMatrixLayout:
                     traceback.print_exc()
         
         # Registrar callback en el SelectionModel de la vista principal
-        primary_selection.on_change(update_boxplot)
+        self._link_view(letter, primary_selection, update_boxplot)
         
         # Guardar referencia al callback para evitar duplicados
         self._boxplot_callbacks[letter] = update_boxplot
@@ -2387,7 +2596,10 @@ class ReactiveMatrixLayout:
         if primary_letter is not None:
             # Verificar si hay una selección activa
             current_items = primary_selection.get_items()
-            if current_items and len(current_items) > 0:
+            if current_items and hasattr(current_items, 'to_dataframe'):
+                # Selección por posiciones: un solo take sobre el DataFrame original
+                initial_data = current_items.to_dataframe()
+            elif current_items and len(current_items) > 0:
                 # Procesar items para obtener DataFrame filtrado
                 processed_items = []
                 for item in current_items:
@@ -2440,12 +2652,13 @@ class ReactiveMatrixLayout:
                 else:
                     return []
                 
-                # Agregar datos originales para referencia (IMPORTANTE para linked views)
+                # Agregar datos originales (y sus posiciones) para referencia (IMPORTANTE para linked views)
                 original_data = data.to_dict('records')
+                group_positions = data.groupby(category_col, sort=False).indices
                 for bar_item in bar_data:
-                    # Encontrar todas las filas con esta categoría
-                    matching_rows = [row for row in original_data if row.get(category_col) == bar_item['category']]
-                    bar_item['_original_rows'] = matching_rows
+                    positions = group_positions.get(bar_item['category'], ())
+                    bar_item['_original_rows'] = [original_data[p] for p in positions]
+                    bar_item['_positions'] = [int(p) for p in positions]
             else:
                 from collections import Counter
                 if value_col:
@@ -2539,7 +2752,7 @@ class ReactiveMatrixLayout:
             def heatmap_handler(payload):
                 """Actualiza el SelectionModel de este heatmap a partir de eventos de JS."""
                 items = payload.get('items', [])
-                if not isinstance(items, list):
+                if not isinstance(items, (list, SelectionRows)):
                     if self._debug or MatrixLayout._debug:
                         print(f"⚠️ [ReactiveMatrixLayout] items no es lista en heatmap '{letter}': {type(items)}")
                     items = []
@@ -2564,6 +2777,8 @@ class ReactiveMatrixLayout:
                 # Convertir a DataFrame cuando sea posible
                 items_df = _items_to_dataframe(items)
                 data_to_update = items_df if (items_df is not None and not getattr(items_df, 'empty', False)) else items
+                if isinstance(items, SelectionRows):
+                    data_to_update = items  # Solo el bitmask, sin materializar registros
 
                 # Actualizar modelo específico y modelo global
                 heatmap_selection.update(data_to_update)
@@ -2617,7 +2832,7 @@ class ReactiveMatrixLayout:
             sel = all_primary[primary_letter]
 
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'heatmap', data_to_use, x_col=x_col, y_col=y_col, value_col=value_col, **kwargs)
             except Exception:
@@ -2626,7 +2841,7 @@ class ReactiveMatrixLayout:
                     print(f"⚠️ [ReactiveMatrixLayout] Error actualizando heatmap enlazado '{letter}'")
                     traceback.print_exc()
 
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
 
     def add_correlation_heatmap(self, letter, linked_to=None, **kwargs):
@@ -2636,23 +2851,23 @@ class ReactiveMatrixLayout:
         # Usar método de clase pero registrar directamente en la instancia correcta
         spec = MatrixLayout.map_correlation_heatmap.__func__(MatrixLayout, letter, self._data, **kwargs)
         if spec:
-            self._layout._map[letter] = spec
+            self._layout._register_spec(letter, spec)
         # link
         if not self._scatter_selection_models:
             return self
         scatter_letter = linked_to or list(self._scatter_selection_models.keys())[-1]
         sel = self._scatter_selection_models[scatter_letter]
         def update(items, count):
-            df = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else None)
+            df = self._data if not items else _selection_frame(items, None)
             if df is None:
                 return
             try:
                 spec = MatrixLayout.map_correlation_heatmap.__func__(MatrixLayout, letter, df, **kwargs)
                 if spec:
-                    self._layout._map[letter] = spec
+                    self._layout._register_spec(letter, spec)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
 
     def add_line(self, letter, x_col=None, y_col=None, series_col=None, linked_to=None, **kwargs):
@@ -2665,12 +2880,12 @@ class ReactiveMatrixLayout:
         scatter_letter = linked_to or list(self._scatter_selection_models.keys())[-1]
         sel = self._scatter_selection_models[scatter_letter]
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'line', data_to_use, x_col=x_col, y_col=y_col, series_col=series_col, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
 
     def add_pie(self, letter, category_col=None, value_col=None, linked_to=None, interactive=None, selection_var=None, **kwargs):
@@ -2843,7 +3058,10 @@ class ReactiveMatrixLayout:
                     # Cuando el bar chart envía eventos, items contiene directamente las filas originales
                     # de la categoría seleccionada (no necesitan extracción de _original_row)
                     data_to_use = self._data
-                    if items and len(items) > 0:
+                    if items and hasattr(items, 'to_dataframe'):
+                        # Selección por posiciones: un solo take sobre el DataFrame original
+                        data_to_use = items.to_dataframe()
+                    elif items and len(items) > 0:
                         # Los items pueden ser:
                         # 1. Filas originales directamente (del bar chart)
                         # 2. Diccionarios con _original_row o _original_rows
@@ -2899,12 +3117,14 @@ class ReactiveMatrixLayout:
                                 # IMPORTANTE: Almacenar filas originales para cada categoría
                                 original_data = data_to_use.to_dict('records')
                                 category_rows = defaultdict(list)  # Diccionario: categoría -> lista de filas
+                                category_positions = defaultdict(list)  # categoría -> posiciones en data_to_use
                                 
                                 # Agrupar filas por categoría
-                                for row in original_data:
+                                for pos, row in enumerate(original_data):
                                     cat = row.get(category_col)
                                     if cat is not None:
                                         category_rows[str(cat)].append(row)
+                                        category_positions[str(cat)].append(pos)
                                 
                                 if value_col and value_col in data_to_use.columns:
                                     # Calcular suma por categoría
@@ -2913,7 +3133,8 @@ class ReactiveMatrixLayout:
                                         {
                                             'category': str(r[category_col]),
                                             'value': float(r[value_col]),
-                                            '_original_rows': category_rows.get(str(r[category_col]), [])
+                                            '_original_rows': category_rows.get(str(r[category_col]), []),
+                                            '_positions': category_positions.get(str(r[category_col]), [])
                                         }
                                         for _, r in agg.iterrows()
                                     ]
@@ -2924,7 +3145,8 @@ class ReactiveMatrixLayout:
                                         {
                                             'category': str(cat),
                                             'value': int(cnt),
-                                            '_original_rows': category_rows.get(str(cat), [])
+                                            '_original_rows': category_rows.get(str(cat), []),
+                                            '_positions': category_positions.get(str(cat), [])
                                         }
                                         for cat, cnt in counts.items()
                                     ]
@@ -2994,7 +3216,10 @@ class ReactiveMatrixLayout:
                         
                         # JavaScript para actualizar el pie chart (sin disparar eventos)
                         div_id = self._layout.div_id
-                        pie_data_json = json.dumps(_sanitize_for_json(pie_data))
+                        if self._send_patch_update(letter, 'pie', pie_data,
+                                                   self._table_positions(items, data_to_use)):
+                            return
+                        pie_data_json = dumps_json(pie_data)
                         
                         # Flag para evitar actualizaciones múltiples simultáneas
                         update_flag_key = f'_bestlib_updating_pie_{letter}'
@@ -3210,7 +3435,7 @@ class ReactiveMatrixLayout:
                     self._update_flags[pie_update_flag] = False
             
             # Registrar callback en el SelectionModel de la vista principal
-            primary_selection.on_change(update_pie)
+            self._link_view(letter, primary_selection, update_pie)
             
             # Debug: verificar que el callback se registró
             if self._debug or MatrixLayout._debug:
@@ -3266,7 +3491,7 @@ class ReactiveMatrixLayout:
             def violin_handler(payload):
                 """Handler que actualiza el SelectionModel de este violin plot."""
                 items = payload.get('items', [])
-                if not isinstance(items, list):
+                if not isinstance(items, (list, SelectionRows)):
                     if self._debug or MatrixLayout._debug:
                         print(f"⚠️ [ReactiveMatrixLayout] items no es lista en violin '{letter}': {type(items)}")
                     items = []
@@ -3288,6 +3513,8 @@ class ReactiveMatrixLayout:
 
                 items_df = _items_to_dataframe(items)
                 data_to_update = items_df if (items_df is not None and not getattr(items_df, 'empty', False)) else items
+                if isinstance(items, SelectionRows):
+                    data_to_update = items  # Solo el bitmask, sin materializar registros
 
                 violin_selection.update(data_to_update)
                 self.selection_model.update(data_to_update)
@@ -3352,7 +3579,10 @@ class ReactiveMatrixLayout:
             try:
                 # Determinar datos a usar
                 data_to_use = self._data
-                if items and len(items) > 0:
+                if items and hasattr(items, 'to_dataframe'):
+                    # Selección por posiciones: un solo take sobre el DataFrame original
+                    data_to_use = items.to_dataframe()
+                elif items and len(items) > 0:
                     # Extraer datos originales desde items
                     processed_items = []
                     for item in items:
@@ -3404,7 +3634,7 @@ class ReactiveMatrixLayout:
                     import traceback
                     traceback.print_exc()
         
-        primary_selection.on_change(update_violin)
+        self._link_view(letter, primary_selection, update_violin)
         return self
 
     def add_radviz(self, letter, features=None, class_col=None, linked_to=None, **kwargs):
@@ -3427,14 +3657,14 @@ class ReactiveMatrixLayout:
             raise ValueError(f"Vista principal '{linked_to}' no existe. Agrega la vista principal primero.")
         
         def update(items, count):
-            df = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else None)
+            df = self._data if not items else _selection_frame(items, None)
             if df is None:
                 return
             try:
                 self._register_chart(letter, 'radviz', df, features=features, class_col=class_col, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_star_coordinates(self, letter, features=None, class_col=None, linked_to=None, **kwargs):
@@ -3470,14 +3700,14 @@ class ReactiveMatrixLayout:
             raise ValueError(f"Vista principal '{linked_to}' no existe. Agrega la vista principal primero.")
         
         def update(items, count):
-            df = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else None)
+            df = self._data if not items else _selection_frame(items, None)
             if df is None:
                 return
             try:
                 self._register_chart(letter, 'star_coordinates', df, features=features, class_col=class_col, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_parallel_coordinates(self, letter, dimensions=None, category_col=None, linked_to=None, **kwargs):
@@ -3513,14 +3743,14 @@ class ReactiveMatrixLayout:
             raise ValueError(f"Vista principal '{linked_to}' no existe. Agrega la vista principal primero.")
         
         def update(items, count):
-            df = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else None)
+            df = self._data if not items else _selection_frame(items, None)
             if df is None:
                 return
             try:
                 self._register_chart(letter, 'parallel_coordinates', df, dimensions=dimensions, category_col=category_col, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_confusion_matrix(self, letter, y_true_col=None, y_pred_col=None, linked_to=None, normalize=True, **kwargs):
@@ -3544,28 +3774,33 @@ class ReactiveMatrixLayout:
         if y_true_col is None or y_pred_col is None:
             raise ValueError("Debes especificar y_true_col y y_pred_col")
 
-        try:
-            from sklearn.metrics import confusion_matrix
-        except ImportError:
-            raise ImportError("scikit-learn es necesario para add_confusion_matrix")
+        from ..data.confusion import ConfusionMatrixEngine
+
+        if normalize is True:
+            normalize = 'true'
+        elif normalize is False:
+            normalize = None
+
+        # Factorizar etiquetas una sola vez; el mapeo se reutiliza en cada actualización
+        key = (id(self._data), y_true_col, y_pred_col)
+        engine = self._confusion_engines.get(key)
+        if engine is None:
+            engine = ConfusionMatrixEngine(self._data[y_true_col], self._data[y_pred_col])
+            self._confusion_engines[key] = engine
 
         # Función auxiliar para graficar
-        def render_confusion(df):
-            y_true = df[y_true_col]
-            y_pred = df[y_pred_col]
-            labels = sorted(list(set(y_true) | set(y_pred)))
-            cm = confusion_matrix(y_true, y_pred, labels=labels, normalize='true' if normalize else None)
-            cm_df = pd.DataFrame(cm, index=labels, columns=labels)
-            melted_data = cm_df.reset_index().melt(id_vars='index', var_name='Pred', value_name='Value')
+        def render_confusion(counts):
+            cm = engine.normalize(counts, normalize)
+            long_data = engine.to_long(cm, true_name='index', pred_name='Pred', value_name='Value')
             self._register_chart(
-                letter, 'heatmap', melted_data,
+                letter, 'heatmap', long_data,
                 x_col='Pred', y_col='index', value_col='Value',
                 colorMap=kwargs.get('colorMap', 'Blues'),
                 **kwargs
             )
 
         # Render inicial
-        render_confusion(self._data)
+        render_confusion(engine.counts())
 
         # Enlace a scatter seleccionado
         if not self._scatter_selection_models:
@@ -3575,15 +3810,21 @@ class ReactiveMatrixLayout:
 
         def update(items, count):
             if not items:
-                render_confusion(self._data)
+                render_confusion(engine.counts())
                 return
-            df_sel = pd.DataFrame(items) if isinstance(items[0], dict) else self._data
-            try:
-                render_confusion(df_sel)
-            except Exception:
-                pass
+            # Selección por posiciones sobre self._data: bincount directo
+            selection = getattr(items, 'selection', None)
+            if selection is not None and selection.source is self._data:
+                render_confusion(engine.counts(selection.row_ids))
+                return
+            if not isinstance(items[0], dict):
+                return
+            rows = [item.get('_original_row', item) for item in items]
+            y_true = [row.get(y_true_col) for row in rows]
+            y_pred = [row.get(y_pred_col) for row in rows]
+            render_confusion(engine.counts_from_labels(y_true, y_pred))
 
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
 
     def add_line_plot(self, letter, x_col=None, y_col=None, series_col=None, linked_to=None, **kwargs):
@@ -3614,12 +3855,12 @@ class ReactiveMatrixLayout:
         else:
             return self
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'line_plot', data_to_use, x_col=x_col, y_col=y_col, series_col=series_col, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_horizontal_bar(self, letter, category_col=None, value_col=None, linked_to=None, **kwargs):
@@ -3671,7 +3912,7 @@ class ReactiveMatrixLayout:
             def hb_handler(payload):
                 """Handler que actualiza el SelectionModel de este horizontal bar chart"""
                 items = payload.get('items', [])
-                if not isinstance(items, list):
+                if not isinstance(items, (list, SelectionRows)):
                     if self._debug or MatrixLayout._debug:
                         print(f"⚠️ [ReactiveMatrixLayout] items no es lista en horizontal_bar '{letter}': {type(items)}")
                     items = []
@@ -3693,6 +3934,8 @@ class ReactiveMatrixLayout:
 
                 items_df = _items_to_dataframe(items)
                 data_to_update = items_df if (items_df is not None and not getattr(items_df, 'empty', False)) else items
+                if isinstance(items, SelectionRows):
+                    data_to_update = items  # Solo el bitmask, sin materializar registros
 
                 hb_selection.update(data_to_update)
                 self.selection_model.update(data_to_update)
@@ -3729,7 +3972,7 @@ class ReactiveMatrixLayout:
             return self
 
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'horizontal_bar', data_to_use, category_col=category_col, value_col=value_col, **kwargs)
             except Exception:
@@ -3738,7 +3981,7 @@ class ReactiveMatrixLayout:
                     print(f"⚠️ [ReactiveMatrixLayout] Error actualizando horizontal_bar enlazado '{letter}'")
                     traceback.print_exc()
 
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_hexbin(self, letter, x_col=None, y_col=None, linked_to=None, **kwargs):
@@ -3789,7 +4032,7 @@ class ReactiveMatrixLayout:
             def hex_handler(payload):
                 """Handler que actualiza el SelectionModel de este hexbin chart"""
                 items = payload.get('items', [])
-                if not isinstance(items, list):
+                if not isinstance(items, (list, SelectionRows)):
                     if self._debug or MatrixLayout._debug:
                         print(f"⚠️ [ReactiveMatrixLayout] items no es lista en hexbin '{letter}': {type(items)}")
                     items = []
@@ -3811,6 +4054,8 @@ class ReactiveMatrixLayout:
 
                 items_df = _items_to_dataframe(items)
                 data_to_update = items_df if (items_df is not None and not getattr(items_df, 'empty', False)) else items
+                if isinstance(items, SelectionRows):
+                    data_to_update = items  # Solo el bitmask, sin materializar registros
 
                 hex_selection.update(data_to_update)
                 self.selection_model.update(data_to_update)
@@ -3845,7 +4090,7 @@ class ReactiveMatrixLayout:
         else:
             return self
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'hexbin', data_to_use, x_col=x_col, y_col=y_col, **kwargs)
             except Exception:
@@ -3853,7 +4098,7 @@ class ReactiveMatrixLayout:
                     import traceback
                     print(f"⚠️ [ReactiveMatrixLayout] Error actualizando hexbin enlazado '{letter}'")
                     traceback.print_exc()
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_errorbars(self, letter, x_col=None, y_col=None, yerr=None, xerr=None, linked_to=None, **kwargs):
@@ -3867,7 +4112,8 @@ class ReactiveMatrixLayout:
             yerr: Nombre de columna para error en Y (opcional)
             xerr: Nombre de columna para error en X (opcional)
             linked_to: Letra de la vista principal que debe actualizar este gráfico (opcional)
-            **kwargs: Argumentos adicionales
+            **kwargs: Argumentos adicionales. Con error='std'|'sem'|'ci' (sin yerr/xerr)
+                y_col se agrega por x_col como media ± error.
         
         Returns:
             self para encadenamiento
@@ -3876,7 +4122,7 @@ class ReactiveMatrixLayout:
         if self._data is None:
             raise ValueError("Debe usar set_data() primero")
 
-        interactive = kwargs.pop('interactive', None) if 'interactive' in kwargs else interactive
+        interactive = kwargs.pop('interactive', None)
         selection_var = kwargs.pop('selection_var', None) if 'selection_var' in kwargs else None
 
         if linked_to is None:
@@ -3906,7 +4152,7 @@ class ReactiveMatrixLayout:
             def eb_handler(payload):
                 """Handler que actualiza el SelectionModel de este errorbars chart"""
                 items = payload.get('items', [])
-                if not isinstance(items, list):
+                if not isinstance(items, (list, SelectionRows)):
                     if self._debug or MatrixLayout._debug:
                         print(f"⚠️ [ReactiveMatrixLayout] items no es lista en errorbars '{letter}': {type(items)}")
                     items = []
@@ -3928,6 +4174,8 @@ class ReactiveMatrixLayout:
 
                 items_df = _items_to_dataframe(items)
                 data_to_update = items_df if (items_df is not None and not getattr(items_df, 'empty', False)) else items
+                if isinstance(items, SelectionRows):
+                    data_to_update = items  # Solo el bitmask, sin materializar registros
 
                 eb_selection.update(data_to_update)
                 self.selection_model.update(data_to_update)
@@ -3965,7 +4213,7 @@ class ReactiveMatrixLayout:
             return self
 
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'errorbars', data_to_use, x_col=x_col, y_col=y_col, yerr=yerr, xerr=xerr, **kwargs)
             except Exception:
@@ -3974,7 +4222,7 @@ class ReactiveMatrixLayout:
                     print(f"⚠️ [ReactiveMatrixLayout] Error actualizando errorbars enlazado '{letter}'")
                     traceback.print_exc()
 
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_fill_between(self, letter, x_col=None, y1=None, y2=None, linked_to=None, **kwargs):
@@ -4005,12 +4253,12 @@ class ReactiveMatrixLayout:
         else:
             return self
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'fill_between', data_to_use, x_col=x_col, y1=y1, y2=y2, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_step(self, letter, x_col=None, y_col=None, linked_to=None, **kwargs):
@@ -4040,12 +4288,12 @@ class ReactiveMatrixLayout:
         else:
             return self
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'step_plot', data_to_use, x_col=x_col, y_col=y_col, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
 
     def add_kde(self, letter, column=None, bandwidth=None, linked_to=None, **kwargs):
@@ -4077,12 +4325,12 @@ class ReactiveMatrixLayout:
         else:
             return self
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'kde', data_to_use, column=column, bandwidth=bandwidth, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_distplot(self, letter, column=None, bins=30, kde=True, rug=False, linked_to=None, **kwargs):
@@ -4116,12 +4364,12 @@ class ReactiveMatrixLayout:
         else:
             return self
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'distplot', data_to_use, column=column, bins=bins, kde=kde, rug=rug, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_rug(self, letter, column=None, axis='x', linked_to=None, **kwargs):
@@ -4153,12 +4401,12 @@ class ReactiveMatrixLayout:
         else:
             return self
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'rug', data_to_use, column=column, axis=axis, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_qqplot(self, letter, column=None, dist='norm', linked_to=None, **kwargs):
@@ -4190,12 +4438,12 @@ class ReactiveMatrixLayout:
         else:
             return self
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'qqplot', data_to_use, column=column, dist=dist, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
     
     def add_ecdf(self, letter, column=None, linked_to=None, **kwargs):
@@ -4226,12 +4474,12 @@ class ReactiveMatrixLayout:
         else:
             return self
         def update(items, count):
-            data_to_use = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else items)
+            data_to_use = self._data if not items else _selection_frame(items, items)
             try:
                 self._register_chart(letter, 'ecdf', data_to_use, column=column, **kwargs)
             except Exception:
                 pass
-        sel.on_change(update)
+        self._link_view(letter, sel, update)
         return self
 
     def add_ridgeline(self, letter, column=None, category_col=None, bandwidth=None, linked_to=None, **kwargs):
@@ -4263,13 +4511,13 @@ class ReactiveMatrixLayout:
             else:
                 return self
             def update(items, count):
-                df = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else None)
+                df = self._data if not items else _selection_frame(items, None)
                 if df is not None:
                     try:
                         MatrixLayout.map_ridgeline(letter, df, column=column, category_col=category_col, bandwidth=bandwidth, **kwargs)
                     except Exception:
                         pass
-            sel.on_change(update)
+            self._link_view(letter, sel, update)
         return self
 
     def add_ribbon(self, letter, x_col=None, y1_col=None, y2_col=None, linked_to=None, **kwargs):
@@ -4301,13 +4549,13 @@ class ReactiveMatrixLayout:
             else:
                 return self
             def update(items, count):
-                df = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else None)
+                df = self._data if not items else _selection_frame(items, None)
                 if df is not None:
                     try:
                         MatrixLayout.map_ribbon(letter, df, x_col=x_col, y1_col=y1_col, y2_col=y2_col, **kwargs)
                     except Exception:
                         pass
-            sel.on_change(update)
+            self._link_view(letter, sel, update)
         return self
 
     def add_hist2d(self, letter, x_col=None, y_col=None, bins=20, linked_to=None, **kwargs):
@@ -4339,13 +4587,13 @@ class ReactiveMatrixLayout:
             else:
                 return self
             def update(items, count):
-                df = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else None)
+                df = self._data if not items else _selection_frame(items, None)
                 if df is not None:
                     try:
                         MatrixLayout.map_hist2d(letter, df, x_col=x_col, y_col=y_col, bins=bins, **kwargs)
                     except Exception:
                         pass
-            sel.on_change(update)
+            self._link_view(letter, sel, update)
         return self
 
     def add_polar(self, letter, angle_col=None, radius_col=None, angle_unit='rad', linked_to=None, **kwargs):
@@ -4377,13 +4625,13 @@ class ReactiveMatrixLayout:
             else:
                 return self
             def update(items, count):
-                df = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else None)
+                df = self._data if not items else _selection_frame(items, None)
                 if df is not None:
                     try:
                         MatrixLayout.map_polar(letter, df, angle_col=angle_col, radius_col=radius_col, angle_unit=angle_unit, **kwargs)
                     except Exception:
                         pass
-            sel.on_change(update)
+            self._link_view(letter, sel, update)
         return self
 
     def add_funnel(self, letter, stage_col=None, value_col=None, linked_to=None, **kwargs):
@@ -4414,22 +4662,24 @@ class ReactiveMatrixLayout:
             else:
                 return self
             def update(items, count):
-                df = self._data if not items else (pd.DataFrame(items) if HAS_PANDAS and isinstance(items[0], dict) else None)
+                df = self._data if not items else _selection_frame(items, None)
                 if df is not None:
                     try:
                         MatrixLayout.map_funnel(letter, df, stage_col=stage_col, value_col=value_col, **kwargs)
                     except Exception:
                         pass
-            sel.on_change(update)
+            self._link_view(letter, sel, update)
         return self
 
     
     def _repr_html_(self):
         """Representación HTML para Jupyter (delega al layout interno)"""
+        self._reset_patch_state()
         return self._layout._repr_html_()
     
     def _repr_mimebundle_(self, include=None, exclude=None):
         """Representación MIME bundle para JupyterLab (delega al layout interno)"""
+        self._reset_patch_state()
         return self._layout._repr_mimebundle_(include=include, exclude=exclude)
     
     def display(self, ascii_layout=None):
@@ -4450,6 +4700,7 @@ class ReactiveMatrixLayout:
             self._layout.ascii_layout = ascii_layout
         
         # Solo mostrar una vez - el bar chart se actualiza automáticamente vía JavaScript
+        self._reset_patch_state()
         self._layout.display()
         
         # Retornar None explícitamente para evitar que Jupyter muestre el objeto
@@ -4585,35 +4836,3 @@ class ReactiveMatrixLayout:
             else:
                 count_msg = "0 items"
             print(f"💾 Selección guardada para '{selection_var_name}': {count_msg}")
-
-
-# ==========================
-# Utilidades compartidas
-# ==========================
-def _sanitize_for_json(obj):
-    """Convierte recursivamente tipos numpy y no serializables a tipos JSON puros.
-    (copia local para uso desde reactive.py)
-    """
-    try:
-        import numpy as _np  # opcional
-    except Exception:
-        _np = None
-
-    if obj is None:
-        return None
-    if isinstance(obj, (str, bool, int, float)):
-        return int(obj) if type(obj).__name__ in ("int64", "int32") else (float(obj) if type(obj).__name__ in ("float32", "float64") else obj)
-    if _np is not None:
-        if isinstance(obj, _np.integer):
-            return int(obj)
-        if isinstance(obj, _np.floating):
-            return float(obj)
-        if isinstance(obj, _np.ndarray):
-            return _sanitize_for_json(obj.tolist())
-    if isinstance(obj, dict):
-        return {str(k): _sanitize_for_json(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple, set)):
-        return [_sanitize_for_json(v) for v in obj]
-    return str(obj)
-
-
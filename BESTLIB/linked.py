@@ -5,6 +5,7 @@ Sistema de Vistas Enlazadas legacy (Linked Views).
 """
 from warnings import warn
 from .matrix import MatrixLayout
+from .reactive.selection import SelectionRows
 from collections import Counter
 
 try:
@@ -250,7 +251,7 @@ class LinkedViews:
                     print(f"   ⚠️ No hay items en el payload, limpiando selección")
             else:
                 # Asegurar que items sea una lista
-                if not isinstance(items, list):
+                if not isinstance(items, (list, SelectionRows)):
                     items = [items]
                 
                 # CRÍTICO: Verificar que los items tengan la estructura correcta
@@ -1,5 +1,33 @@
 (function (global) {
   
+  // ==========================================
+  // Renderers por tipo de gráfico (code splitting)
+  // ==========================================
+  
+  // Con la librería dividida (ver render/chunks.py) cada render*D3 del core
+  // es un stub y su implementación llega como módulo aparte
+  const loadedRenderers = {};
+  
+  /**
+   * Define renderers enviados como módulo. El eval directo hace que el
+   * módulo vea el scope de la librería (helpers, estado compartido).
+   */
+  function defineRenderers(source) {
+    eval(source);
+  }
+  
+  function callRenderer(name, self, args) {
+    const fn = loadedRenderers[name];
+    if (!fn) {
+      console.error(`[BESTLIB] Renderer '${name}' no cargado`);
+      return undefined;
+    }
+    return fn.apply(self, args);
+  }
+  
+  global.__bestlib_define_renderers__ = defineRenderers;
+  global.__bestlib_has_renderer__ = name => typeof loadedRenderers[name] === 'function';
+  
   // ==========================================
   // Sistema de Comunicación (JS → Python)
   // ==========================================
@@ -40,6 +68,7 @@
       if (J && J.notebook && J.notebook.kernel) {
           try {
         const comm = J.notebook.kernel.comm_manager.new_comm("bestlib_matrix", { div_id: divId });
+        attachCommReceiver(comm, divId);
         global._bestlibComms[divId] = comm;
         return comm;
           } catch (e) {
@@ -61,6 +90,7 @@
           
           // Manejar errores de la promesa
         commPromise.then(comm => {
+          attachCommReceiver(comm, divId);
           global._bestlibComms[divId] = comm;
         }).catch(err => {
             console.error('Error al crear comm en Colab:', err);
@@ -83,6 +113,7 @@
       if (global.IPython && global.IPython.notebook && global.IPython.notebook.kernel) {
           try {
         const comm = global.IPython.notebook.kernel.comm_manager.new_comm("bestlib_matrix", { div_id: divId });
+        attachCommReceiver(comm, divId);
         global._bestlibComms[divId] = comm;
         return comm;
           } catch (e) {
@@ -126,7 +157,50 @@
    * @param {object} payload - Datos del evento
    * @param {number} maxRetries - Número máximo de intentos (por defecto 3)
    */
-  async function sendEvent(divId, type, payload, maxRetries = 3) {
+  function sendEvent(divId, type, payload, maxRetries = 3) {
+    if (!COALESCED_EVENT_TYPES[type]) {
+      return sendEventNow(divId, type, payload, maxRetries);
+    }
+    // Latest-wins: durante un brush solo viaja el último payload por vista
+    const view = (payload && payload.__view_letter__) || '';
+    pendingEvents.set(`${divId}|${view}|${type}`, { divId, type, payload, maxRetries });
+    scheduleEventFlush();
+  }
+  
+  // Eventos de alta frecuencia que se agrupan (latest-wins) antes de enviarse
+  const COALESCED_EVENT_TYPES = { select: true };
+  // Intervalo mínimo entre envíos agrupados (ms)
+  const COALESCE_MIN_INTERVAL = 50;
+  const pendingEvents = new Map();
+  let eventFlushScheduled = false;
+  let lastEventFlush = 0;
+  
+  function scheduleEventFlush() {
+    if (eventFlushScheduled) return;
+    eventFlushScheduled = true;
+    const nextFrame = typeof requestAnimationFrame === 'function'
+      ? requestAnimationFrame
+      : (cb => setTimeout(cb, 16));
+    nextFrame(() => {
+      const wait = COALESCE_MIN_INTERVAL - (Date.now() - lastEventFlush);
+      if (wait > 0) {
+        setTimeout(flushPendingEvents, wait);
+      } else {
+        flushPendingEvents();
+      }
+    });
+  }
+  
+  function flushPendingEvents() {
+    eventFlushScheduled = false;
+    lastEventFlush = Date.now();
+    const events = Array.from(pendingEvents.values());
+    pendingEvents.clear();
+    events.forEach(ev => sendEventNow(ev.divId, ev.type, ev.payload, ev.maxRetries));
+  }
+  
+  // Envío inmediato al kernel (con reintentos)
+  async function sendEventNow(divId, type, payload, maxRetries = 3) {
     let attempts = 0;
     
     while (attempts < maxRetries) {
@@ -205,6 +279,102 @@
     }
   }
   
+  // ==========================================
+  // Mensajes Python → JavaScript
+  // ==========================================
+  
+  // Handlers por tipo de mensaje enviado desde Python (CommManager.send)
+  const kernelMessageHandlers = {};
+  
+  /**
+   * Registra un handler para mensajes enviados desde Python
+   * @param {string} type - Tipo de mensaje (ej: 'heatmap_tile')
+   * @param {function} handler - handler(divId, payload, buffers)
+   */
+  function onKernelMessage(type, handler) {
+    kernelMessageHandlers[type] = handler;
+  }
+  
+  // Constructores de typed arrays por tipo del esquema binario (core/binary.py)
+  const BINARY_ARRAY_TYPES = {
+    float64: Float64Array,
+    float32: Float32Array,
+    int32: Int32Array,
+    uint8: Uint8Array
+  };
+  
+  /**
+   * Convierte los buffers del comm (DataView o ArrayBuffer) en typed arrays
+   * @param {object} schema - Esquema {length, columns:[{name, dtype, buffer}]}
+   * @param {Array} buffers - Buffers adjuntos al mensaje
+   * @returns {object} {nombre: TypedArray}
+   */
+  function decodeBinaryColumns(schema, buffers) {
+    const columns = {};
+    (schema.columns || []).forEach(col => {
+      const ArrayType = BINARY_ARRAY_TYPES[col.dtype];
+      const buf = buffers[col.buffer];
+      if (!ArrayType || !buf) return;
+      let arrayBuffer = buf;
+      let offset = 0;
+      let byteLength = buf.byteLength;
+      if (ArrayBuffer.isView(buf)) {
+        arrayBuffer = buf.buffer;
+        offset = buf.byteOffset;
+      }
+      if (offset % ArrayType.BYTES_PER_ELEMENT !== 0) {
+        // Vista desalineada: copiar a un ArrayBuffer propio
+        arrayBuffer = arrayBuffer.slice(offset, offset + byteLength);
+        offset = 0;
+      }
+      columns[col.name] = new ArrayType(arrayBuffer, offset, byteLength / ArrayType.BYTES_PER_ELEMENT);
+    });
+    return columns;
+  }
+  
+  function dispatchKernelMessage(divId, data, buffers) {
+    if (!data || typeof data !== 'object') return;
+    const handler = kernelMessageHandlers[data.type];
+    if (!handler) return;
+    try {
+      const payload = data.payload || {};
+      if (payload.__binary__) {
+        payload.__binary_schema__ = payload.__binary__;
+        payload.__columns__ = decodeBinaryColumns(payload.__binary__, buffers || []);
+        delete payload.__binary__;
+      }
+      handler(data.div_id || divId, payload, buffers || []);
+    } catch (e) {
+      console.error(`[BESTLIB] Error procesando mensaje '${data.type}' desde Python:`, e);
+    }
+  }
+  
+  /**
+   * Conecta la recepción de mensajes de un comm (Jupyter clásico o Colab)
+   */
+  function attachCommReceiver(comm, divId) {
+    if (!comm || comm._bestlibReceiver) return;
+    comm._bestlibReceiver = true;
+    if (typeof comm.on_msg === 'function') {
+      // Jupyter clásico / JupyterLab
+      comm.on_msg(msg => {
+        const content = (msg && msg.content) || {};
+        dispatchKernelMessage(divId, content.data, msg && msg.buffers);
+      });
+    } else if (comm.messages && typeof comm.messages[Symbol.asyncIterator] === 'function') {
+      // Google Colab: los mensajes llegan como async iterator
+      (async () => {
+        try {
+          for await (const msg of comm.messages) {
+            dispatchKernelMessage(divId, msg && msg.data, msg && msg.buffers);
+          }
+        } catch (e) {
+          console.warn('[BESTLIB] Canal de mensajes de Colab cerrado:', e);
+        }
+      })();
+    }
+  }
+  
   // ==========================================
   // Funciones Helper para Selección
   // ==========================================
@@ -306,6 +476,16 @@
       payload.selected_bin = metadata.selected_bin;
     }
     
+    // Filas del dataset compartido: enviar solo sus posiciones
+    const rowIds = encodeSelectionRowIds(items);
+    if (rowIds) {
+      payload.items = [];
+      payload.count = rowIds.count;
+      payload.__row_ids__ = rowIds;
+      delete payload.indices;
+      return payload;
+    }
+    
     // Para compatibilidad hacia atrás, también incluir _original_rows
     if (items && items.length > 0) {
       payload._original_rows = items;
@@ -314,6 +494,68 @@
     return payload;
   }
   
+  /**
+   * Payload de selección que lleva solo la geometría del brush.
+   * 
+   * Solo aplica a vistas sobre un dataset compartido con columnas de brush
+   * (spec.__brush_columns__ = {x: columna, y: columna}); Python evalúa la
+   * selección sobre el dataset completo. Retorna null si no aplica o si
+   * alguna extensión no es numérica (p. ej. fechas), para usar filas.
+   * 
+   * @param {object} ranges - {x: [min, max], y: [min, max]} en unidades de datos
+   */
+  function createBrushPayload(divId, spec, container, graphType, ranges) {
+    const axes = spec.__brush_columns__;
+    if (!axes || !spec.__dataset__) return null;
+    const extents = {};
+    for (const axis of Object.keys(ranges)) {
+      const column = axes[axis];
+      const lo = Number(ranges[axis][0]);
+      const hi = Number(ranges[axis][1]);
+      if (!column || !isFinite(lo) || !isFinite(hi)) return null;
+      extents[column] = [Math.min(lo, hi), Math.max(lo, hi)];
+    }
+    const payload = createSelectPayload(divId, [], spec, container, graphType);
+    payload.__brush__ = { dataset: spec.__dataset__, extents: extents };
+    return payload;
+  }
+  
+  /**
+   * Payload de selección por lasso: solo los vértices del polígono (unidades
+   * de datos). Python evalúa punto-en-polígono con el índice espacial del
+   * dataset compartido. Retorna null si la vista no tiene columnas de brush.
+   * 
+   * @param {Array} polygon - [[x, y], ...] en unidades de datos
+   */
+  function createLassoPayload(divId, spec, container, graphType, polygon) {
+    const axes = spec.__brush_columns__;
+    if (!axes || !axes.x || !axes.y || !spec.__dataset__) return null;
+    const vertices = polygon.map(p => [Number(p[0]), Number(p[1])]);
+    if (vertices.length < 3 || vertices.some(p => !isFinite(p[0]) || !isFinite(p[1]))) return null;
+    const payload = createSelectPayload(divId, [], spec, container, graphType);
+    payload.__brush__ = {
+      dataset: spec.__dataset__,
+      columns: [axes.x, axes.y],
+      polygon: vertices
+    };
+    return payload;
+  }
+  
+  /**
+   * Punto-en-polígono (regla par-impar), igual que data/spatial.py.
+   */
+  function pointInPolygon(px, py, polygon) {
+    let inside = false;
+    for (let i = 0, j = polygon.length - 1; i < polygon.length; j = i++) {
+      const xi = polygon[i][0], yi = polygon[i][1];
+      const xj = polygon[j][0], yj = polygon[j][1];
+      if ((yi > py) !== (yj > py) && px < (xj - xi) * (py - yi) / (yj - yi) + xi) {
+        inside = !inside;
+      }
+    }
+    return inside;
+  }
+  
   // ==========================================
   // Funciones Helper para Tooltips/Hover
   // ==========================================
@@ -372,6 +614,115 @@
     }
   }
   
+  // ==========================================
+  // Datasets compartidos (__datasets__)
+  // ==========================================
+  
+  // Fila compartida -> {dataset, pos}, para enviar selecciones como posiciones
+  const rowPositions = new WeakMap();
+  
+  /**
+   * Codifica las filas seleccionadas como posiciones del dataset compartido
+   * (ids ordenados, rangos o bitmask, lo más compacto). Retorna null si
+   * alguna fila no pertenece a un único dataset.
+   */
+  function encodeSelectionRowIds(rows) {
+    if (!rows || rows.length === 0) return null;
+    const first = rowPositions.get(rows[0]);
+    if (!first) return null;
+    const ids = new Int32Array(rows.length);
+    for (let i = 0; i < rows.length; i++) {
+      const ref = rowPositions.get(rows[i]);
+      if (!ref || ref.dataset !== first.dataset) return null;
+      ids[i] = ref.pos;
+    }
+    ids.sort();
+    let count = 0;
+    for (let i = 0; i < ids.length; i++) {
+      if (i === 0 || ids[i] !== ids[i - 1]) ids[count++] = ids[i];
+    }
+    const unique = ids.subarray(0, count);
+    const length = first.length;
+    const ranges = [];
+    for (let i = 0; i < unique.length; i++) {
+      if (ranges.length && ranges[ranges.length - 1][1] === unique[i]) {
+        ranges[ranges.length - 1][1] = unique[i] + 1;
+      } else {
+        ranges.push([unique[i], unique[i] + 1]);
+      }
+    }
+    const result = { dataset: first.dataset, count: count, length: length };
+    // Costo aproximado en caracteres de cada formato (igual que data/datasets.py)
+    const digits = String(length).length;
+    const costIds = count * (digits + 1);
+    const costRanges = ranges.length * 2 * (digits + 2);
+    const costMask = Math.floor(Math.floor((length + 7) / 8) * 4 / 3);
+    const best = Math.min(costIds, costRanges, costMask);
+    if (best === costRanges) {
+      result.ranges = ranges;
+    } else if (best === costIds) {
+      result.ids = Array.from(unique);
+    } else {
+      const mask = new Uint8Array(Math.floor((length + 7) / 8));
+      unique.forEach(pos => { mask[pos >> 3] |= 1 << (pos & 7); });
+      let binary = '';
+      for (let i = 0; i < mask.length; i += 0x8000) {
+        binary += String.fromCharCode.apply(null, mask.subarray(i, i + 0x8000));
+      }
+      result.bitmask = btoa(binary);
+    }
+    return result;
+  }
+  
+  function hydrateItems(items, rows) {
+    if (!Array.isArray(items)) return;
+    items.forEach(item => {
+      if (!item || typeof item !== 'object') return;
+      if (typeof item._row === 'number') {
+        item._original_row = rows[item._row];
+        delete item._row;
+      }
+      if (Array.isArray(item._rows)) {
+        item._original_rows = item._rows.map(i => rows[i]);
+        delete item._rows;
+      }
+    });
+  }
+  
+  /**
+   * Resuelve las posiciones de fila (_row/_rows) de los specs contra las
+   * tablas de __datasets__. Las filas se materializan una vez por tabla y
+   * todas las vistas comparten los mismos objetos.
+   */
+  function hydrateDatasets(mapping) {
+    const datasets = mapping && mapping.__datasets__;
+    if (!datasets || mapping.__datasetsHydrated__) return;
+    const tables = {};
+    Object.keys(datasets).forEach(name => {
+      const table = datasets[name];
+      const rows = new Array(table.length);
+      for (let i = 0; i < table.length; i++) {
+        const row = {};
+        table.columns.forEach(col => { row[col] = table.data[col][i]; });
+        rows[i] = row;
+        rowPositions.set(row, { dataset: name, pos: i, length: table.length });
+      }
+      tables[name] = rows;
+    });
+    Object.keys(mapping).forEach(key => {
+      const spec = mapping[key];
+      if (key.startsWith('__') || !spec || typeof spec !== 'object') return;
+      const rows = tables[spec.__dataset__];
+      if (!rows) return;
+      hydrateItems(spec.data, rows);
+      if (spec.series && typeof spec.series === 'object' && !Array.isArray(spec.series)) {
+        Object.values(spec.series).forEach(series => hydrateItems(series, rows));
+      }
+    });
+    mapping.__datasetRows__ = tables;
+    mapping.__datasetsHydrated__ = true;
+  }
+  
   // ==========================================
   // Renderizado Principal
   // ==========================================
@@ -379,10 +730,14 @@
   function render(divId, asciiLayout, mapping) {
     const container = document.getElementById(divId);
     if (!container) return;
+    hydrateDatasets(mapping);
 
+    // Geometría precalculada en Python (core/layout.py:LayoutEngine.geometry):
+    // regiones ya fusionadas y plantillas CSS, sin volver a parsear el layout
+    const grid = mapping.__grid__;
     const rows = asciiLayout.trim().split("\n");
-    const R = rows.length;
-    const C = rows[0].length;
+    const R = grid ? grid.rows : rows.length;
+    const C = grid ? grid.cols : rows[0].length;
     
     container.style.display = "grid";
     
@@ -393,7 +748,9 @@
     const cellPadding = mapping.__cell_padding__ !== undefined ? mapping.__cell_padding__ : 15;
     
     // Configuración dinámica de columnas
-    if (mapping.__col_widths__ && Array.isArray(mapping.__col_widths__) && mapping.__col_widths__.length === C) {
+    if (grid) {
+      container.style.gridTemplateColumns = grid.templateColumns;
+    } else if (mapping.__col_widths__ && Array.isArray(mapping.__col_widths__) && mapping.__col_widths__.length === C) {
       // Convertir ratios a fr si es necesario
       const colWidths = mapping.__col_widths__.map(w => {
         if (typeof w === 'number') {
@@ -407,7 +764,9 @@
     }
     
     // Configuración dinámica de filas
-    if (mapping.__row_heights__ && Array.isArray(mapping.__row_heights__) && mapping.__row_heights__.length === R) {
+    if (grid) {
+      container.style.gridTemplateRows = grid.templateRows;
+    } else if (mapping.__row_heights__ && Array.isArray(mapping.__row_heights__) && mapping.__row_heights__.length === R) {
       const rowHeights = mapping.__row_heights__.map(h => {
         if (typeof h === 'number') {
           return `minmax(${h}px, auto)`;
@@ -496,162 +855,222 @@
       return type === 'circle' || type === 'rect' || type === 'line';
     }
 
-    // Sistema de merge mejorado: marcar celdas visitadas
-    const visited = Array.from({length: R}, () => Array(C).fill(false));
-    
-    for (let r = 0; r < R; r++) {
-      for (let c = 0; c < C; c++) {
-        if (visited[r][c]) continue;
-        
-        const letter = rows[r][c];
-        if (letter === '.') {
-          visited[r][c] = true;
-          continue;
-        }
-        
-        let width = 1;
-        let height = 1;
-        
-        // Si debe hacer merge, calcular el área rectangular completa
-        if (shouldMerge(letter)) {
-          // Expandir horizontalmente primero
-          while (c + width < C && !visited[r][c + width] && rows[r][c + width] === letter) {
-            width++;
+    /**
+     * Dibuja un gráfico o forma simple en su celda. Los specs diferidos
+     * (__deferred__, ver MatrixLayout._apply_lazy) se piden antes al kernel.
+     */
+    function mountCell(cell, spec) {
+      if (spec.__deferred__) {
+        cell._mountChart = full => mountCell(cell, full);
+        cell.classList.add('matrix-cell-pending');
+        const letter = cell.getAttribute('data-letter');
+        sendEvent(divIdFromMapping, 'cell_spec', { letter: letter, __view_letter__: letter });
+        // Sin respuesta del kernel (comm caído, salida reabierta): aviso visible
+        cell._specTimeout = setTimeout(() => {
+          if (typeof cell._mountChart !== 'function') return;
+          cell.classList.remove('matrix-cell-pending');
+          cell.textContent = 'Gráfico no disponible: el kernel no respondió. Vuelve a ejecutar la celda.';
+          cell.style.color = '#9aa0a6';
+        }, CELL_SPEC_TIMEOUT);
+        return;
+      }
+      cell.classList.remove('matrix-cell-pending');
+      // Cargar D3 y renderizar (para gráficos Y formas simples)
+      ensureD3().then(d3 => {
+        if (isD3Spec(spec)) {
+          // Actualizaciones de vistas enlazadas recibidas antes de montar
+          if (cell._pendingUpdates) {
+            spec = cell._pendingUpdates.reduce((acc, update) => applyViewUpdate(acc, update), spec);
+            cell._pendingUpdates = null;
           }
+          // Guardar spec y divId en el elemento para uso en ResizeObserver
+          cell._chartSpec = spec;
+          cell._chartDivId = divIdFromMapping;
           
-          // Expandir verticalmente: verificar que todas las filas debajo tengan la misma letra en el mismo rango
-          let canGrow = true;
-          while (r + height < R && canGrow) {
-            // Verificar que todas las celdas en la fila siguiente dentro del rango sean la misma letra
-            for (let cc = c; cc < c + width; cc++) {
-              if (visited[r + height][cc] || rows[r + height][cc] !== letter) {
-                canGrow = false;
-                break;
-              }
-            }
-            if (canGrow) {
-              height++;
+          // 🔒 MEJORA ESTÉTICA: Esperar a que el contenedor tenga dimensiones antes de renderizar
+          // Usar requestAnimationFrame para asegurar que el layout esté calculado
+          requestAnimationFrame(() => {
+            // Verificar que el contenedor tenga dimensiones
+            if (cell.offsetWidth === 0 || cell.offsetHeight === 0) {
+              // Si aún no tiene dimensiones, esperar un frame más
+              requestAnimationFrame(() => {
+          renderChartD3(cell, spec, d3, divIdFromMapping);
+              });
+            } else {
+              renderChartD3(cell, spec, d3, divIdFromMapping);
             }
+          });
+          
+          // CRÍTICO: NO usar ResizeObserver para gráficos interactivos con brush
+          // Esto previene que el brush desaparezca al re-renderizar
+          const isInteractive = spec.interactive !== false; // Por defecto true para scatter
+          const isScatterPlot = spec.type === 'scatter';
+          
+          if (!isInteractive || !isScatterPlot) {
+            // Solo agregar ResizeObserver para gráficos NO interactivos
+            // Usar debounce para evitar re-renderizados excesivos
+            setupResizeObserver(cell, () => {
+              // Debounce: esperar 150ms antes de re-renderizar
+              if (cell._resizeTimeout) {
+                clearTimeout(cell._resizeTimeout);
+              }
+              cell._resizeTimeout = setTimeout(() => {
+                // Verificar que D3 todavía esté disponible
+                if (global.d3 && cell._chartSpec) {
+                  // Limpiar SVG anterior
+                  const existingSvg = cell.querySelector('svg');
+                  if (existingSvg) {
+                    existingSvg.remove();
+                  }
+                  // Re-renderizar el gráfico
+                  renderChartD3(cell, cell._chartSpec, global.d3, cell._chartDivId);
+                }
+              }, 150);
+            });
+          } else {
+            console.log('[BESTLIB] ResizeObserver desactivado para scatter plot interactivo (prevenir pérdida de brush)');
           }
+        } else if (isSimpleViz(spec)) {
+          renderSimpleVizD3(cell, spec, d3);
         }
+      }).catch(err => {
+        cell.textContent = 'Error: No se pudo cargar D3.js';
+        cell.style.color = '#e74c3c';
+        cell.style.padding = '20px';
+        console.error('[BESTLIB]', err);
+      });
+    }
+
+    // Grillas grandes (__lazy__): las celdas fuera del viewport quedan como
+    // placeholders hasta acercarse a él
+    const lazyObserver = mapping.__lazy__ && typeof IntersectionObserver !== 'undefined'
+      ? new IntersectionObserver(entries => {
+          entries.forEach(entry => {
+            if (!entry.isIntersecting) return;
+            const cell = entry.target;
+            lazyObserver.unobserve(cell);
+            const spec = cell._lazySpec;
+            cell._lazySpec = null;
+            if (spec) mountCell(cell, spec);
+          });
+        }, { rootMargin: '200px 0px' })
+      : null;
+
+    // Regiones [letra, fila, columna, alto, ancho]; sin __grid__ se calculan
+    // aquí con el sistema de merge (celdas visitadas)
+    const regions = grid ? grid.regions : computeRegions();
+    
+    function computeRegions() {
+      const regions = [];
+      const visited = Array.from({length: R}, () => Array(C).fill(false));
+      
+      for (let r = 0; r < R; r++) {
+        for (let c = 0; c < C; c++) {
+          if (visited[r][c]) continue;
         
-        // Marcar todas las celdas como visitadas
-        for (let rr = r; rr < r + height; rr++) {
-          for (let cc = c; cc < c + width; cc++) {
-            visited[rr][cc] = true;
+          const letter = rows[r][c];
+          if (letter === '.') {
+            visited[r][c] = true;
+            continue;
           }
-        }
         
-        // Crear celda
-        const spec = mapping[letter];
-        const cell = document.createElement("div");
-        cell.className = "matrix-cell";
-        // Agregar ID único basado en letra y posición para LinkedViews
-        cell.id = `${divId}-cell-${letter}-${r}-${c}`;
-        cell.setAttribute('data-letter', letter);
-        // Usar grid-row y grid-column con span para fusionar celdas
-        cell.style.gridRow = `${r + 1} / span ${height}`;
-        cell.style.gridColumn = `${c + 1} / span ${width}`;
+          let width = 1;
+          let height = 1;
         
-        // Agregar clases CSS para indicadores de enlace visual
-        if (spec && typeof spec === 'object') {
-          // Si es un gráfico principal (genera selecciones), agregar clase linked-primary
-          // Verificar múltiples formas de identificar gráficos principales
-          const isPrimary = (spec.__scatter_letter__ && spec.__scatter_letter__ === letter) ||
-                           (spec.__is_primary_view__ === true) ||
-                           (spec.__view_letter__ && spec.__view_letter__ === letter && spec.interactive === true);
+          // Si debe hacer merge, calcular el área rectangular completa
+          if (shouldMerge(letter)) {
+            // Expandir horizontalmente primero
+            while (c + width < C && !visited[r][c + width] && rows[r][c + width] === letter) {
+              width++;
+            }
           
-          if (isPrimary) {
-            cell.classList.add('linked-primary');
-            cell.setAttribute('data-is-primary', 'true');
-            cell.setAttribute('data-primary-letter', letter);
+            // Expandir verticalmente: verificar que todas las filas debajo tengan la misma letra en el mismo rango
+            let canGrow = true;
+            while (r + height < R && canGrow) {
+              // Verificar que todas las celdas en la fila siguiente dentro del rango sean la misma letra
+              for (let cc = c; cc < c + width; cc++) {
+                if (visited[r + height][cc] || rows[r + height][cc] !== letter) {
+                  canGrow = false;
+                  break;
+                }
+              }
+              if (canGrow) {
+                height++;
+              }
+            }
           }
-          
-          // Si está enlazado a otro gráfico (linked_to), agregar clase linked-secondary
-          if (spec.__linked_to__) {
-            cell.classList.add('linked-secondary');
-            const linkedTo = spec.__linked_to__;
-            cell.setAttribute('data-linked-to', linkedTo);
-            cell.setAttribute('data-linked-from', letter);
+        
+          // Marcar todas las celdas como visitadas
+          for (let rr = r; rr < r + height; rr++) {
+            for (let cc = c; cc < c + width; cc++) {
+              visited[rr][cc] = true;
+            }
           }
+          regions.push([letter, r, c, height, width]);
+        }
+      }
+      return regions;
+    }
+    
+    regions.forEach(([letter, r, c, height, width]) => {
+      // Crear celda
+      const spec = mapping[letter];
+      const cell = document.createElement("div");
+      cell.className = "matrix-cell";
+      // Agregar ID único basado en letra y posición para LinkedViews
+      cell.id = `${divId}-cell-${letter}-${r}-${c}`;
+      cell.setAttribute('data-letter', letter);
+      // Usar grid-row y grid-column con span para fusionar celdas
+      cell.style.gridRow = `${r + 1} / span ${height}`;
+      cell.style.gridColumn = `${c + 1} / span ${width}`;
+      
+      // Agregar clases CSS para indicadores de enlace visual
+      if (spec && typeof spec === 'object') {
+        // Si es un gráfico principal (genera selecciones), agregar clase linked-primary
+        // Verificar múltiples formas de identificar gráficos principales
+        const isPrimary = (spec.__scatter_letter__ && spec.__scatter_letter__ === letter) ||
+                         (spec.__is_primary_view__ === true) ||
+                         (spec.__view_letter__ && spec.__view_letter__ === letter && spec.interactive === true);
+        
+        if (isPrimary) {
+          cell.classList.add('linked-primary');
+          cell.setAttribute('data-is-primary', 'true');
+          cell.setAttribute('data-primary-letter', letter);
         }
         
-        // Aplicar padding personalizado si existe (usar la variable definida arriba)
-        cell.style.padding = `${cellPadding}px`;
+        // Si está enlazado a otro gráfico (linked_to), agregar clase linked-secondary
+        if (spec.__linked_to__) {
+          cell.classList.add('linked-secondary');
+          const linkedTo = spec.__linked_to__;
+          cell.setAttribute('data-linked-to', linkedTo);
+          cell.setAttribute('data-linked-from', letter);
+        }
+      }
+      
+      // Aplicar padding personalizado si existe (usar la variable definida arriba)
+      cell.style.padding = `${cellPadding}px`;
 
-        if (isD3Spec(spec) || isSimpleViz(spec)) {
-          // Guardar referencia al mapping en el contenedor para acceso desde funciones de renderizado
-          if (!container.__mapping__) {
-            container.__mapping__ = mapping;
-          }
-          // Cargar D3 y renderizar (para gráficos Y formas simples)
-          ensureD3().then(d3 => {
-            if (isD3Spec(spec)) {
-              // Guardar spec y divId en el elemento para uso en ResizeObserver
-              cell._chartSpec = spec;
-              cell._chartDivId = divIdFromMapping;
-              
-              // 🔒 MEJORA ESTÉTICA: Esperar a que el contenedor tenga dimensiones antes de renderizar
-              // Usar requestAnimationFrame para asegurar que el layout esté calculado
-              requestAnimationFrame(() => {
-                // Verificar que el contenedor tenga dimensiones
-                if (cell.offsetWidth === 0 || cell.offsetHeight === 0) {
-                  // Si aún no tiene dimensiones, esperar un frame más
-                  requestAnimationFrame(() => {
-              renderChartD3(cell, spec, d3, divIdFromMapping);
-                  });
-                } else {
-                  renderChartD3(cell, spec, d3, divIdFromMapping);
-                }
-              });
-              
-              // CRÍTICO: NO usar ResizeObserver para gráficos interactivos con brush
-              // Esto previene que el brush desaparezca al re-renderizar
-              const isInteractive = spec.interactive !== false; // Por defecto true para scatter
-              const isScatterPlot = spec.type === 'scatter';
-              
-              if (!isInteractive || !isScatterPlot) {
-                // Solo agregar ResizeObserver para gráficos NO interactivos
-                // Usar debounce para evitar re-renderizados excesivos
-                setupResizeObserver(cell, () => {
-                  // Debounce: esperar 150ms antes de re-renderizar
-                  if (cell._resizeTimeout) {
-                    clearTimeout(cell._resizeTimeout);
-                  }
-                  cell._resizeTimeout = setTimeout(() => {
-                    // Verificar que D3 todavía esté disponible
-                    if (global.d3 && cell._chartSpec) {
-                      // Limpiar SVG anterior
-                      const existingSvg = cell.querySelector('svg');
-                      if (existingSvg) {
-                        existingSvg.remove();
-                      }
-                      // Re-renderizar el gráfico
-                      renderChartD3(cell, cell._chartSpec, global.d3, cell._chartDivId);
-                    }
-                  }, 150);
-                });
-              } else {
-                console.log('[BESTLIB] ResizeObserver desactivado para scatter plot interactivo (prevenir pérdida de brush)');
-              }
-            } else if (isSimpleViz(spec)) {
-              renderSimpleVizD3(cell, spec, d3);
-            }
-          }).catch(err => {
-            cell.textContent = 'Error: No se pudo cargar D3.js';
-            cell.style.color = '#e74c3c';
-            cell.style.padding = '20px';
-            console.error('[BESTLIB]', err);
-          });
-        } else if (safeHtml) {
-          cell.innerHTML = spec || letter;
+      if (isD3Spec(spec) || isSimpleViz(spec)) {
+        // Guardar referencia al mapping en el contenedor para acceso desde funciones de renderizado
+        if (!container.__mapping__) {
+          container.__mapping__ = mapping;
+        }
+        if (lazyObserver) {
+          // Render perezoso: se dibuja al entrar en el viewport
+          cell._lazySpec = spec;
+          cell.classList.add('matrix-cell-pending');
+          lazyObserver.observe(cell);
         } else {
-          cell.textContent = (typeof spec === 'string') ? spec : letter;
+          mountCell(cell, spec);
         }
-
-        container.appendChild(cell);
+      } else if (safeHtml) {
+        cell.innerHTML = spec || letter;
+      } else {
+        cell.textContent = (typeof spec === 'string') ? spec : letter;
       }
-    }
+
+      container.appendChild(cell);
+    });
     
     // 🔒 MEJORA ESTÉTICA: Dibujar líneas conectivas entre gráficos enlazados
     // Esperar a que todas las celdas estén renderizadas antes de dibujar líneas
@@ -952,6 +1371,28 @@
    * Aplica estilos unificados a ejes D3
    * @param {object} axisSelection - Selección D3 del eje
    */
+  /**
+   * Define la actualización en el lugar de un gráfico de barras (bar,
+   * histogram): cuando un parche solo cambia valores, las barras y el eje Y
+   * transicionan sin re-dibujar el SVG.
+   */
+  function bindValuePatcher(container, d3, g, y, yAxis, chartHeight, valueField, keyField, axisFormat) {
+    container._patchValues = data => {
+      y.domain([0, d3.max(data, d => d[valueField]) || 100]).nice();
+      g.selectAll('.bar')
+        .data(data, d => patchKey(d[keyField]))
+        .transition()
+        .duration(400)
+        .attr('y', d => y(d[valueField]))
+        .attr('height', d => chartHeight - y(d[valueField]));
+      if (yAxis) {
+        const generator = d3.axisLeft(y).ticks(5);
+        yAxis.call(axisFormat ? generator.tickFormat(axisFormat) : generator);
+        applyUnifiedAxisStyles(yAxis);
+      }
+    };
+  }
+  
   function applyUnifiedAxisStyles(axisSelection) {
     axisSelection.selectAll('text')
       .style('font-size', '11px')
@@ -1509,6 +1950,9 @@
   /**
    * Renderiza gráficos con D3.js
    */
+  // Tipos con backend Canvas 2D (spec.renderer === 'canvas')
+  const CANVAS_CHART_TYPES = ['scatter', 'line_plot', 'rug', 'parallel_coordinates'];
+  
   function renderChartD3(container, spec, d3, divId) {
     // 🔍 DEBUG: Log de TODOS los specs que llegan
     console.log('🔍 [DEBUG] renderChartD3 - Tipo:', spec?.type, 'Spec:', spec);
@@ -1525,6 +1969,8 @@
     }
     
     const chartType = spec.type;
+    // Cada render define (o no) su actualización en el lugar (ver bindValuePatcher)
+    container._patchValues = null;
     
     // Log para gráficos problemáticos
     if (['hist2d', 'polar', 'ridgeline', 'ribbon', 'funnel'].includes(chartType)) {
@@ -1544,6 +1990,12 @@
       });
     }
     
+    // Backend Canvas para vistas densas (ver charts/spec_utils.resolve_renderer)
+    if (spec.renderer === 'canvas' && CANVAS_CHART_TYPES.includes(chartType)) {
+      renderCanvasD3(container, spec, d3, divId);
+      return;
+    }
+    
     if (chartType === 'bar') {
       renderBarChartD3(container, spec, d3, divId);
     } else if (chartType === 'scatter') {
@@ -1612,6 +2064,153 @@
     }
   }
   
+  /**
+   * Re-renderiza un heatmap en su celda con un spec nuevo (tiles de la pirámide)
+   */
+  function rerenderHeatmapSpec(container, spec, divId) {
+    if (!container || !global.d3) return;
+    container.querySelectorAll('svg, .bestlib-pyramid-notice').forEach(el => el.remove());
+    container._chartSpec = spec;
+    renderHeatmapD3(container, spec, global.d3, divId);
+  }
+  
+  // Aviso sobre el heatmap cuando el kernel no puede servir un tile
+  function showPyramidNotice(container, message) {
+    let notice = container.querySelector('.bestlib-pyramid-notice');
+    if (!notice) {
+      notice = document.createElement('div');
+      notice.className = 'bestlib-pyramid-notice';
+      notice.style.cssText = 'font-size: 12px; color: #9aa0a6; padding: 4px 0;';
+      container.appendChild(notice);
+    }
+    notice.textContent = message;
+  }
+  
+  // Tile de pirámide enviado desde Python (respuesta a 'heatmap_tile')
+  onKernelMessage('heatmap_tile', (divId, tile) => {
+    const letter = tile.__view_letter__;
+    if (!letter) return;
+    const cell = document.querySelector(`[id^="${divId}-cell-${letter}-"]`);
+    if (!cell) return;
+    const rootSpec = cell._pyramidRootSpec || cell._chartSpec;
+    if (!rootSpec || !rootSpec.pyramid || rootSpec.pyramid.id !== tile.pyramid_id) return;
+    if (tile.error) {
+      showPyramidNotice(cell, tile.error);
+      return;
+    }
+    rerenderHeatmapSpec(cell, Object.assign({}, rootSpec, {
+      data: tile.cells,
+      cells: tile.cells,
+      xLabels: tile.x_labels,
+      yLabels: tile.y_labels,
+      _pyramidLevel: tile.level
+    }), divId);
+  });
+  
+  // Filas hidratadas de un dataset compartido del layout (o null)
+  function datasetRows(divId, name) {
+    const root = document.getElementById(divId);
+    const tables = root && root.__mapping__ && root.__mapping__.__datasetRows__;
+    return name && tables ? tables[name] || null : null;
+  }
+  
+  // Espera máxima (ms) por el spec de una celda diferida antes de avisar
+  const CELL_SPEC_TIMEOUT = 8000;
+  
+  // Spec completo de una celda diferida (respuesta a 'cell_spec')
+  onKernelMessage('cell_spec', (divId, payload) => {
+    const spec = payload.spec;
+    if (!payload.letter || !spec) return;
+    const cell = document.querySelector(`[id^="${divId}-cell-${payload.letter}-"]`);
+    if (!cell || typeof cell._mountChart !== 'function') return;
+    clearTimeout(cell._specTimeout);
+    cell.textContent = '';
+    cell.style.color = '';
+    const rows = datasetRows(divId, spec.__dataset__);
+    if (rows) {
+      hydrateItems(spec.data, rows);
+      if (spec.series && typeof spec.series === 'object' && !Array.isArray(spec.series)) {
+        Object.values(spec.series).forEach(series => hydrateItems(series, rows));
+      }
+    }
+    const mount = cell._mountChart;
+    cell._mountChart = null;
+    mount(spec);
+  });
+  
+  // Clave estable de un registro (igual a reactive/patches.py:patch_key)
+  function patchKey(value) {
+    if (value === null || value === undefined) return 'null';
+    return String(value);
+  }
+  
+  /**
+   * Aplica una actualización de vista enlazada ('view_patch') sobre un spec
+   * y retorna el spec nuevo.
+   */
+  function applyViewUpdate(spec, update) {
+    const patch = update.patch;
+    const key = patch.key;
+    const current = Array.isArray(spec.data) ? spec.data : [];
+    
+    const byKey = new Map();
+    current.forEach(item => byKey.set(patchKey(item[key]), item));
+    (patch.remove || []).forEach(k => byKey.delete(k));
+    (patch.upsert || []).forEach(item => {
+      // Cada alta trae sus filas (ya hidratadas): reemplazan las anteriores
+      const k = patchKey(item[key]);
+      byKey.set(k, Object.assign({}, byKey.get(k), item));
+    });
+    const order = patch.order || current.map(item => patchKey(item[key]));
+    return Object.assign({}, spec, { data: order.map(k => byKey.get(k)).filter(Boolean) });
+  }
+  
+  /**
+   * Aplica una actualización a la celda de una vista. Si la celda todavía no
+   * se montó (render perezoso) la encola: mountCell la aplica al montarla,
+   * así el navegador sigue el mismo estado que el kernel asume enviado.
+   */
+  function updateViewCell(divId, letter, update) {
+    if (!letter) return;
+    const cell = document.querySelector(`[id^="${divId}-cell-${letter}-"]`);
+    if (!cell) return;
+    if (!cell._chartSpec || !global.d3) {
+      (cell._pendingUpdates = cell._pendingUpdates || []).push(update);
+      return;
+    }
+    const spec = applyViewUpdate(cell._chartSpec, update);
+    cell._chartSpec = spec;
+    if (update.kind === 'patch' && isValuePatch(update.patch) && typeof cell._patchValues === 'function') {
+      cell._patchValues(spec.data);
+      return;
+    }
+    cell.querySelectorAll('svg').forEach(el => el.remove());
+    renderChartD3(cell, spec, global.d3, divId);
+  }
+  
+  // Un parche sin altas, bajas ni cambio de orden solo cambia valores
+  function isValuePatch(patch) {
+    return !patch.order && !(patch.remove || []).length;
+  }
+  
+  // Parche de una vista enlazada: solo los registros que cambiaron
+  onKernelMessage('view_patch', (divId, patch) => {
+    // Las filas de las altas llegan concatenadas en un buffer Int32 (row_counts por alta)
+    const packed = patch.__columns__ && patch.__columns__._rows;
+    if (packed) {
+      let offset = 0;
+      (patch.upsert || []).forEach((item, i) => {
+        const count = patch.row_counts[i];
+        if (count === null || count === undefined) return;
+        item._rows = Array.from(packed.subarray(offset, offset + count));
+        offset += count;
+      });
+    }
+    const rows = datasetRows(divId, patch.dataset);
+    if (rows) hydrateItems(patch.upsert, rows);
+    updateViewCell(divId, patch.letter, { kind: 'patch', patch: patch });
+  });
+  
   /**
    * Heatmap con D3.js
    */
@@ -1692,8 +2291,10 @@
     const x = d3.scaleBand().domain(xLabels).range([0, chartWidth]).padding(0.05);
     const y = d3.scaleBand().domain(yLabels).range([0, chartHeight]).padding(0.05);
 
-    const vmin = d3.min(data, d => d.value) ?? 0;
-    const vmax = d3.max(data, d => d.value) ?? 1;
+    // Con pirámide, usar el rango global para que los colores sean comparables entre niveles
+    const pyramid = spec.pyramid || null;
+    const vmin = (pyramid && pyramid.vmin != null) ? pyramid.vmin : (d3.min(data, d => d.value) ?? 0);
+    const vmax = (pyramid && pyramid.vmax != null) ? pyramid.vmax : (d3.max(data, d => d.value) ?? 1);
     
     // Para correlation heatmap, usar escala divergente centrada en 0
     // INVERTIDA: Rojo para correlación positiva, Azul para correlación negativa
@@ -1829,6 +2430,33 @@
         });
     }
     
+    // Heatmap multi-resolución: click en una celda agregada pide el tile más fino,
+    // doble click vuelve al nivel más grueso
+    if (pyramid) {
+      if (!container._pyramidRootSpec) {
+        container._pyramidRootSpec = spec;
+      }
+      const currentLevel = spec._pyramidLevel != null ? spec._pyramidLevel : pyramid.coarsest;
+      const viewLetter = spec.__view_letter__ || container.getAttribute('data-letter');
+      g.selectAll('rect')
+        .style('cursor', currentLevel > 0 ? 'zoom-in' : 'default')
+        .on('click.pyramid', function(event, d) {
+          if (!d || currentLevel <= 0 || d._row == null || d._col == null) return;
+          const tileSize = pyramid.tile_size;
+          sendEvent(divId, 'heatmap_tile', {
+            pyramid_id: pyramid.id,
+            level: currentLevel - 1,
+            tx: Math.floor((d._col * 2) / tileSize),
+            ty: Math.floor((d._row * 2) / tileSize),
+            __view_letter__: viewLetter
+          });
+        });
+      svg.on('dblclick.pyramid', function() {
+        if (currentLevel === pyramid.coarsest) return;
+        rerenderHeatmapSpec(container, container._pyramidRootSpec, divId);
+      });
+    }
+    
     // Renderizar colorbar para correlation heatmap
     if (isCorrelation) {
       // Calcular absMax una sola vez (ya se calculó antes)
@@ -5467,6 +6095,7 @@
       .attr('height', d => chartHeight - y(d.count));
 
     // 🔒 CORRECCIÓN: Ejes - Asegurar que se muestren correctamente con valores visibles
+    let histogramYAxis = null;
     if (spec.axes !== false) {
       // Detectar si necesitamos rotar etiquetas del eje X
       const numBins = data.length;
@@ -5519,10 +6148,12 @@
       yAxis.call(yAxisGenerator);
       
       applyUnifiedAxisStyles(yAxis);
+      histogramYAxis = yAxis;
       
       // Renderizar etiquetas de ejes usando función helper
       renderAxisLabels(g, spec, chartWidth, chartHeight, margin, svg);
     }
+    bindValuePatcher(container, d3, g, y, histogramYAxis, chartHeight, 'count', 'bin', d3.format('d'));
     
     // CRÍTICO: Renderizar título del gráfico si está especificado
     if (spec.title) {
@@ -5830,6 +6461,7 @@
   }
     
     // Ejes con D3 - Texto NEGRO y visible (renderizar por defecto a menos que axes === false)
+    let barYAxis = null;
     if (spec.axes !== false) {
       const xAxis = g.append('g')
         .attr('transform', `translate(0,${chartHeight})`)
@@ -5847,6 +6479,7 @@
       
       const yAxis = g.append('g')
         .call(d3.axisLeft(y).ticks(5));
+      barYAxis = yAxis;
       
       yAxis.selectAll('text')
         .style('font-size', '12px')
@@ -5861,6 +6494,9 @@
       // Renderizar etiquetas de ejes usando función helper
       renderAxisLabels(g, spec, chartWidth, chartHeight, margin, svg);
     }
+    if (!spec.grouped) {
+      bindValuePatcher(container, d3, g, y, barYAxis, chartHeight, 'value', 'category');
+    }
   }
   
   /**
@@ -6045,7 +6681,9 @@
     // Función para enviar evento de selección
     // OPTIMIZACIÓN: Limitar tamaño del payload para datasets grandes
     const sendSelectionEvent = (indices) => {
-      const MAX_PAYLOAD_ITEMS = 1000; // Límite de items a enviar
+      // Con dataset compartido la selección viaja como posiciones: sin límite
+      const compact = data.length > 0 && data[0] && rowPositions.has(data[0]._original_row);
+      const MAX_PAYLOAD_ITEMS = compact ? Infinity : 1000; // Límite de items a enviar
       
       // OPTIMIZACIÓN: Si hay muchos índices, solo procesar los primeros N
       const indicesArray = Array.from(indices);
@@ -6229,8 +6867,82 @@
         }
       });
     
+    // LASSO: selección por polígono (spec.selectionMode === 'lasso')
+    if (spec.interactive && spec.selectionMode === 'lasso') {
+      const lassoGroup = g.append('g')
+        .attr('class', 'lasso-layer');
+      const lassoOverlay = lassoGroup.append('rect')
+        .attr('width', chartWidth)
+        .attr('height', chartHeight)
+        .attr('fill', 'transparent')
+        .style('cursor', 'crosshair');
+      const lassoPath = lassoGroup.append('path')
+        .attr('fill', '#3b82f6')
+        .attr('fill-opacity', 0.2)
+        .attr('stroke', '#2563eb')
+        .attr('stroke-width', 2)
+        .attr('stroke-dasharray', '6,3')
+        .style('pointer-events', 'none');
+      let lassoVertices = [];
+      
+      lassoOverlay.call(d3.drag()
+        .on('start', function(event) {
+          isBrushing = true;
+          g.selectAll('.dot').style('pointer-events', 'none');
+          lassoVertices = [[event.x, event.y]];
+          lassoPath.attr('d', null);
+        })
+        .on('drag', function(event) {
+          const last = lassoVertices[lassoVertices.length - 1];
+          // Omitir vértices a menos de 2px del anterior (polígonos más livianos)
+          if (Math.hypot(event.x - last[0], event.y - last[1]) < 2) return;
+          lassoVertices.push([event.x, event.y]);
+          lassoPath.attr('d', 'M' + lassoVertices.join('L') + 'Z');
+        })
+        .on('end', function(event) {
+          isBrushing = false;
+          g.selectAll('.dot').style('pointer-events', 'all');
+          if (lassoVertices.length < 3) {
+            lassoPath.attr('d', null);
+            return;
+          }
+          
+          // Vértices en unidades de datos
+          const polygon = lassoVertices.map(p => [x.invert(p[0]), y.invert(p[1])]);
+          const lassoed = new Set();
+          for (let i = 0; i < data.length; i++) {
+            if (pointInPolygon(data[i].x, data[i].y, polygon)) lassoed.add(i);
+          }
+          
+          const ctrlKey = event.sourceEvent && (event.sourceEvent.ctrlKey || event.sourceEvent.metaKey);
+          if (ctrlKey) {
+            lassoed.forEach(i => selectedIndices.add(i));
+          } else {
+            selectedIndices = lassoed;
+          }
+          updatePointVisualization(g.selectAll('.dot'), selectedIndices, false);
+          
+          // Sin Ctrl/Cmd la selección es exactamente el polígono: enviar solo sus vértices
+          const lassoPayload = ctrlKey ? null : createLassoPayload(divId, spec, container, 'scatter', polygon);
+          if (lassoPayload) {
+            lassoPayload.__scatter_letter__ = lassoPayload.__view_letter__;
+            sendEvent(divId, 'select', lassoPayload);
+            return;
+          }
+          sendSelectionEvent(selectedIndices);
+        }));
+      
+      // Doble click para limpiar la selección
+      lassoOverlay.on('dblclick', function() {
+        selectedIndices.clear();
+        lassoPath.attr('d', null);
+        updatePointVisualization(g.selectAll('.dot'), selectedIndices, false);
+        sendSelectionEvent(selectedIndices);
+      });
+    }
+    
     // BRUSH para selección de área (renderizar DESPUÉS de los puntos para estar visualmente encima)
-    if (spec.interactive) {
+    if (spec.interactive && spec.selectionMode !== 'lasso') {
       // Crear grupo de brush que estará en la parte superior
       const brushGroup = g.append('g')
         .attr('class', 'brush-layer');
@@ -6367,6 +7079,17 @@
           // Los puntos seleccionados se mostrarán con borde naranja
           updatePointVisualization(g.selectAll('.dot'), selectedIndices, false);
           
+          // Sin Ctrl/Cmd la selección es exactamente el rectángulo: enviar solo su geometría
+          const brushPayload = ctrlKey ? null : createBrushPayload(divId, spec, container, 'scatter', {
+            x: [xInverted0, xInverted1],
+            y: [yInverted0, yInverted1]
+          });
+          if (brushPayload) {
+            brushPayload.__scatter_letter__ = brushPayload.__view_letter__;
+            sendEvent(divId, 'select', brushPayload);
+            return;
+          }
+          
           // Enviar evento de selección
           sendSelectionEvent(selectedIndices);
           
@@ -6562,6 +7285,47 @@
   // Cache global para la promesa de D3
   let _d3Promise = null;
   
+  // Promesas que esperan la copia de D3 embebida en el paquete (ver 'd3_bundle')
+  let bundledD3Waiters = [];
+  
+  // Copia local de D3 enviada por el kernel (respuesta a 'd3_request')
+  onKernelMessage('d3_bundle', (divId, payload) => {
+    if (!global.d3 && payload.js) {
+      (0, eval)(payload.js);
+    }
+    const waiters = bundledD3Waiters;
+    bundledD3Waiters = [];
+    waiters.forEach(waiter => waiter(global.d3));
+  });
+  
+  /**
+   * Pide al kernel la copia de D3 que trae BESTLIB cuando el navegador no
+   * alcanza ningún CDN (el kernel puede tener red y el navegador no)
+   * @param {number} timeout - Espera máxima en milisegundos
+   * @returns {Promise} Promise que se resuelve con d3
+   */
+  function requestBundledD3(timeout) {
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        bundledD3Waiters = bundledD3Waiters.filter(waiter => waiter !== settle);
+        reject(new Error('No se pudo cargar D3.js desde ningún CDN ni desde el kernel. Por favor, recarga la página o verifica tu conexión a internet.'));
+      }, timeout);
+      function settle(d3) {
+        clearTimeout(timer);
+        if (d3) {
+          resolve(d3);
+        } else {
+          reject(new Error('El kernel no tiene una copia local de D3.js (BESTLIB/d3.min.js).'));
+        }
+      }
+      bundledD3Waiters.push(settle);
+      if (bundledD3Waiters.length === 1) {
+        console.warn('[BESTLIB] Ningún CDN de D3 respondió; pidiendo la copia local al kernel');
+        sendEvent('__bestlib_assets__', 'd3_request', {});
+      }
+    });
+  }
+  
   /**
    * Asegura que D3.js esté cargado y listo para usar
    * @param {number} timeout - Timeout en milisegundos (por defecto 10000)
@@ -6578,6 +7342,13 @@
       return _d3Promise;
     }
     
+    // Los CDN ya fallaron en esta página: ir directo a la copia del kernel
+    if (global.__bestlib_d3_cdn_failed__) {
+      _d3Promise = requestBundledD3(timeout);
+      _d3Promise.catch(() => { _d3Promise = null; });
+      return _d3Promise;
+    }
+    
     // Crear nueva promesa para cargar D3
     _d3Promise = new Promise((resolve, reject) => {
       // Buscar script existente por ID único o por src
@@ -6594,13 +7365,19 @@
         const checkD3 = setInterval(() => {
           if (global.d3) {
             clearInterval(checkD3);
+            clearTimeout(waitTimer);
             _d3Promise = null; // Reset cache para permitir re-chequeo si falla
             resolve(global.d3);
+          } else if (global.__bestlib_d3_cdn_failed__) {
+            // El loader del HTML agotó los CDN: usar la copia del kernel
+            clearInterval(checkD3);
+            clearTimeout(waitTimer);
+            requestBundledD3(timeout).then(resolve, reject);
           }
         }, 100);
         
         // Timeout para evitar esperar indefinidamente
-        setTimeout(() => {
+        const waitTimer = setTimeout(() => {
           clearInterval(checkD3);
           if (global.d3) {
             _d3Promise = null;
@@ -6632,8 +7409,11 @@
             resolve(global.d3);
             return;
           }
-          console.error('❌ [BESTLIB] No se pudo cargar D3.js desde ningún CDN disponible');
-          reject(new Error('No se pudo cargar D3.js desde ningún CDN disponible. Por favor, recarga la página o verifica tu conexión a internet.'));
+          global.__bestlib_d3_cdn_failed__ = true;
+          requestBundledD3(timeout).then(resolve, err => {
+            console.error('❌ [BESTLIB] No se pudo cargar D3.js desde ningún CDN disponible');
+            reject(err);
+          });
           return;
         }
 
@@ -6685,6 +7465,447 @@
   // por renderChartD3, renderBarChartD3, renderScatterPlotD3 que son las versiones activas
   // ==========================================
 
+  /**
+   * Backend Canvas 2D para vistas densas (spec.renderer === 'canvas').
+   * 
+   * Dibuja scatter, line_plot, rug y parallel_coordinates en un <canvas>
+   * (sin un nodo DOM por marca); ejes y brush quedan en un SVG superpuesto.
+   * Hit testing (tooltip, click) y consultas del brush usan un d3.quadtree
+   * sobre las posiciones en píxeles de las marcas.
+   */
+  function renderCanvasD3(container, spec, d3, divId) {
+    const chartType = spec.type;
+    const styles = getUnifiedStyles();
+    const options = spec.options || {};
+    const opt = (key, fallback) => options[key] !== undefined ? options[key] : (spec[key] !== undefined ? spec[key] : fallback);
+    const isParallel = chartType === 'parallel_coordinates';
+    
+    const dims = getChartDimensions(container, spec, isParallel ? 600 : 400, isParallel ? 400 : 350);
+    const width = dims.width;
+    const height = dims.height;
+    const defaultMargin = isParallel
+      ? { top: 30, right: 20, bottom: 30, left: 20 }
+      : { top: 25, right: 25, bottom: 45, left: 55 };
+    const margin = calculateAxisMargins(spec, defaultMargin, width, height);
+    const chartWidth = Math.max(width - margin.left - margin.right, 50);
+    const chartHeight = Math.max(height - margin.top - margin.bottom, 50);
+    const finite = v => v != null && v !== '' && isFinite(v);
+    
+    // Filas seleccionables (rows) y vértices [px, py, fila] para el quadtree
+    const rows = [];
+    const vertices = [];
+    const colorOf = [];
+    let xScale = null;
+    let yScale = null;
+    let paintRow = null;      // Agrega la geometría de una fila al path actual
+    let fillMarks = false;    // true: fill (puntos); false: stroke (líneas/ticks)
+    let brushAxes = 'xy';
+    let describe = null;      // HTML del tooltip de una fila
+    let drawBase = null;      // Capa fija bajo las filas (líneas de line_plot)
+    const lineWidth = opt('strokeWidth', isParallel ? 1 : 1.5);
+    const baseAlpha = opt('opacity', isParallel ? 0.35 : 0.6);
+    
+    if (chartType === 'scatter') {
+      const data = (spec.data || []).filter(d => d && finite(d.x) && finite(d.y));
+      xScale = d3.scaleLinear().domain(d3.extent(data, d => +d.x) || [0, 100]).nice().range([0, chartWidth]);
+      yScale = d3.scaleLinear().domain(d3.extent(data, d => +d.y) || [0, 100]).nice().range([chartHeight, 0]);
+      const hasSize = data.length > 0 && data[0].size != null;
+      const sizeScale = hasSize
+        ? d3.scaleLinear().domain(d3.extent(data, d => +d.size)).range(opt('sizeRange', [2, 7]))
+        : null;
+      const baseRadius = opt('pointRadius', 2);
+      const colorMap = opt('colorMap', null);
+      data.forEach((d, i) => {
+        const px = xScale(+d.x);
+        const py = yScale(+d.y);
+        rows.push({ item: d, px: px, py: py, r: sizeScale ? sizeScale(+d.size) : baseRadius });
+        vertices.push([px, py, i]);
+        colorOf.push(d.color || (colorMap && d.category != null && colorMap[d.category]) || opt('color', styles.primaryColor));
+      });
+      fillMarks = true;
+      paintRow = (ctx, i, grow) => {
+        const row = rows[i];
+        const r = row.r * grow;
+        ctx.moveTo(row.px + r, row.py);
+        ctx.arc(row.px, row.py, r, 0, 2 * Math.PI);
+      };
+      const xLabel = opt('xLabel', 'X');
+      const yLabel = opt('yLabel', 'Y');
+      describe = i => {
+        const d = rows[i].item;
+        const parts = [`<strong>${xLabel}:</strong> ${formatTooltipNumber(d.x)}`,
+                       `<strong>${yLabel}:</strong> ${formatTooltipNumber(d.y)}`];
+        if (d.label) parts.unshift(`<strong>${d.label}</strong>`);
+        if (d.category != null) parts.push(`<strong>Categoría:</strong> ${d.category}`);
+        return parts.join('<br/>');
+      };
+    } else if (chartType === 'line_plot') {
+      const series = spec.series || {};
+      const names = Object.keys(series);
+      const colorMap = opt('colorMap', null);
+      const colorScale = d3.scaleOrdinal().domain(names)
+        .range(colorMap ? Object.values(colorMap) : d3.schemeCategory10);
+      const sorted = {};
+      names.forEach(name => {
+        sorted[name] = (series[name] || []).filter(p => p && finite(p.x) && finite(p.y))
+          .slice().sort((a, b) => a.x - b.x);
+      });
+      const all = [].concat(...names.map(name => sorted[name]));
+      xScale = d3.scaleLinear().domain(d3.extent(all, p => +p.x) || [0, 100]).nice().range([0, chartWidth]);
+      yScale = d3.scaleLinear().domain(d3.extent(all, p => +p.y) || [0, 100]).nice().range([chartHeight, 0]);
+      names.forEach(name => {
+        sorted[name].forEach(p => {
+          const px = xScale(+p.x);
+          const py = yScale(+p.y);
+          vertices.push([px, py, rows.length]);
+          rows.push({ item: p, series: name, px: px, py: py });
+          colorOf.push(colorScale(name));
+        });
+      });
+      // Las líneas son fijas; las filas (puntos) solo se dibujan si hay marcadores o selección
+      const markers = opt('markers', false);
+      drawBase = (ctx, dimmed) => {
+        ctx.lineWidth = opt('strokeWidth', 2);
+        ctx.globalAlpha = dimmed ? 0.35 : 1;
+        names.forEach(name => {
+          const points = sorted[name];
+          if (points.length === 0) return;
+          ctx.beginPath();
+          ctx.strokeStyle = colorScale(name);
+          points.forEach((p, j) => {
+            const px = xScale(+p.x);
+            const py = yScale(+p.y);
+            if (j === 0) ctx.moveTo(px, py); else ctx.lineTo(px, py);
+          });
+          ctx.stroke();
+        });
+      };
+      fillMarks = true;
+      paintRow = (ctx, i, grow) => {
+        const row = rows[i];
+        const r = (markers ? 3 : 2.5) * grow;
+        ctx.moveTo(row.px + r, row.py);
+        ctx.arc(row.px, row.py, r, 0, 2 * Math.PI);
+      };
+      rows.hidden = !markers;
+      const xLabel = opt('xLabel', 'X');
+      const yLabel = opt('yLabel', 'Y');
+      describe = i => {
+        const row = rows[i];
+        return [`<strong>${row.series}</strong>`,
+                `<strong>${xLabel}:</strong> ${formatTooltipNumber(row.item.x)}`,
+                `<strong>${yLabel}:</strong> ${formatTooltipNumber(row.item.y)}`].join('<br/>');
+      };
+    } else if (chartType === 'rug') {
+      const axis = opt('axis', 'x');
+      const values = (spec.data || []).map(d => {
+        if (typeof d === 'number') return { x: d };
+        if (d && d.x !== undefined) return d;
+        if (d && d.value !== undefined) return Object.assign({}, d, { x: d.value });
+        return null;
+      }).filter(d => d && finite(d.x));
+      const extent = d3.extent(values, d => +d.x);
+      const tickLength = Math.min(opt('height', 3) * opt('size', 2), 8);
+      const color = opt('color', '#4a90e2');
+      if (axis === 'x') {
+        xScale = d3.scaleLinear().domain(extent[0] == null ? [0, 100] : extent).nice().range([0, chartWidth]);
+      } else {
+        yScale = d3.scaleLinear().domain(extent[0] == null ? [0, 100] : extent).nice().range([chartHeight, 0]);
+      }
+      values.forEach((d, i) => {
+        const px = axis === 'x' ? xScale(+d.x) : tickLength / 2;
+        const py = axis === 'x' ? chartHeight - tickLength / 2 : yScale(+d.x);
+        rows.push({ item: d, px: px, py: py });
+        vertices.push([px, py, i]);
+        colorOf.push(color);
+      });
+      brushAxes = axis === 'x' ? 'x' : 'y';
+      paintRow = (ctx, i) => {
+        const row = rows[i];
+        if (axis === 'x') {
+          ctx.moveTo(row.px, chartHeight);
+          ctx.lineTo(row.px, chartHeight - tickLength);
+        } else {
+          ctx.moveTo(0, row.py);
+          ctx.lineTo(tickLength, row.py);
+        }
+      };
+      describe = i => `<strong>${opt('xLabel', 'Valor')}:</strong> ${formatTooltipNumber(rows[i].item.x)}`;
+    } else if (isParallel) {
+      const dimensions = spec.dimensions || [];
+      const data = (spec.data || []).filter(d => d && dimensions.some(dim => finite(d[dim])));
+      const scales = {};
+      const step = dimensions.length > 1 ? chartWidth / (dimensions.length - 1) : 0;
+      dimensions.forEach(dim => {
+        const extent = d3.extent(data, d => finite(d[dim]) ? +d[dim] : undefined);
+        const domain = extent[0] == null ? [0, 1] : (extent[0] === extent[1] ? [extent[0] - 1, extent[1] + 1] : extent);
+        scales[dim] = d3.scaleLinear().domain(domain).nice().range([chartHeight, 0]);
+      });
+      const categoryCol = spec.category_col;
+      const categories = categoryCol ? Array.from(new Set(data.map(d => d[categoryCol]))) : [];
+      const colorScale = d3.scaleOrdinal().domain(categories).range(d3.schemeCategory10);
+      data.forEach((d, i) => {
+        const points = [];
+        dimensions.forEach((dim, j) => {
+          if (!finite(d[dim])) return;
+          const point = [j * step, scales[dim](+d[dim])];
+          points.push(point);
+          vertices.push([point[0], point[1], i]);
+        });
+        rows.push({ item: d, points: points });
+        colorOf.push(categoryCol ? colorScale(d[categoryCol]) : opt('color', styles.primaryColor));
+      });
+      paintRow = (ctx, i) => {
+        const points = rows[i].points;
+        for (let j = 0; j < points.length; j++) {
+          if (j === 0) ctx.moveTo(points[j][0], points[j][1]); else ctx.lineTo(points[j][0], points[j][1]);
+        }
+      };
+      rows.axes = { dimensions: dimensions, scales: scales, step: step };
+      describe = i => {
+        const d = rows[i].item;
+        const parts = dimensions.map(dim => `<strong>${dim}:</strong> ${formatTooltipNumber(d[dim])}`);
+        if (categoryCol) parts.unshift(`<strong>${d[categoryCol]}</strong>`);
+        return parts.join('<br/>');
+      };
+    }
+    
+    // Marco: canvas (marcas) bajo un SVG (ejes, brush, eventos)
+    const frame = d3.select(container).append('div')
+      .attr('class', 'bestlib-canvas-frame')
+      .style('position', 'relative')
+      .style('width', `${width}px`)
+      .style('height', `${height}px`);
+    const dpr = window.devicePixelRatio || 1;
+    const canvas = frame.append('canvas')
+      .attr('width', Math.round(chartWidth * dpr))
+      .attr('height', Math.round(chartHeight * dpr))
+      .style('position', 'absolute')
+      .style('left', `${margin.left}px`)
+      .style('top', `${margin.top}px`)
+      .style('width', `${chartWidth}px`)
+      .style('height', `${chartHeight}px`);
+    const ctx = canvas.node().getContext('2d');
+    const svg = frame.append('svg')
+      .attr('width', width)
+      .attr('height', height)
+      .style('position', 'absolute')
+      .style('left', 0)
+      .style('top', 0)
+      .style('overflow', 'visible');
+    const g = svg.append('g')
+      .attr('transform', `translate(${margin.left},${margin.top})`);
+    
+    // Filas agrupadas por color: un path (y un fill/stroke) por color
+    const groups = new Map();
+    colorOf.forEach((color, i) => {
+      if (!groups.has(color)) groups.set(color, []);
+      groups.get(color).push(i);
+    });
+    
+    let selected = new Set();
+    let preview = null;   // Filas dentro del brush en curso
+    
+    const draw = () => {
+      const highlight = preview || selected;
+      const dimmed = highlight.size > 0;
+      ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+      ctx.clearRect(0, 0, chartWidth, chartHeight);
+      if (drawBase) drawBase(ctx, dimmed);
+      ctx.lineWidth = lineWidth;
+      if (!rows.hidden) {
+        ctx.globalAlpha = dimmed ? Math.min(baseAlpha, 0.15) : baseAlpha;
+        groups.forEach((indices, color) => {
+          ctx.beginPath();
+          for (let k = 0; k < indices.length; k++) {
+            if (!highlight.has(indices[k])) paintRow(ctx, indices[k], 1);
+          }
+          if (fillMarks) { ctx.fillStyle = color; ctx.fill(); } else { ctx.strokeStyle = color; ctx.stroke(); }
+        });
+      }
+      if (!dimmed) return;
+      // Seleccionadas encima, opacas y con borde de selección
+      ctx.globalAlpha = styles.opacitySelected;
+      groups.forEach((indices, color) => {
+        ctx.beginPath();
+        for (let k = 0; k < indices.length; k++) {
+          if (highlight.has(indices[k])) paintRow(ctx, indices[k], 1.4);
+        }
+        if (fillMarks) {
+          ctx.fillStyle = color;
+          ctx.fill();
+          ctx.strokeStyle = preview ? '#4a90e2' : styles.selectionColor;
+          ctx.lineWidth = 1;
+          ctx.stroke();
+        } else {
+          ctx.strokeStyle = color;
+          ctx.lineWidth = lineWidth * 2;
+          ctx.stroke();
+          ctx.lineWidth = lineWidth;
+        }
+      });
+      ctx.globalAlpha = 1;
+    };
+    
+    let drawPending = false;
+    const scheduleDraw = () => {
+      if (drawPending) return;
+      drawPending = true;
+      requestAnimationFrame(() => {
+        drawPending = false;
+        draw();
+      });
+    };
+    
+    // Ejes
+    if (isParallel && rows.axes) {
+      rows.axes.dimensions.forEach((dim, j) => {
+        const axisG = g.append('g').attr('transform', `translate(${j * rows.axes.step},0)`);
+        applyUnifiedAxisStyles(axisG.call(d3.axisLeft(rows.axes.scales[dim]).ticks(5)));
+        axisG.append('text')
+          .attr('y', -10)
+          .attr('text-anchor', 'middle')
+          .style('font-size', '12px')
+          .style('font-weight', 'bold')
+          .style('fill', '#333')
+          .text(dim);
+      });
+    } else if (opt('axes', true) !== false) {
+      if (xScale) renderXAxis(g, xScale, chartHeight, chartWidth, margin, opt('xLabel', null), svg);
+      if (yScale) renderYAxis(g, yScale, chartWidth, chartHeight, margin, opt('yLabel', null), svg);
+    }
+    
+    // Índice espacial de las marcas
+    const tree = d3.quadtree().x(v => v[0]).y(v => v[1]).addAll(vertices);
+    const rowsInRect = (x0, y0, x1, y1) => {
+      const found = new Set();
+      tree.visit((node, nx0, ny0, nx1, ny1) => {
+        if (!node.length) {
+          do {
+            const v = node.data;
+            if (v[0] >= x0 && v[0] <= x1 && v[1] >= y0 && v[1] <= y1) found.add(v[2]);
+          } while ((node = node.next));
+        }
+        return nx0 > x1 || ny0 > y1 || nx1 < x0 || ny1 < y0;
+      });
+      return found;
+    };
+    const HIT_RADIUS = 6;
+    const rowAt = (px, py) => {
+      const v = tree.find(px, py, HIT_RADIUS);
+      return v ? v[2] : null;
+    };
+    
+    const sendSelection = () => {
+      const items = [];
+      selected.forEach(i => {
+        const item = rows[i].item;
+        if (item && (item._original_row || item._original_rows)) {
+          items.push(...extractOriginalRows(item, `${chartType} ${i}`));
+        } else {
+          items.push(item);
+        }
+      });
+      const payload = createSelectPayload(divId, items, spec, container, chartType, {
+        indices: Array.from(selected)
+      });
+      if (chartType === 'scatter') payload.__scatter_letter__ = payload.__view_letter__;
+      sendEvent(divId, 'select', payload);
+    };
+    
+    // Capa de eventos: brush (si es interactivo) o un rect transparente
+    let events;
+    if (spec.interactive) {
+      const extent = [[0, 0], [chartWidth, chartHeight]];
+      const brush = brushAxes === 'x' ? d3.brushX() : (brushAxes === 'y' ? d3.brushY() : d3.brush());
+      const toRect = sel => brushAxes === 'x'
+        ? [sel[0], 0, sel[1], chartHeight]
+        : (brushAxes === 'y' ? [0, sel[0], chartWidth, sel[1]] : [sel[0][0], sel[0][1], sel[1][0], sel[1][1]]);
+      brush.extent(extent)
+        .on('brush', function(event) {
+          if (!event.sourceEvent || !event.selection) return;
+          const rect = toRect(event.selection);
+          preview = rowsInRect(rect[0], rect[1], rect[2], rect[3]);
+          scheduleDraw();
+        })
+        .on('end', function(event) {
+          if (!event.sourceEvent) return;
+          preview = null;
+          const ctrlKey = event.sourceEvent.ctrlKey || event.sourceEvent.metaKey;
+          if (!event.selection) {
+            // Click sin arrastre: selección de la marca bajo el puntero
+            const [px, py] = d3.pointer(event.sourceEvent, g.node());
+            const hit = rowAt(px, py);
+            if (hit == null) {
+              draw();
+              return;
+            }
+            if (ctrlKey) {
+              if (selected.has(hit)) selected.delete(hit); else selected.add(hit);
+            } else {
+              selected = new Set([hit]);
+            }
+            draw();
+            sendSelection();
+            return;
+          }
+          const rect = toRect(event.selection);
+          const brushed = rowsInRect(rect[0], rect[1], rect[2], rect[3]);
+          if (ctrlKey) {
+            brushed.forEach(i => selected.add(i));
+          } else {
+            selected = brushed;
+          }
+          draw();
+          // Sin Ctrl/Cmd y con dataset compartido, solo la geometría del brush
+          if (!ctrlKey && xScale && yScale) {
+            const brushPayload = createBrushPayload(divId, spec, container, chartType, {
+              x: [xScale.invert(rect[0]), xScale.invert(rect[2])],
+              y: [yScale.invert(rect[3]), yScale.invert(rect[1])]
+            });
+            if (brushPayload) {
+              if (chartType === 'scatter') brushPayload.__scatter_letter__ = brushPayload.__view_letter__;
+              sendEvent(divId, 'select', brushPayload);
+              return;
+            }
+          }
+          sendSelection();
+        });
+      events = g.append('g').attr('class', 'brush-layer').call(brush);
+      events.selectAll('.overlay').style('cursor', 'crosshair');
+    } else {
+      events = g.append('rect')
+        .attr('width', chartWidth)
+        .attr('height', chartHeight)
+        .attr('fill', 'transparent');
+    }
+    
+    // Tooltip por hit testing en el quadtree
+    if (shouldShowTooltip(spec) && describe) {
+      const tooltip = createOrGetTooltip(d3, `canvas-tooltip-${divId}`, 'canvas-chart-tooltip', false);
+      events
+        .on('mousemove.tooltip', function(event) {
+          const [px, py] = d3.pointer(event, g.node());
+          const hit = rowAt(px, py);
+          if (hit == null) {
+            tooltip.style('display', 'none').style('opacity', 0);
+            return;
+          }
+          tooltip
+            .style('left', ((event.pageX || event.clientX || 0) + 10) + 'px')
+            .style('top', ((event.pageY || event.clientY || 0) - 10) + 'px')
+            .style('display', 'block')
+            .style('opacity', 1)
+            .html(describe(hit));
+        })
+        .on('mouseleave.tooltip', function() {
+          tooltip.style('display', 'none').style('opacity', 0);
+        });
+    }
+    
+    draw();
+  }
+  
   /**
    * Line Plot completo con D3.js
    * Versión mejorada del line chart con más opciones
@@ -7157,16 +8378,22 @@
       .attr('transform', `translate(${margin.left},${margin.top})`);
     
     // Escalas
+    // Modo agregación con grupos categóricos: x son índices 0..n-1 con etiquetas
+    const xTickLabels = Array.isArray(spec.xTickLabels) ? spec.xTickLabels : null;
+    const xDomain = xTickLabels
+      ? [-0.5, xTickLabels.length - 0.5]
+      : (d3.extent(data, d => d.x) || [0, 100]);
     const x = d3.scaleLinear()
-      .domain(d3.extent(data, d => d.x) || [0, 100])
-      .nice()
+      .domain(xDomain)
       .range([0, chartWidth]);
+    if (!xTickLabels) {
+      x.nice();
+    }
     
-    const yExtent = d3.extent(data, d => {
-        const yVal = d.y || 0;
-        const yErr = d.yerr || 0;
-        return [yVal - yErr, yVal + yErr];
-      }).flat();
+    // Límites del error en Y: intervalos asimétricos (ylo/yhi) o simétricos (yerr)
+    const yLow = d => (d.ylo != null ? d.ylo : (d.y || 0) - (d.yerr || 0));
+    const yHigh = d => (d.yhi != null ? d.yhi : (d.y || 0) + (d.yerr || 0));
+    const yExtent = [d3.min(data, yLow), d3.max(data, yHigh)];
     const y = d3.scaleLinear()
       .domain(d3.extent(yExtent) || [0, 100])
       .nice()
@@ -7187,10 +8414,9 @@
       const yPos = y(d.y);
       
       // Error en Y
-      if (d.yerr) {
-        const yErr = y(d.yerr);
-        const yTop = y(d.y - d.yerr);
-        const yBottom = y(d.y + d.yerr);
+      if (d.yerr || d.ylo != null || d.yhi != null) {
+        const yTop = y(yLow(d));
+        const yBottom = y(yHigh(d));
         
         // Línea vertical
         g.append('line')
@@ -7263,6 +8489,9 @@
     // Ejes
     if (axes !== false) {
       const xAxis = d3.axisBottom(x);
+      if (xTickLabels) {
+        xAxis.tickValues(d3.range(xTickLabels.length)).tickFormat(i => xTickLabels[i]);
+      }
       const yAxis = d3.axisLeft(y);
       
       g.append('g')
@@ -8916,6 +10145,33 @@
       }
     }
     
+    // Modo agrupado (rosa de vientos): sectores x anillos precalculados en Python
+    if (spec.binned) {
+      const edges = spec.ring_edges || [0, maxRadius];
+      r.domain([0, edges[edges.length - 1] || 1]);
+      const vmax = d3.max(data, d => d.value) || 1;
+      const fill = d3.scaleSequential([0, vmax], d3.interpolateViridis);
+      const valueLabel = spec.agg === 'mean' ? 'Media' : 'Conteo';
+      // d3.arc mide desde las 12 en punto; los puntos polares desde las 3 (eje +x)
+      const arc = d3.arc()
+        .innerRadius(d => r(d.r_inner))
+        .outerRadius(d => r(d.r_outer))
+        .startAngle(d => d.angle_start + Math.PI / 2)
+        .endAngle(d => d.angle_end + Math.PI / 2);
+      g.selectAll('.bestlib-polar-bin')
+        .data(data)
+        .enter()
+        .append('path')
+        .attr('class', 'bestlib-polar-bin')
+        .attr('d', arc)
+        .attr('fill', d => fill(d.value))
+        .attr('stroke', '#fff')
+        .attr('stroke-width', 0.5)
+        .append('title')
+        .text(d => `${valueLabel}: ${formatTooltipNumber(d.value, 2)} (n=${d.count})`);
+      return;
+    }
+    
     // Puntos - recalcular coordenadas desde angle y radius
     g.selectAll('.point')
       .data(data)
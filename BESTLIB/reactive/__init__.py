@@ -1,8 +1,8 @@
 """
 Reactive module - Sistema reactivo para BESTLIB
 """
-from .selection import ReactiveData, SelectionModel
-from .engine import ReactiveEngine
+from .selection import ReactiveData, SelectionModel, RowSelection, SelectionRows
+from .engine import ReactiveEngine, DataflowGraph
 from .linking import LinkManager
 
 # Re-exportar ReactiveMatrixLayout desde layouts para compatibilidad
@@ -52,7 +52,7 @@ except (ImportError, ModuleNotFoundError, AttributeError):
     # Si falla, se usará __getattr__ cuando se acceda
     pass
 
-__all__ = ['ReactiveData', 'SelectionModel', 'ReactiveEngine', 'LinkManager', 'ReactiveMatrixLayout']
+__all__ = ['ReactiveData', 'SelectionModel', 'RowSelection', 'SelectionRows', 'ReactiveEngine', 'DataflowGraph', 'LinkManager', 'ReactiveMatrixLayout']
 # ReactiveMatrixLayout se carga de forma lazy usando __getattr__
 # Siempre está en __all__ para que esté disponible cuando se acceda
 
@@ -113,3 +113,229 @@ class ReactiveEngine:
         """Retorna todo el estado"""
         return self._state.copy()
 
+
+
+_UNSET = object()
+
+
+def _same_value(a, b):
+    """Igualdad tolerante: identidad, o == cuando retorna un bool utilizable."""
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+class _Node:
+    """Nodo del grafo de dataflow."""
+    
+    __slots__ = ('name', 'kind', 'compute', 'inputs', 'value', 'seen')
+    
+    def __init__(self, name, kind, compute=None, inputs=(), value=None):
+        self.name = name
+        self.kind = kind
+        self.compute = compute
+        self.inputs = tuple(inputs)
+        self.value = value
+        self.seen = _UNSET  # Valores de entrada con los que se calculó por última vez
+
+
+class DataflowGraph:
+    """
+    Grafo de dataflow para vistas enlazadas.
+    
+    Los nodos son fuentes de datos (selecciones), filtros, agregados y
+    vistas; las aristas van de cada entrada al nodo que la consume. Un
+    cambio en una fuente marca como sucios a todos sus descendientes, que
+    se recalculan en orden topológico, cada uno a lo sumo una vez por
+    propagación. Un nodo cuyas entradas no cambiaron desde su último
+    cálculo se omite (y sus descendientes solo se recalculan si alguna otra
+    de sus entradas cambió).
+    
+    Los cambios que un nodo provoca durante la propagación (p. ej. una
+    vista que limpia su propia selección) se procesan en la misma pasada;
+    un nodo ya calculado en ella no vuelve a ejecutarse, lo que corta los
+    ciclos de actualización que antes evitaba el flag ``_updating``.
+    """
+    
+    KINDS = ('source', 'filter', 'aggregate', 'view')
+    
+    def __init__(self):
+        self._nodes = {}  # nombre -> _Node (orden de inserción)
+        self._children = {}  # nombre -> [nombres de nodos que lo consumen]
+        self._order = None  # nombre -> posición topológica (cacheado)
+        self._dirty = set()
+        self._flushing = False
+        self.stats = {'computed': 0, 'skipped': 0}
+    
+    def __contains__(self, name):
+        return name in self._nodes
+    
+    def add_source(self, name, value=None):
+        """Agrega (o retorna sin cambios) un nodo fuente con su valor inicial."""
+        if name not in self._nodes:
+            self._add(_Node(name, 'source', value=value))
+        return self
+    
+    def add_node(self, name, compute, inputs, kind='view'):
+        """
+        Agrega o redefine un nodo derivado.
+        
+        Args:
+            name (str): Nombre del nodo
+            compute (callable): Recibe los valores de ``inputs`` y retorna el
+                valor del nodo (las vistas retornan None)
+            inputs (list): Nombres de los nodos de entrada (deben existir)
+            kind (str): 'filter', 'aggregate' o 'view'
+        
+        Raises:
+            ValueError: Tipo inválido, entrada desconocida o ciclo
+        """
+        if kind not in self.KINDS or kind == 'source':
+            raise ValueError(f"Tipo de nodo inválido: '{kind}'. Use 'filter', 'aggregate' o 'view'")
+        missing = [i for i in inputs if i not in self._nodes]
+        if missing:
+            raise ValueError(f"Entradas desconocidas para '{name}': {missing}")
+        node = self._nodes.get(name)
+        if node is not None:
+            if any(self._reaches(name, i) for i in inputs):
+                raise ValueError(f"Enlazar '{name}' a {list(inputs)} crearía un ciclo")
+            for upstream in node.inputs:
+                self._children[upstream].remove(name)
+            node.kind, node.compute, node.inputs, node.seen = kind, compute, tuple(inputs), _UNSET
+            for upstream in node.inputs:
+                self._children[upstream].append(name)
+            self._order = None
+        else:
+            self._add(_Node(name, kind, compute, inputs))
+        return self
+    
+    def add_edge(self, upstream, downstream):
+        """
+        Declara que ``downstream`` se recalcula después de ``upstream``.
+        
+        Sirve para dependencias de orden que no son entradas, como la
+        selección de una vista que depende de los datos que esa vista dibuja.
+        """
+        if upstream not in self._nodes or downstream not in self._nodes:
+            raise ValueError(f"Arista entre nodos desconocidos: '{upstream}' -> '{downstream}'")
+        if self._reaches(downstream, upstream):
+            raise ValueError(f"La arista '{upstream}' -> '{downstream}' crearía un ciclo")
+        if downstream not in self._children[upstream]:
+            self._children[upstream].append(downstream)
+            self._order = None
+        return self
+    
+    def _add(self, node):
+        self._nodes[node.name] = node
+        self._children[node.name] = []
+        for upstream in node.inputs:
+            self._children[upstream].append(node.name)
+        self._order = None
+    
+    def _reaches(self, start, target):
+        stack, seen = [start], set()
+        while stack:
+            name = stack.pop()
+            if name == target:
+                return True
+            if name not in seen:
+                seen.add(name)
+                stack.extend(self._children[name])
+        return False
+    
+    def _topological_order(self):
+        if self._order is None:
+            indegree = {name: 0 for name in self._nodes}
+            for children in self._children.values():
+                for child in children:
+                    indegree[child] += 1
+            ready = [name for name in self._nodes if indegree[name] == 0]
+            order = {}
+            while ready:
+                name = ready.pop(0)
+                order[name] = len(order)
+                for child in self._children[name]:
+                    indegree[child] -= 1
+                    if indegree[child] == 0:
+                        ready.append(child)
+            self._order = order
+        return self._order
+    
+    def get(self, name, default=None):
+        """Valor actual de un nodo."""
+        node = self._nodes.get(name)
+        return default if node is None else node.value
+    
+    def set_source(self, name, value):
+        """Actualiza una fuente y propaga el cambio a sus descendientes."""
+        node = self._nodes.get(name)
+        if node is None or node.kind != 'source':
+            raise ValueError(f"'{name}' no es un nodo fuente")
+        node.value = value
+        self._mark_dirty(name)
+        self.flush()
+    
+    def invalidate(self, name):
+        """Fuerza el recálculo de un nodo (y la propagación a sus descendientes)."""
+        node = self._nodes.get(name)
+        if node is None:
+            return
+        node.seen = _UNSET
+        self._dirty.add(name)
+        self._mark_dirty(name)
+        self.flush()
+    
+    def forget(self, kind='view'):
+        """
+        Olvida las entradas con que se calcularon los nodos de un tipo, sin
+        recalcularlos: el próximo cambio los ejecuta aunque las entradas
+        coincidan con las últimas (p. ej. tras volver a mostrar un layout,
+        cuando el navegador dibuja de nuevo los specs registrados).
+        """
+        for node in self._nodes.values():
+            if node.kind == kind:
+                node.seen = _UNSET
+    
+    def _mark_dirty(self, name):
+        stack = list(self._children[name])
+        while stack:
+            child = stack.pop()
+            if child not in self._dirty:
+                self._dirty.add(child)
+                stack.extend(self._children[child])
+    
+    def flush(self):
+        """Recalcula los nodos sucios en orden topológico."""
+        if self._flushing:
+            return  # La pasada en curso procesa los nodos marcados durante ella
+        self._flushing = True
+        done = set()
+        try:
+            while self._dirty:
+                order = self._topological_order()
+                name = min(self._dirty, key=order.__getitem__)
+                self._dirty.discard(name)
+                if name in done:
+                    continue
+                done.add(name)
+                self._recompute(self._nodes[name])
+        finally:
+            self._dirty.clear()
+            self._flushing = False
+    
+    def _recompute(self, node):
+        if node.kind == 'source':
+            return
+        values = tuple(self._nodes[i].value for i in node.inputs)
+        if node.seen is not _UNSET and all(_same_value(a, b) for a, b in zip(values, node.seen)):
+            self.stats['skipped'] += 1
+            return
+        node.seen = values
+        self.stats['computed'] += 1
+        try:
+            node.value = node.compute(*values)
+        except Exception as e:
+            print(f"Error en nodo '{node.name}': {e}")
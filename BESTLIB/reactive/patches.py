@@ -0,0 +1,136 @@
+"""
+Protocolo de parches para actualizaciones de vistas enlazadas.
+
+En lugar de re-enviar el agregado completo de una vista en cada evento de
+selección, Python compara el agregado nuevo con el último enviado y manda
+solo los valores de los registros que cambiaron, identificados por una
+clave estable (categoría, centro de bin, ...). Las filas de cada registro
+viajan como posiciones en la tabla compartida (``_rows``), así un registro
+parcheado o re-agregado selecciona exactamente las filas filtradas; si solo
+cambiaron valores, matrix.js actualiza las barras en el lugar sin re-dibujar
+la celda. Esas posiciones viajan en un buffer binario del comm, no en el JSON
+(ver ``pack_patch_rows``).
+"""
+
+# Campo que identifica cada registro, por tipo de vista
+PATCH_KEYS = {
+    'bar': 'category',
+    'histogram': 'bin',
+    'boxplot': 'category',
+    'pie': 'category',
+}
+
+
+def patch_key(value):
+    """
+    Clave estable de un registro, idéntica a ``patchKey`` de matrix.js.
+
+    Los floats enteros se formatean sin decimales (String(2.0) === '2' en JS).
+    """
+    if hasattr(value, 'item'):
+        value = value.item()
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# Filas de cada registro (originales, posiciones en la tabla compartida o en
+# el DataFrame agregado): se reemplazan por ``_rows`` al codificar
+ROW_FIELDS = frozenset({'_original_row', '_original_rows', '_row', '_rows', '_position', '_positions'})
+
+
+def encode_records(records, positions=None):
+    """
+    Prepara registros para diffs y envío: valores del agregado y sus filas.
+
+    Las filas de cada registro se codifican como posiciones en la tabla
+    compartida (``_rows``). ``_positions`` se refiere al DataFrame con el que
+    se calculó el agregado; ``positions`` lo traduce a la tabla compartida
+    (``positions[i]`` = fila de la tabla de la fila ``i``). Sin traducción
+    las filas viajan inline como ``_original_rows``.
+
+    Args:
+        records (list): Registros del agregado (dicts)
+        positions (sequence, optional): Posiciones en la tabla de cada fila
+            del DataFrame agregado
+
+    Returns:
+        list: Registros codificados (nuevos dicts; los originales no se modifican)
+    """
+    encoded = []
+    for r in records:
+        if not isinstance(r, dict):
+            continue
+        item = {k: v for k, v in r.items() if k not in ROW_FIELDS}
+        if positions is not None and isinstance(r.get('_positions'), list):
+            item['_rows'] = [int(positions[p]) for p in r['_positions']]
+        elif isinstance(r.get('_rows'), list):
+            item['_rows'] = list(r['_rows'])
+        elif isinstance(r.get('_original_rows'), list):
+            item['_original_rows'] = r['_original_rows']
+        encoded.append(item)
+    return encoded
+
+
+def diff_records(previous, current, key_field):
+    """
+    Calcula el parche entre dos versiones de un agregado.
+
+    Args:
+        previous (list): Registros enviados la última vez (None = desconocido)
+        current (list): Registros nuevos
+        key_field (str): Campo con la clave estable de cada registro
+
+    Returns:
+        dict | None: ``{'upsert': [...], 'remove': [...], 'order': [...]}``
+            (``order`` solo si cambió el orden o el conjunto de claves), o
+            None si no hay cambios
+    """
+    previous = previous or []
+    prev_by_key = {patch_key(r.get(key_field)): r for r in previous}
+    prev_order = [patch_key(r.get(key_field)) for r in previous]
+    cur_order = [patch_key(r.get(key_field)) for r in current]
+
+    upsert = [r for k, r in zip(cur_order, current) if prev_by_key.get(k) != r]
+    current_keys = set(cur_order)
+    remove = [k for k in prev_order if k not in current_keys]
+
+    if not upsert and not remove and prev_order == cur_order:
+        return None
+    patch = {'upsert': upsert, 'remove': remove}
+    if prev_order != cur_order:
+        patch['order'] = cur_order
+    return patch
+
+
+def pack_patch_rows(patch):
+    """
+    Saca las filas (``_rows``) de las altas de un parche a un buffer binario.
+
+    Las posiciones de todas las altas se concatenan en una columna Int32
+    (``core.binary.pack_columns``); ``row_counts`` indica cuántas son de cada
+    alta (None si el registro no trae ``_rows``). El JSON del parche lleva
+    así solo los valores.
+
+    Args:
+        patch (dict): Parche de ``diff_records`` (no se modifica)
+
+    Returns:
+        tuple: (parche, buffers); sin filas que empaquetar, buffers es None
+    """
+    counts = [len(r['_rows']) if isinstance(r.get('_rows'), list) else None
+              for r in patch.get('upsert', [])]
+    if not any(counts):
+        return patch, None
+    from ..core.binary import pack_columns
+    rows = [p for r in patch['upsert'] if isinstance(r.get('_rows'), list) for p in r['_rows']]
+    schema, buffers = pack_columns({'_rows': rows})
+    packed = dict(patch)
+    packed['upsert'] = [{k: v for k, v in r.items() if k != '_rows'} for r in patch['upsert']]
+    packed['row_counts'] = counts
+    packed['__binary__'] = schema
+    return packed, buffers
@@ -1,6 +1,9 @@
 """
 Selection Model - Modelo reactivo para selecciones
 """
+import hashlib
+from collections.abc import Sequence
+
 try:
     import ipywidgets as widgets
     from traitlets import List, Dict, Int, observe
@@ -16,6 +19,13 @@ except ImportError:
     HAS_PANDAS = False
     pd = None
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    np = None
+
 
 def _items_to_dataframe(items):
     """
@@ -38,6 +48,10 @@ def _items_to_dataframe(items):
     if HAS_PANDAS and isinstance(items, pd.DataFrame):
         return items.copy()
     
+    # Selección por posiciones: un solo take sobre el DataFrame original
+    if isinstance(items, SelectionRows):
+        return items.to_dataframe()
+    
     # Si es None o vacío, retornar DataFrame vacío
     if not items:
         return pd.DataFrame()
@@ -111,6 +125,129 @@ def _items_to_dataframe(items):
         return pd.DataFrame()
 
 
+class RowSelection:
+    """
+    Selección compacta: bitmask de filas sobre un DataFrame de origen.
+    
+    Guarda un bit por fila (O(n/8) bytes) y un digest del bitmask, de modo
+    que comparar dos selecciones es O(1) y los registros solo se
+    materializan cuando se piden (``to_dataframe`` / ``records``).
+    
+    Args:
+        source (DataFrame): Datos originales (se guarda la referencia, no una copia)
+        row_ids (array-like, optional): Posiciones (0..n-1) seleccionadas
+        mask (array-like, optional): Máscara booleana de longitud n
+    """
+    
+    __slots__ = ('source', 'length', 'count', 'digest', '_bits', '_row_ids')
+    
+    def __init__(self, source, row_ids=None, mask=None):
+        if not HAS_NUMPY:
+            raise ImportError("numpy es requerido para selecciones por posición")
+        self.source = source
+        self.length = len(source)
+        self._row_ids = None
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            if mask.shape != (self.length,):
+                raise ValueError(f"La máscara debe tener longitud {self.length}, recibido: {mask.shape}")
+        else:
+            ids = np.unique(np.asarray(row_ids if row_ids is not None else [], dtype=np.int64))
+            if ids.size and (ids[0] < 0 or ids[-1] >= self.length):
+                raise ValueError("Posiciones de fila fuera de rango")
+            mask = np.zeros(self.length, dtype=bool)
+            mask[ids] = True
+            self._row_ids = ids
+        self._bits = np.packbits(mask, bitorder='little')
+        self.count = int(self._row_ids.size) if self._row_ids is not None else int(np.count_nonzero(mask))
+        self.digest = hashlib.blake2b(self._bits.tobytes(), digest_size=16).digest()
+    
+    @property
+    def mask(self):
+        """Máscara booleana (n,) reconstruida desde el bitmask."""
+        return np.unpackbits(self._bits, count=self.length, bitorder='little').astype(bool)
+    
+    @property
+    def row_ids(self):
+        """Posiciones seleccionadas, ordenadas (np.ndarray int64, calculado una vez)."""
+        if self._row_ids is None:
+            self._row_ids = np.flatnonzero(self.mask).astype(np.int64)
+        return self._row_ids
+    
+    def nbytes(self):
+        """Bytes ocupados por el bitmask."""
+        return int(self._bits.nbytes)
+    
+    def __len__(self):
+        return self.count
+    
+    def __eq__(self, other):
+        if not isinstance(other, RowSelection):
+            return NotImplemented
+        return (self.source is other.source and self.length == other.length
+                and self.digest == other.digest)
+    
+    def __hash__(self):
+        return hash((id(self.source), self.length, self.digest))
+    
+    def __repr__(self):
+        return f"RowSelection(count={self.count}, length={self.length})"
+    
+    def to_dataframe(self):
+        """Filas seleccionadas del DataFrame de origen (índice reiniciado)."""
+        return self.source.take(self.row_ids).reset_index(drop=True)
+    
+    def records(self):
+        """Filas seleccionadas como lista de diccionarios."""
+        return self.to_dataframe().to_dict('records')
+
+
+class SelectionRows(Sequence):
+    """
+    Vista perezosa de una RowSelection como secuencia de diccionarios.
+    
+    Es lo que reciben los callbacks de ``on_change`` cuando la selección
+    llega por posiciones: ``len`` es inmediato y los registros solo se
+    materializan (una vez) si el callback los recorre.
+    """
+    
+    __slots__ = ('selection', '_records')
+    
+    def __init__(self, selection):
+        self.selection = selection
+        self._records = None
+    
+    def _materialize(self):
+        if self._records is None:
+            self._records = self.selection.records()
+        return self._records
+    
+    def __len__(self):
+        return self.selection.count
+    
+    def __getitem__(self, index):
+        return self._materialize()[index]
+    
+    def __iter__(self):
+        return iter(self._materialize())
+    
+    def __eq__(self, other):
+        if isinstance(other, SelectionRows):
+            return self.selection == other.selection
+        if isinstance(other, list):
+            return len(other) == len(self) and self._materialize() == other
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"SelectionRows(count={len(self)})"
+    
+    def to_dataframe(self):
+        """Filas seleccionadas como DataFrame (sin pasar por diccionarios)."""
+        return self.selection.to_dataframe()
+
+
 class ReactiveData(widgets.Widget if HAS_WIDGETS else object):
     """
     Widget reactivo que mantiene datos sincronizados entre celdas.
@@ -140,6 +277,9 @@ class ReactiveData(widgets.Widget if HAS_WIDGETS else object):
             self.items = kwargs.get('items', [])
             self.count = kwargs.get('count', 0)
         self._callbacks = []
+        self._selection = None
+        self._stale = False  # La vista del navegador ya no muestra esta selección
+        self._silent_items = False  # items se reasigna sin volver a notificar
     
     def on_change(self, callback):
         """
@@ -157,6 +297,10 @@ class ReactiveData(widgets.Widget if HAS_WIDGETS else object):
     
     def _items_changed(self, change):
         """Se ejecuta automáticamente cuando items cambia"""
+        if isinstance(change, str):
+            # traitlets también invoca _items_changed('items') como observer
+            # legacy (_<trait>_changed); @observe('items') ya notificó el cambio
+            return
         if isinstance(change, dict):
             new_items = change.get('new', [])
         else:
@@ -176,6 +320,8 @@ class ReactiveData(widgets.Widget if HAS_WIDGETS else object):
         @observe('items')
         def _observe_items(self, change):
             """Wrapper para traitlets observe"""
+            if self._silent_items:
+                return
             self._items_changed(change)
     
     def update(self, items):
@@ -193,6 +339,12 @@ class ReactiveData(widgets.Widget if HAS_WIDGETS else object):
         self._updating = True
         
         try:
+            if isinstance(items, SelectionRows):
+                self._set_selection(items.selection)
+                return
+            if isinstance(items, RowSelection):
+                self._set_selection(items)
+                return
             if items is None:
                 items_list = []
             elif HAS_PANDAS and isinstance(items, pd.DataFrame):
@@ -256,6 +408,14 @@ class ReactiveData(widgets.Widget if HAS_WIDGETS else object):
                         continue
             
             # Solo actualizar si hay cambio real (evitar loops infinitos)
+            stale, self._stale = self._stale, False
+            if self._selection is not None or stale:
+                # La selección anterior era por posiciones (self.items no la
+                # refleja) o el navegador se volvió a dibujar: notificar igual
+                self._selection = None
+                if self.items == valid_items:
+                    self._items_changed({'new': valid_items})
+                    return
             if self.items != valid_items or self.count != len(valid_items):
                 self.items = valid_items
                 self.count = len(valid_items)
@@ -263,13 +423,69 @@ class ReactiveData(widgets.Widget if HAS_WIDGETS else object):
         finally:
             self._updating = False
     
+    def update_rows(self, row_ids=None, source=None, mask=None):
+        """
+        Actualiza la selección con posiciones de fila (o una máscara) de ``source``.
+        
+        La selección se guarda como bitmask (ver RowSelection); los callbacks
+        reciben una SelectionRows perezosa y no se ejecutan si la selección
+        es idéntica a la actual.
+        
+        Args:
+            row_ids (array-like, optional): Posiciones (0..n-1) seleccionadas
+            source (DataFrame): Datos originales
+            mask (array-like, optional): Máscara booleana en lugar de row_ids
+        """
+        if source is None:
+            raise ValueError("update_rows requiere el DataFrame de origen (source)")
+        self._set_selection(RowSelection(source, row_ids=row_ids, mask=mask))
+    
+    def _set_selection(self, selection):
+        if selection == self._selection and not self._stale:
+            return
+        self._stale = False
+        self._selection = selection
+        rows = SelectionRows(selection)
+        self._reflect_items(rows)
+        self._items_changed({'new': rows})
+    
+    def _reflect_items(self, rows):
+        """
+        Deja ``items`` acorde a una selección por posiciones, sin re-notificar.
+        
+        Sin ipywidgets ``items`` es la propia SelectionRows perezosa. El trait
+        sincronizado solo admite listas de dicts y materializarla anularía la
+        selección por posiciones, así que queda vacío: ``get_items()`` y
+        ``to_dataframe()`` dan las filas.
+        """
+        self._silent_items = True
+        try:
+            self.items = [] if HAS_WIDGETS else rows
+        finally:
+            self._silent_items = False
+    
+    def mark_stale(self):
+        """
+        Indica que el navegador volvió a dibujar las vistas sin esta selección
+        (p. ej. al mostrar de nuevo el layout): la próxima actualización
+        notifica aunque coincida con la selección actual.
+        """
+        self._stale = True
+    
+    def get_selection(self):
+        """Retorna la RowSelection actual (None si la selección es por items)."""
+        return self._selection
+    
     def clear(self):
         """Limpia los datos"""
+        self._selection = None
         self.items = []
         self.count = 0
     
     def get_items(self):
         """Retorna los items actuales"""
+        if self._selection is not None:
+            return SelectionRows(self._selection)
         return self.items
     
     def get_count(self):
@@ -278,6 +494,8 @@ class ReactiveData(widgets.Widget if HAS_WIDGETS else object):
     
     def to_dataframe(self):
         """Convierte items a DataFrame de pandas"""
+        if self._selection is not None:
+            return self._selection.to_dataframe()
         return _items_to_dataframe(self.items)
 
 
@@ -304,6 +522,8 @@ class SelectionModel(ReactiveData):
     
     def _items_changed(self, change):
         """Guarda historial de selecciones"""
+        if isinstance(change, str):
+            return  # Observer legacy de traitlets (ver ReactiveData._items_changed)
         super()._items_changed(change)
         
         if isinstance(change, dict):
@@ -311,6 +531,8 @@ class SelectionModel(ReactiveData):
         else:
             new_items = change if not hasattr(change, 'new') else change.new
         
+        # Una SelectionRows se guarda tal cual: solo el bitmask, los registros
+        # se materializan si alguien los recorre
         if new_items:
             self.history.append({
                 'timestamp': self._get_timestamp(),
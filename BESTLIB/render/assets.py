@@ -1,8 +1,12 @@
 """
 Asset Manager - Gestión de assets JS y CSS
 """
+import hashlib
+import json
 import os
+import socket
 import sys
+import threading
 from pathlib import Path
 
 
@@ -15,6 +19,28 @@ class AssetManager:
     _css_cache = None
     _d3_cache = None
     
+    # Deduplicación por sesión de kernel: matrix.js y style.css viajan en la
+    # primera salida; las siguientes solo llevan el render y un guard por hash
+    dedupe_assets = True
+    _asset_hash = None
+    _injected_hash = None
+    
+    # Origen de D3: 'cdn' (jsdelivr/unpkg), 'bundled' (BESTLIB/d3.min.js
+    # embebido en la librería) o 'auto' (bundled si el kernel no tiene red).
+    # Se puede forzar con la variable de entorno BESTLIB_D3_MODE. En modo
+    # 'cdn' el navegador decide: si no alcanza ningún CDN pide la copia local
+    # al kernel por comm ('d3_request').
+    VALID_D3_MODES = ('auto', 'cdn', 'bundled')
+    d3_mode = os.environ.get('BESTLIB_D3_MODE', 'auto')
+    D3_CDN_HOST = 'cdn.jsdelivr.net'
+    _network_available = None
+    
+    # Code splitting: la librería lleva el core de matrix.js y cada salida
+    # agrega solo los renderers de sus tipos de gráfico (ver render/chunks.py)
+    split_renderers = True
+    _split = None
+    _injected_modules = set()
+    
     @classmethod
     def get_base_path(cls):
         """Retorna la ruta base del paquete BESTLIB"""
@@ -89,6 +115,245 @@ class AssetManager:
         cls._js_cache = None
         cls._css_cache = None
         cls._d3_cache = None
+        cls._asset_hash = None
+        cls._injected_hash = None
+        cls._split = None
+        cls._injected_modules = set()
+    
+    @classmethod
+    def set_d3_mode(cls, mode):
+        """
+        Fija el origen de D3.
+        
+        Args:
+            mode (str): 'auto', 'cdn' o 'bundled'
+        """
+        if mode not in cls.VALID_D3_MODES:
+            raise ValueError(f"d3_mode debe ser uno de {cls.VALID_D3_MODES}, recibido: {mode}")
+        cls.d3_mode = mode
+        cls._asset_hash = None
+        cls._injected_hash = None
+    
+    @classmethod
+    def has_network(cls, timeout=0.25):
+        """
+        Indica si el CDN de D3 es alcanzable desde el kernel (se prueba una
+        sola vez por sesión).
+        
+        Es solo una pista para el modo 'auto': el kernel puede ser remoto y el
+        navegador no tener red (o al revés). La decisión final la toma el
+        navegador, que pide la copia local si el CDN falla (ver matrix.js
+        ``ensureD3``).
+        
+        La prueba corre en un hilo para acotar también la resolución DNS, que
+        en redes aisladas puede bloquear varios segundos.
+        """
+        if cls._network_available is None:
+            result = []
+            
+            def probe():
+                try:
+                    socket.create_connection((cls.D3_CDN_HOST, 443), timeout=timeout).close()
+                    result.append(True)
+                except OSError:
+                    result.append(False)
+            
+            thread = threading.Thread(target=probe, daemon=True)
+            thread.start()
+            thread.join(timeout)
+            cls._network_available = bool(result and result[0])
+        return cls._network_available
+    
+    @classmethod
+    def resolve_d3_mode(cls):
+        """Origen efectivo de D3 para esta sesión: 'cdn' o 'bundled'."""
+        mode = cls.d3_mode if cls.d3_mode in cls.VALID_D3_MODES else 'auto'
+        if mode == 'auto':
+            mode = 'cdn' if cls.has_network() else 'bundled'
+        if mode == 'bundled' and not cls.load_d3():
+            return 'cdn'
+        return mode
+    
+    @classmethod
+    def d3_bundle_js(cls):
+        """
+        d3.min.js listo para embeber: define ``window.d3`` solo si falta.
+        
+        ``define``/``module``/``exports`` se ocultan para que el UMD de D3 cree
+        el global aunque la página tenga require.js (Jupyter clásico).
+        """
+        return f"""if (typeof window.d3 === 'undefined') {{
+(function(define, module, exports) {{
+{cls.load_d3()}
+}}).call(window);
+}}"""
+    
+    @classmethod
+    def asset_hash(cls):
+        """Hash de contenido de matrix.js + style.css (+ D3 embebido) que identifica la versión inyectada."""
+        if cls._asset_hash is None:
+            digest = hashlib.sha256()
+            digest.update(cls.load_js().encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(cls.load_css().encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(cls.resolve_d3_mode().encode('utf-8'))
+            digest.update(b'split' if cls.split_renderers else b'full')
+            cls._asset_hash = digest.hexdigest()[:16]
+        return cls._asset_hash
+    
+    @classmethod
+    def set_dedupe(cls, enabled=True):
+        """
+        Activa/desactiva la inyección única de assets por sesión.
+        
+        Con la deduplicación desactivada cada salida incluye matrix.js y el CSS
+        completos (comportamiento anterior).
+        """
+        cls.dedupe_assets = bool(enabled)
+        cls._injected_hash = None
+    
+    @classmethod
+    def set_split_renderers(cls, enabled=True):
+        """
+        Activa/desactiva el code splitting de matrix.js por tipo de gráfico.
+        
+        Desactivado, la librería inyectada incluye todos los renderers.
+        """
+        cls.split_renderers = bool(enabled)
+        cls._asset_hash = None
+        cls._injected_hash = None
+    
+    @classmethod
+    def library_split(cls):
+        """
+        matrix.js dividido en core + renderers (cacheado).
+        
+        Returns:
+            LibrarySplit | None: None si el splitting está desactivado o
+                matrix.js no tiene la estructura esperada
+        """
+        if not cls.split_renderers:
+            return None
+        if cls._split is None:
+            from .chunks import split_library
+            cls._split = split_library(cls.load_js()) or False
+        return cls._split or None
+    
+    @classmethod
+    def modules_js(cls, mapping):
+        """
+        Renderers que necesita un mapping y que la página aún no tiene.
+        
+        Con deduplicación cada renderer se envía una sola vez por sesión (se
+        vuelven a enviar tras una nueva inyección del core). Sin ella, o en
+        Colab, cada salida lleva todos los renderers de sus gráficos.
+        
+        Returns:
+            str: JS que define los renderers ("" si no falta ninguno)
+        """
+        return cls.split_modules(mapping)[0]
+    
+    @classmethod
+    def split_modules(cls, mapping):
+        """
+        Como ``modules_js``, pero informa también qué renderers se asumen ya
+        cargados en la página (enviados por salidas anteriores).
+        
+        El guard de ``JSBuilder.build_session_js`` verifica esos nombres: si la
+        salida que los trajo se borró y la página se recargó, pide los assets
+        al kernel en lugar de fallar al dibujar.
+        
+        Returns:
+            tuple: (js, preloaded) con preloaded ordenado alfabéticamente
+        """
+        split = cls.library_split()
+        if split is None:
+            return "", []
+        from .chunks import mapping_chart_types
+        names = split.renderers_for_types(mapping_chart_types(mapping))
+        preloaded = set()
+        if cls.dedupe_assets and not cls.is_colab():
+            preloaded = names & cls._injected_modules
+            names -= preloaded
+            cls._injected_modules |= names
+        return split.define_js(names), sorted(preloaded)
+    
+    @classmethod
+    def claim_injection(cls):
+        """
+        Indica si la salida actual debe llevar la librería completa.
+        
+        La librería se omite solo cuando el navegador confirmó por comm que
+        ejecutó esta versión (ver ``confirm_injection``). Así no se da por
+        inyectada una salida que nunca se mostró (``_repr_mimebundle_`` sin
+        display), y en frontends que no pueden pedirla de vuelta por comm
+        (JupyterLab, Notebook 7, VS Code) cada salida es autocontenida.
+        """
+        # En Colab cada salida es un iframe aislado: siempre llevar la librería
+        if not cls.dedupe_assets or cls.is_colab():
+            cls._injected_modules = set()
+            return True
+        if cls._injected_hash == cls.asset_hash():
+            return False
+        cls._injected_modules = set()
+        return True
+    
+    @classmethod
+    def confirm_injection(cls, asset_hash):
+        """Registra que el navegador ejecutó la librería con hash ``asset_hash``."""
+        if asset_hash and asset_hash == cls.asset_hash():
+            cls._injected_hash = asset_hash
+    
+    @classmethod
+    def library_js(cls, all_modules=False):
+        """
+        matrix.js más la instalación del CSS en <head> y la marca de versión.
+        
+        En modo D3 'bundled' se antepone d3.min.js (una vez por sesión, igual
+        que el resto de la librería).
+        
+        Con code splitting solo se incluye el core; los renderers se agregan
+        por salida con ``modules_js`` (o todos, con ``all_modules=True``).
+        
+        El CSS se instala en <head> (no en la salida) para que sobreviva
+        aunque se borre la salida que lo inyectó.
+        """
+        asset_hash = cls.asset_hash()
+        d3_code = cls.d3_bundle_js() + "\n" if cls.resolve_d3_mode() == 'bundled' else ""
+        split = cls.library_split()
+        if split is None:
+            lib_code = cls.load_js()
+        else:
+            lib_code = split.core
+            if all_modules:
+                lib_code += "\n" + split.define_js(set(split.modules))
+        return f"""{d3_code}{lib_code}
+(function() {{
+  if (!document.getElementById('bestlib-style')) {{
+    const style = document.createElement('style');
+    style.id = 'bestlib-style';
+    style.textContent = {json.dumps(cls.load_css())};
+    document.head.appendChild(style);
+  }}
+  window.__bestlib_assets__ = "{asset_hash}";
+  // Confirmar al kernel que la librería está en la página (ver claim_injection)
+  const J = window.Jupyter || window.IPython;
+  if (J && J.notebook && J.notebook.kernel && !(window.google && window.google.colab)) {{
+    try {{
+      const comm = J.notebook.kernel.comm_manager.new_comm('bestlib_matrix', {{ div_id: '__bestlib_assets__' }});
+      comm.send({{ type: 'assets_loaded', div_id: '__bestlib_assets__', payload: {{ hash: "{asset_hash}" }} }});
+    }} catch (e) {{
+      console.warn('[BESTLIB] No se pudo confirmar la carga de la librería', e);
+    }}
+  }}
+}})();"""
+    
+    @classmethod
+    def asset_payload(cls):
+        """Respuesta a una solicitud de assets desde el navegador (página recargada)."""
+        # La página perdió también los renderers: se envían todos
+        return {'hash': cls.asset_hash(), 'js': cls.library_js(all_modules=True)}
     
     @classmethod
     def get_all_assets(cls):
@@ -169,7 +434,8 @@ class AssetManager:
                 document.head.appendChild(script);
             })();
             """
-            display(Javascript(load_d3_js))
+            if cls.resolve_d3_mode() == 'cdn':
+                display(Javascript(load_d3_js))
             
             # Cargar style.css (solo si no está ya cargado)
             css_content = cls.load_css()
@@ -1,8 +1,46 @@
 """
 JS Builder - Constructor de código JavaScript modular
 """
-from ..utils.json import sanitize_for_json
-import json
+import base64
+import gzip
+
+from ..utils.json import dumps_json
+from .assets import AssetManager
+
+# Inflado del mapping comprimido en el navegador: DecompressionStream nativo
+# y, en navegadores sin soporte, pako cargado desde CDN (por eso sin red, con
+# D3 embebido, el mapping no se comprime: ver JSBuilder.should_compress).
+INFLATE_MAPPING_JS = """
+  function bestlibInflateMapping(b64) {
+    const bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+    if (typeof DecompressionStream !== 'undefined') {
+      const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+      return new Response(stream).text().then(JSON.parse);
+    }
+    return new Promise((resolve, reject) => {
+      if (window.pako) return resolve(window.pako);
+      const script = document.createElement('script');
+      script.src = 'https://cdn.jsdelivr.net/npm/pako@2/dist/pako_inflate.min.js';
+      script.onload = () => resolve(window.pako);
+      script.onerror = reject;
+      document.head.appendChild(script);
+    }).then(pako => JSON.parse(pako.ungzip(bytes, { to: 'string' })));
+  }
+"""
+
+
+def compress_mapping(mapping_json):
+    """
+    Comprime el JSON de un mapping con gzip y lo codifica en base64.
+    
+    Args:
+        mapping_json (str): Mapping ya serializado a JSON
+    
+    Returns:
+        str: Cadena base64 (ASCII, segura dentro de <script>)
+    """
+    raw = gzip.compress(mapping_json.encode('utf-8'), compresslevel=6, mtime=0)
+    return base64.b64encode(raw).decode('ascii')
 
 
 class JSBuilder:
@@ -10,8 +48,57 @@ class JSBuilder:
     Constructor de código JavaScript a partir de specs y templates.
     """
     
+    # Compresión del mapping embebido: True, False o 'auto' (según umbral)
+    compress_mappings = 'auto'
+    # Tamaño mínimo (bytes de JSON) para comprimir en modo 'auto'
+    compress_threshold = 256 * 1024
+    
+    @classmethod
+    def should_compress(cls, mapping_json, compress=None):
+        """
+        Decide si un mapping serializado debe embeberse comprimido.
+        
+        Con D3 embebido (``AssetManager.resolve_d3_mode() == 'bundled'``) el
+        navegador puede no tener red para cargar pako, así que el mapping
+        nunca se comprime.
+        """
+        mode = cls.compress_mappings if compress is None else compress
+        if mode == 'auto':
+            wanted = len(mapping_json) >= cls.compress_threshold
+        else:
+            wanted = bool(mode)
+        return wanted and AssetManager.resolve_d3_mode() != 'bundled'
+    
     @staticmethod
-    def build_render_call(div_id, layout_ascii, mapping, wait_for_d3=False):
+    def _wrap_mapping(mapping_js, body, compress=None):
+        """
+        Envuelve el cuerpo del render en una IIFE que define `mapping`.
+        
+        Si el mapping supera el umbral, se embebe como gzip+base64 y el
+        cuerpo se ejecuta cuando termina el inflado.
+        """
+        if not JSBuilder.should_compress(mapping_js, compress):
+            return f"""
+(function() {{
+  const mapping = {mapping_js};
+{body}
+}})();
+"""
+        payload = compress_mapping(mapping_js)
+        return f"""
+(function() {{
+{INFLATE_MAPPING_JS}
+  bestlibInflateMapping("{payload}").then(function(mapping) {{
+{body}
+  }}).catch(function(err) {{
+    console.error('❌ [BESTLIB] No se pudo descomprimir el mapping:', err);
+  }});
+}})();
+"""
+    
+    @staticmethod
+    def build_render_call(div_id, layout_ascii, mapping, wait_for_d3=False, compress=None, cache_key=None,
+                          cache=None):
         """
         Construye la llamada a render() en JavaScript.
         
@@ -20,21 +107,40 @@ class JSBuilder:
             layout_ascii (str): Layout ASCII
             mapping (dict): Mapping de letras a specs
             wait_for_d3 (bool): Si True, espera a que D3 esté disponible antes de renderizar
+            compress (bool|str, optional): True, False o 'auto'. Por defecto
+                usa JSBuilder.compress_mappings
+            cache_key (hashable, optional): Versión del mapping (ver
+                MatrixLayout._prepare_repr_data). Con la misma clave se
+                reutiliza el JS ya generado sin volver a serializar
+            cache (dict, optional): Memo del llamador (el layout) donde se
+                guarda el último JS generado; así vive lo mismo que el layout
         
         Returns:
             str: Código JavaScript
         """
+        if cache_key is None or cache is None:
+            return JSBuilder._render_call(div_id, layout_ascii, mapping, wait_for_d3, compress)
+        key = (cache_key, div_id, layout_ascii, wait_for_d3, compress,
+               JSBuilder.compress_mappings, JSBuilder.compress_threshold, AssetManager.resolve_d3_mode())
+        js = cache.get(key)
+        if js is None:
+            js = JSBuilder._render_call(div_id, layout_ascii, mapping, wait_for_d3, compress)
+            cache.clear()
+            cache[key] = js
+        return js
+    
+    @staticmethod
+    def _render_call(div_id, layout_ascii, mapping, wait_for_d3, compress):
+        """Genera la llamada a render() sin memoización (ver build_render_call)."""
         # Escapar layout ASCII para template literal
         escaped_layout = layout_ascii.replace("`", "\\`").replace("$", "\\$")
         
         # Generar mapping como JSON
-        mapping_js = json.dumps(sanitize_for_json(mapping))
+        mapping_js = dumps_json(mapping)
         
         if wait_for_d3:
             # Versión que espera a D3 (para Colab)
-            return f"""
-(function() {{
-  const mapping = {mapping_js};
+            return JSBuilder._wrap_mapping(mapping_js, f"""
   const container = document.getElementById("{div_id}");
   if (container) {{
     container.__mapping__ = mapping;
@@ -70,24 +176,19 @@ class JSBuilder:
     render("{div_id}", `{escaped_layout}`, mapping);
   }} else {{
     waitForD3AndRender();
-  }}
-}})();
-"""
+  }}""", compress=compress)
         else:
             # Versión normal (para Jupyter)
-            return f"""
-(function() {{
-  const mapping = {mapping_js};
+            return JSBuilder._wrap_mapping(mapping_js, f"""
   const container = document.getElementById("{div_id}");
   if (container) {{
     container.__mapping__ = mapping;
   }}
-  render("{div_id}", `{escaped_layout}`, mapping);
-}})();
-"""
+  render("{div_id}", `{escaped_layout}`, mapping);""", compress=compress)
     
     @staticmethod
-    def build_full_js(js_lib_code, div_id, layout_ascii, mapping, wait_for_d3=False):
+    def build_full_js(js_lib_code, div_id, layout_ascii, mapping, wait_for_d3=False, compress=None,
+                      cache_key=None, cache=None):
         """
         Construye código JavaScript completo incluyendo la librería.
         
@@ -97,13 +198,94 @@ class JSBuilder:
             layout_ascii (str): Layout ASCII
             mapping (dict): Mapping de letras a specs
             wait_for_d3 (bool): Si True, espera a que D3 esté disponible antes de renderizar
+            compress (bool|str, optional): Compresión del mapping (ver build_render_call)
+            cache_key, cache (optional): Memoización del render (ver build_render_call)
         
         Returns:
             str: Código JavaScript completo
         """
-        render_call = JSBuilder.build_render_call(div_id, layout_ascii, mapping, wait_for_d3=wait_for_d3)
+        render_call = JSBuilder.build_render_call(div_id, layout_ascii, mapping,
+                                                  wait_for_d3=wait_for_d3, compress=compress,
+                                                  cache_key=cache_key, cache=cache)
         return f"{js_lib_code}\n{render_call}"
     
+    @staticmethod
+    def build_session_js(js_lib_code, asset_hash, div_id, layout_ascii, mapping, wait_for_d3=False, compress=None,
+                         modules_js="", renderers=(), cache_key=None, cache=None):
+        """
+        Construye el JS de una salida con assets deduplicados por sesión.
+        
+        Si ``js_lib_code`` no es None se incluye la librería completa. Si no
+        (el navegador ya confirmó tenerla, ver AssetManager.claim_injection),
+        solo el render, protegido por un guard: cuando la página no tiene la
+        versión ``asset_hash`` de matrix.js (recarga del navegador, salida
+        original borrada) se pide al kernel por comm y los renders pendientes
+        se ejecutan al recibirla.
+        
+        ``modules_js`` (renderers del code splitting) se ejecuta después de la
+        librería y antes del render. ``renderers`` son los que la salida da por
+        cargados (enviados por salidas anteriores): el guard también los
+        verifica, porque la salida que los trajo pudo haberse borrado.
+        
+        Args:
+            js_lib_code (str|None): Librería (ver AssetManager.library_js) o None
+            asset_hash (str): Hash de contenido de los assets
+            div_id, layout_ascii, mapping, wait_for_d3, compress, cache_key, cache: Ver build_render_call
+            modules_js (str): Renderers faltantes (ver AssetManager.split_modules)
+            renderers (list): Renderers que la página ya debería tener
+        
+        Returns:
+            str: Código JavaScript
+        """
+        render_call = JSBuilder.build_render_call(div_id, layout_ascii, mapping,
+                                                  wait_for_d3=wait_for_d3, compress=compress,
+                                                  cache_key=cache_key, cache=cache)
+        if js_lib_code is not None:
+            return f"{js_lib_code}\n{modules_js}\n{render_call}"
+        return f"""
+(function() {{
+  const ASSETS = "{asset_hash}";
+  const RENDERERS = {dumps_json(list(renderers))};
+  function run() {{
+{modules_js}
+{render_call}
+  }}
+  if (window.__bestlib_assets__ === ASSETS && typeof window.render === 'function' &&
+      RENDERERS.every(name => window.__bestlib_has_renderer__(name))) {{
+    run();
+    return;
+  }}
+  // La librería (o un renderer) no está en la página: pedirla al kernel una sola vez
+  const queue = window.__bestlib_asset_queue__ = window.__bestlib_asset_queue__ || [];
+  queue.push(run);
+  if (queue.length > 1) return;
+  function install(data) {{
+    if (!data || data.type !== 'assets' || !data.payload) return;
+    (0, eval)(data.payload.js);
+    window.__bestlib_asset_queue__ = [];
+    queue.forEach(fn => fn());
+  }}
+  function fail(err) {{
+    window.__bestlib_asset_queue__ = [];
+    console.error('❌ [BESTLIB] matrix.js no está cargado en la página; vuelve a ejecutar la celda.', err || '');
+  }}
+  const request = {{ type: 'asset_request', div_id: '__bestlib_assets__', payload: {{ hash: ASSETS }} }};
+  const J = window.Jupyter || window.IPython;
+  if (J && J.notebook && J.notebook.kernel) {{
+    const comm = J.notebook.kernel.comm_manager.new_comm('bestlib_matrix', {{ div_id: '__bestlib_assets__' }});
+    comm.on_msg(msg => install(msg.content.data));
+    comm.send(request);
+  }} else if (window.google && window.google.colab && window.google.colab.kernel) {{
+    window.google.colab.kernel.comms.open('bestlib_matrix', {{ div_id: '__bestlib_assets__' }}).then(async comm => {{
+      comm.send(request);
+      for await (const msg of comm.messages) install(msg.data);
+    }}).catch(fail);
+  }} else {{
+    fail();
+  }}
+}})();
+"""
+    
     @staticmethod
     def build_comm_code(comm_engine_js):
         """
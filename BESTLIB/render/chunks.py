@@ -0,0 +1,213 @@
+"""
+Code splitting de matrix.js por tipo de gráfico.
+
+matrix.js define un renderer ``render*D3`` por tipo de gráfico dentro de una
+sola IIFE. Aquí se separa en un core (runtime, helpers y dispatch) donde
+cada renderer queda como stub, más un módulo por renderer. El navegador
+define los módulos con ``__bestlib_define_renderers__`` (eval directo dentro
+de la IIFE, así que ven los mismos helpers) y los stubs les delegan.
+"""
+import json
+import re
+
+from ..charts.spec_utils import CANVAS_CHART_TYPES
+
+# Renderers que el core necesita siempre (dispatch y visualizaciones simples)
+CORE_RENDERERS = frozenset({'renderChartD3', 'renderSimpleVizD3'})
+
+# Backend Canvas: se despacha por spec.renderer, no por tipo; en la tabla de
+# renderers figura como el pseudo-tipo 'canvas' (ver mapping_chart_types)
+CANVAS_RENDERER = 'renderCanvasD3'
+
+_RENDERER_RE = re.compile(r'^  function (render\w+D3)\(', re.M)
+_TYPE_RE = re.compile(r"chartType === '(\w+)'")
+_CALL_RE = re.compile(r'\b(render\w+D3)\(')
+
+
+class LibrarySplit:
+    """
+    matrix.js dividido en core + módulos por renderer.
+
+    Attributes:
+        core (str): Librería con los renderers reemplazados por stubs
+        modules (dict): nombre de renderer -> código de la función
+        chart_renderers (dict): tipo de gráfico -> nombre de renderer
+        dependencies (dict): renderer -> renderers que invoca (transitivo)
+    """
+
+    def __init__(self, core, modules, chart_renderers, dependencies):
+        self.core = core
+        self.modules = modules
+        self.chart_renderers = chart_renderers
+        self.dependencies = dependencies
+
+    def renderers_for_types(self, chart_types):
+        """
+        Módulos necesarios para un conjunto de tipos de gráfico.
+
+        Un tipo desconocido (sin renderer en el dispatch) devuelve todos los
+        módulos: es preferible enviar de más que dejar una celda sin dibujar.
+        """
+        names = set()
+        for chart_type in chart_types:
+            renderer = self.chart_renderers.get(chart_type)
+            if renderer is None:
+                return set(self.modules)
+            if renderer in self.modules:
+                names.add(renderer)
+                names |= self.dependencies.get(renderer, set())
+        return names
+
+    def define_js(self, names):
+        """JS que define los módulos dados en una página que ya tiene el core."""
+        if not names:
+            return ""
+        source = "\n".join(
+            f"{self.modules[name]}\nloadedRenderers.{name} = {name};"
+            for name in sorted(names)
+        )
+        return f"window.__bestlib_define_renderers__({json.dumps(source)});"
+
+
+def _function_end(source, start):
+    """
+    Fin (exclusivo) de la función que empieza en ``start``, por conteo de llaves.
+
+    Ignora llaves dentro de strings, template literals (con ``${...}``
+    anidados) y comentarios. Retorna -1 si no se encuentra el cierre.
+    """
+    depth = 0
+    stack = []  # '`' = dentro de un template; int = profundidad al abrir ${...}
+    i, n = source.find('{', start), len(source)
+    while 0 <= i < n:
+        ch = source[i]
+        if stack and stack[-1] == '`':
+            if ch == '\\':
+                i += 1
+            elif ch == '`':
+                stack.pop()
+            elif source.startswith('${', i):
+                stack.append(depth)
+                i += 1
+            i += 1
+            continue
+        if ch in '\'"':
+            i += 1
+            while i < n and source[i] != ch:
+                i += 2 if source[i] == '\\' else 1
+        elif ch == '`':
+            stack.append('`')
+        elif source.startswith('//', i):
+            i = source.find('\n', i)
+            if i < 0:
+                return -1
+        elif source.startswith('/*', i):
+            i = source.find('*/', i) + 1
+            if i <= 0:
+                return -1
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            if stack and stack[-1] == depth:
+                stack.pop()  # cierre de ${...}: se vuelve al template
+            else:
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+        i += 1
+    return -1
+
+
+def _stub(name):
+    return (f"  function {name}() {{\n"
+            f"    return callRenderer('{name}', this, arguments);\n"
+            f"  }}\n")
+
+
+def _dispatch_table(source):
+    """Tipo de gráfico -> renderer, leído del dispatch de renderChartD3."""
+    start = source.find('  function renderChartD3(')
+    if start < 0:
+        return {}
+    end = _function_end(source, start)
+    table = {}
+    pending = []
+    for line in source[start:end].splitlines():
+        types = _TYPE_RE.findall(line)
+        if types:
+            pending = types
+            continue
+        call = _CALL_RE.search(line)
+        if call and pending:
+            for chart_type in pending:
+                table[chart_type] = call.group(1)
+            pending = []
+    return table
+
+
+def split_library(source):
+    """
+    Divide matrix.js en core + módulos.
+
+    Returns:
+        LibrarySplit | None: None si no se reconoce la estructura esperada
+            (el llamador envía entonces la librería completa)
+    """
+    if 'function defineRenderers(' not in source:
+        return None
+    bounds = {}
+    for match in _RENDERER_RE.finditer(source):
+        name = match.group(1)
+        end = _function_end(source, match.start())
+        if end < 0:
+            return None
+        if source.startswith('\n', end):
+            end += 1
+        bounds[name] = (match.start(), end)
+    chart_renderers = _dispatch_table(source)
+    if not chart_renderers:
+        return None
+    if CANVAS_RENDERER in bounds:
+        chart_renderers['canvas'] = CANVAS_RENDERER
+
+    modules = {}
+    parts = []
+    cursor = 0
+    for name, (start, end) in sorted(bounds.items(), key=lambda item: item[1][0]):
+        if name in CORE_RENDERERS:
+            continue
+        parts.append(source[cursor:start])
+        parts.append(_stub(name))
+        modules[name] = source[start:end].rstrip('\n')
+        cursor = end
+    parts.append(source[cursor:])
+
+    direct = {
+        name: {call for call in _CALL_RE.findall(code) if call != name and call in modules}
+        for name, code in modules.items()
+    }
+    dependencies = {}
+    for name in modules:
+        seen, stack = set(), list(direct[name])
+        while stack:
+            dep = stack.pop()
+            if dep not in seen:
+                seen.add(dep)
+                stack.extend(direct[dep])
+        dependencies[name] = seen
+    return LibrarySplit(''.join(parts), modules, chart_renderers, dependencies)
+
+
+def _spec_chart_type(spec):
+    chart_type = spec.get('type')
+    if spec.get('renderer') == 'canvas' and chart_type in CANVAS_CHART_TYPES:
+        return 'canvas'
+    return chart_type
+
+
+def mapping_chart_types(mapping):
+    """Tipos de gráfico presentes en un mapping (letra -> spec); 'canvas' para specs con backend Canvas."""
+    return {
+        _spec_chart_type(spec) for key, spec in mapping.items()
+        if not key.startswith('__') and isinstance(spec, dict) and spec.get('type')
+    }
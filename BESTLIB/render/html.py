@@ -1,8 +1,7 @@
 """
 HTML Generator - Generador de HTML para BESTLIB
 """
-from ..utils.json import sanitize_for_json
-import json
+from ..utils.json import dumps_json
 
 
 class HTMLGenerator:
@@ -59,7 +58,7 @@ class HTMLGenerator:
         return f"<script>{js_code}</script>"
     
     @staticmethod
-    def generate_full_html(div_id, css_code, js_code, inline_style="", theme_class=""):
+    def generate_full_html(div_id, css_code, js_code, inline_style="", theme_class="", d3_source='cdn'):
         """
         Genera HTML completo con CSS y JS.
         
@@ -69,12 +68,15 @@ class HTMLGenerator:
             js_code (str): Código JavaScript
             inline_style (str): Estilos inline opcionales
             theme_class (str): Clase CSS del tema (ej: 'bestlib-theme-dark')
+            d3_source (str): 'cdn' agrega el loader de D3 desde CDN (con la
+                copia del kernel como respaldo en el navegador); 'bundled' lo
+                omite (D3 viaja embebido con la librería, ver AssetManager)
         
         Returns:
             str: HTML completo
         """
         # Wrapper seguro para cargar D3.js ANTES del código principal
-        d3_loader = """<script>
+        d3_loader = "" if d3_source == 'bundled' else """<script>
 (function() {
     // Cargar D3.js solo si no está disponible
     if (typeof window.d3 === 'undefined') {
@@ -83,9 +85,17 @@ class HTMLGenerator:
         script.async = false; // Cargar de forma síncrona para asegurar disponibilidad
         script.crossOrigin = 'anonymous';
         script.onerror = function() {
-            // Fallback a CDN alternativo
-            script.src = 'https://unpkg.com/d3@7/dist/d3.min.js';
-            document.head.appendChild(script);
+            // Fallback a CDN alternativo; si también falla, matrix.js pide
+            // al kernel la copia local (ensureD3)
+            var fallback = document.createElement('script');
+            fallback.src = 'https://unpkg.com/d3@7/dist/d3.min.js';
+            fallback.crossOrigin = 'anonymous';
+            fallback.onerror = function() {
+                window.__bestlib_d3_cdn_failed__ = true;
+                fallback.remove();
+            };
+            script.remove();
+            document.head.appendChild(fallback);
         };
         document.head.appendChild(script);
     }
@@ -126,6 +136,5 @@ class HTMLGenerator:
         Returns:
             str: Código JavaScript
         """
-        sanitized = sanitize_for_json(mapping)
-        return json.dumps(sanitized)
+        return dumps_json(mapping)
 
@@ -1,8 +1,8 @@
 """
 Utilidades reutilizables
 """
-from .json import sanitize_for_json
+from .json import sanitize_for_json, dumps_json
 from .figsize import figsize_to_pixels, process_figsize_in_kwargs
 
-__all__ = ['sanitize_for_json', 'figsize_to_pixels', 'process_figsize_in_kwargs']
+__all__ = ['sanitize_for_json', 'dumps_json', 'figsize_to_pixels', 'process_figsize_in_kwargs']
 
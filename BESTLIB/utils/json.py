@@ -1,19 +1,31 @@
 """
-Utilidades para sanitización JSON
+Utilidades para sanitización y serialización JSON
 """
+import json
 import math
 
+try:
+    import numpy as _np  # opcional
+except Exception:
+    _np = None
+
+try:
+    import pandas as _pd  # opcional
+except Exception:
+    _pd = None
+
+try:
+    import orjson as _orjson  # opcional: ruta rápida
+except Exception:
+    _orjson = None
+
 
 def _is_nan_or_inf(value):
     """Verifica si un valor es NaN o Inf de forma segura."""
     if isinstance(value, float):
         return math.isnan(value) or math.isinf(value)
-    try:
-        import numpy as np
-        if isinstance(value, (np.floating, np.integer)):
-            return np.isnan(value) or np.isinf(value)
-    except:
-        pass
+    if _np is not None and isinstance(value, (_np.floating, _np.integer)):
+        return bool(_np.isnan(value) or _np.isinf(value))
     return False
 
 
@@ -49,11 +61,11 @@ def sanitize_for_json(obj, replace_invalid_with=None):
     Returns:
         Objeto sanitizado compatible con JSON
     """
-    try:
-        import numpy as _np  # opcional
-    except Exception:
-        _np = None
+    return _sanitize(obj, 0.0 if replace_invalid_with is None else replace_invalid_with)
 
+
+def _sanitize(obj, invalid):
+    """Cuerpo de ``sanitize_for_json``: NaN/Inf se reemplazan por ``invalid`` tal cual."""
     if obj is None:
         return None
     
@@ -72,7 +84,7 @@ def sanitize_for_json(obj, replace_invalid_with=None):
     # Manejar floats con validación de NaN/Inf
     if isinstance(obj, float):
         if math.isnan(obj) or math.isinf(obj):
-            return replace_invalid_with if replace_invalid_with is not None else 0.0
+            return invalid
         return obj
     
     # Manejar tipos numpy
@@ -85,12 +97,12 @@ def sanitize_for_json(obj, replace_invalid_with=None):
         if isinstance(obj, _np.floating):
             float_val = float(obj)
             if math.isnan(float_val) or math.isinf(float_val):
-                return replace_invalid_with if replace_invalid_with is not None else 0.0
+                return invalid
             return float_val
         
         # Numpy arrays
         if isinstance(obj, _np.ndarray):
-            return sanitize_for_json(obj.tolist(), replace_invalid_with)
+            return _sanitize(obj.tolist(), invalid)
         
         # Numpy bool
         if isinstance(obj, _np.bool_):
@@ -98,11 +110,11 @@ def sanitize_for_json(obj, replace_invalid_with=None):
     
     # Manejar diccionarios
     if isinstance(obj, dict):
-        return {str(k): sanitize_for_json(v, replace_invalid_with) for k, v in obj.items()}
+        return {str(k): _sanitize(v, invalid) for k, v in obj.items()}
     
     # Manejar listas, tuplas, sets
     if isinstance(obj, (list, tuple, set)):
-        return [sanitize_for_json(v, replace_invalid_with) for v in obj]
+        return [_sanitize(v, invalid) for v in obj]
     
     # Manejar tipos especiales por nombre de clase (para tipos numpy con nombres específicos)
     type_name = type(obj).__name__
@@ -111,9 +123,89 @@ def sanitize_for_json(obj, replace_invalid_with=None):
     if type_name in ("float64", "float32", "float16"):
         float_val = float(obj)
         if math.isnan(float_val) or math.isinf(float_val):
-            return replace_invalid_with if replace_invalid_with is not None else 0.0
+            return invalid
         return float_val
     
     # Fallback a string para objetos desconocidos
     return str(obj)
 
+
+def _encode_default(obj, invalid=None):
+    """
+    Convierte tipos no nativos (numpy, pandas, sets) para el encoder JSON.
+    
+    Los arrays se convierten con una sola llamada ``tolist()``; si tienen
+    NaN/Inf se reemplazan antes por ``invalid`` con una máscara vectorizada.
+    """
+    if _np is not None:
+        if isinstance(obj, _np.ndarray):
+            if obj.dtype.kind in 'mM':
+                return obj.astype(str).tolist()
+            if obj.dtype.kind in 'fc':
+                finite = _np.isfinite(obj)
+                if not finite.all():
+                    cleaned = obj.astype(object)
+                    cleaned[~finite] = invalid
+                    return cleaned.tolist()
+            return obj.tolist()
+        if isinstance(obj, _np.integer):
+            return int(obj)
+        if isinstance(obj, _np.floating):
+            return float(obj) if _np.isfinite(obj) else invalid
+        if isinstance(obj, _np.bool_):
+            return bool(obj)
+    if _pd is not None:
+        if isinstance(obj, (_pd.Series, _pd.Index)):
+            return _encode_default(obj.to_numpy(), invalid)
+        if isinstance(obj, _pd.DataFrame):
+            return obj.to_dict('records')
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+def _dumps_stdlib(obj, replace_invalid_with=None):
+    """
+    Encoder estándar: los arrays se limpian vectorizados en ``_encode_default``
+    y, sin NaN/Inf sueltos, el objeto se serializa en una sola pasada en C.
+    Solo un float de Python inválido (o una clave no serializable) obliga a
+    recorrer el objeto con ``_sanitize``.
+    """
+    try:
+        return json.dumps(obj, default=lambda o: _encode_default(o, replace_invalid_with),
+                          allow_nan=False)
+    except (TypeError, ValueError):
+        # NaN/Inf fuera de arrays o claves de diccionario no serializables
+        return json.dumps(_sanitize(obj, replace_invalid_with))
+
+
+def dumps_json(obj, replace_invalid_with=None):
+    """
+    Serializa un objeto a JSON escribiendo directamente arrays de numpy,
+    columnas de pandas y escalares, sin recorrer el objeto en Python.
+    
+    NaN/Inf se escriben como ``null`` (o como ``replace_invalid_with`` si se
+    indica) y los objetos desconocidos se convierten a string.
+    
+    Si orjson está instalado se usa como ruta rápida: escribe NaN/Inf como
+    ``null`` por sí mismo, sin revisar el objeto antes. Un reemplazo
+    explícito o las claves que orjson no admite usan el encoder estándar.
+    
+    Args:
+        obj: Objeto a serializar
+        replace_invalid_with: Valor para reemplazar NaN/Inf (None = ``null``)
+    
+    Returns:
+        str: Texto JSON
+    """
+    if _orjson is not None and replace_invalid_with is None:
+        try:
+            return _orjson.dumps(
+                obj,
+                default=_encode_default,
+                option=(_orjson.OPT_SERIALIZE_NUMPY | _orjson.OPT_NON_STR_KEYS
+                        | _orjson.OPT_PASSTHROUGH_DATETIME),
+            ).decode('utf-8')
+        except (TypeError, _orjson.JSONEncodeError):
+            pass
+    return _dumps_stdlib(obj, replace_invalid_with)
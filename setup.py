@@ -61,6 +61,7 @@ setup(
     ],
     extras_require={
         "ml": ["scikit-learn>=1.0"],
+        "fast": ["orjson>=3.9"],
     },
     project_urls={
         "Bug Reports": "https://github.com/NahiaEscalante/bestlib/issues",
@@ -0,0 +1,45 @@
+"""
+Fixtures compartidas por los tests del comm de Jupyter.
+"""
+import pytest
+
+from BESTLIB.core.comm import CommManager
+
+
+class DummyComm:
+    """Comm falso: guarda cada mensaje enviado junto con sus buffers."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data, buffers=None):
+        self.sent.append((data, buffers))
+
+
+@pytest.fixture
+def open_comm():
+    """Abre un DummyComm para un div_id; se cierra al terminar el test."""
+    opened = []
+
+    def _open(div_id):
+        comm = DummyComm()
+        CommManager._comms[div_id] = comm
+        opened.append(div_id)
+        return comm
+
+    yield _open
+    for div_id in opened:
+        CommManager._comms.pop(div_id, None)
+
+
+@pytest.fixture
+def sent_messages(monkeypatch):
+    """Intercepta CommManager.send: lista de (div_id, event_type, payload)."""
+    sent = []
+
+    def send(cls, div_id, event_type, payload, buffers=None):
+        sent.append((div_id, event_type, payload))
+        return True
+
+    monkeypatch.setattr(CommManager, 'send', classmethod(send))
+    return sent
@@ -0,0 +1,83 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from BESTLIB.core.binary import pack_columns, unpack_columns
+from BESTLIB.core.comm import CommManager
+from BESTLIB.reactive.patches import pack_patch_rows
+
+
+def test_pack_columns_round_trip():
+    schema, buffers = pack_columns({'x': np.arange(5, dtype=np.int64), 'y': np.linspace(0, 1, 5)})
+    assert [c['dtype'] for c in schema['columns']] == ['int32', 'float64']
+    cols = unpack_columns(schema, [bytes(b) for b in buffers])
+    assert cols['x'].tolist() == [0, 1, 2, 3, 4]
+    np.testing.assert_allclose(cols['y'], np.linspace(0, 1, 5))
+
+
+def test_pack_patch_rows_moves_positions_to_one_buffer():
+    patch = {'upsert': [{'category': 'a', 'value': 2, '_rows': [0, 4]},
+                        {'category': 'b', 'value': 1},
+                        {'category': 'c', 'value': 1, '_rows': [7]}], 'remove': []}
+    message, buffers = pack_patch_rows(patch)
+    json.dumps(message)
+    assert all('_rows' not in r for r in message['upsert'])
+    assert message['row_counts'] == [2, None, 1]
+    cols = unpack_columns(message['__binary__'], [bytes(b) for b in buffers])
+    assert cols['_rows'].tolist() == [0, 4, 7]
+    # El parche original (estado para el próximo diff) no se modifica
+    assert patch['upsert'][0]['_rows'] == [0, 4]
+    assert pack_patch_rows({'upsert': [{'category': 'a'}], 'remove': []})[1] is None
+
+
+def test_send_and_receive_buffers(open_comm):
+    comm = open_comm('div-binary')
+    schema, buffers = pack_columns({'v': np.array([1.0, 2.0])})
+    assert CommManager.send('div-binary', 'select', {'letter': 'A', '__binary__': schema}, buffers=buffers)
+    data, buffers = comm.sent[0]
+    assert data['payload']['letter'] == 'A'
+    assert data['payload']['__binary__']['columns'][0]['name'] == 'v'
+
+    events = []
+
+    class DummyEventManager:
+        def emit(self, event_type, payload):
+            events.append(payload)
+
+    class DummyLayout:
+        _event_manager = DummyEventManager()
+
+    layout = DummyLayout()
+    CommManager.register_instance('div-binary', layout)
+    msg = {'content': {'data': data}, 'buffers': [bytes(b) for b in buffers]}
+    CommManager._handle_message('div-binary', msg)
+    CommManager.unregister_instance('div-binary')
+    assert events[0]['__columns__']['v'].tolist() == [1.0, 2.0]
+
+
+def test_select_with_row_ids_resolves_against_dataset():
+    from BESTLIB.data.datasets import decode_row_ids, encode_row_ids
+    from BESTLIB.layouts.matrix import MatrixLayout
+
+    df = pd.DataFrame({'x': np.arange(1000), 'cat': ['a', 'b'] * 500})
+    layout = MatrixLayout("A")
+    layout.register_dataset('main', df)
+    received = []
+    layout._event_manager.on('select', received.append)
+
+    positions = list(range(0, 1000, 2))
+    row_ids = dict(encode_row_ids(positions, len(df)), dataset='main')
+    assert 'bitmask' in row_ids
+    assert decode_row_ids(row_ids, len(df)).tolist() == positions
+    msg = {'content': {'data': {'type': 'select', 'payload': {
+        'items': [], 'count': 500, '__view_letter__': 'A', '__row_ids__': row_ids}}}}
+    CommManager._handle_message(layout.div_id, msg)
+
+    payload = received[-1]
+    assert payload['count'] == 500
+    assert payload['row_ids'].tolist() == positions
+    assert payload['__frame__']['cat'].unique().tolist() == ['a']
+    # Los registros se materializan solo al recorrerlos
+    assert len(payload['items']) == 500 and payload['items']._records is None
+    assert payload['items'][1] == {'x': 2, 'cat': 'a'}
@@ -1,6 +1,11 @@
+import pytest
+
 from BESTLIB.charts.violin import ViolinChart
 from BESTLIB.charts.radviz import RadvizChart
 from BESTLIB.charts.parallel_coordinates import ParallelCoordinatesChart
+from BESTLIB.charts.errorbars import ErrorbarsChart
+from BESTLIB.charts.polar import PolarChart
+from BESTLIB.data.preparators import prepare_line_data
 
 
 def test_violin_chart_returns_values():
@@ -24,3 +29,72 @@ def test_parallel_coordinates_spec_contains_dimensions():
     spec = chart.get_spec(data, dimensions=['x', 'y'])
     assert spec['dimensions'] == ['x', 'y']
 
+
+
+def test_errorbars_aggregation_mode_sem():
+    chart = ErrorbarsChart()
+    data = [{'g': 'a', 'v': 1.0}, {'g': 'a', 'v': 3.0}, {'g': 'b', 'v': 5.0}, {'g': 'b', 'v': 5.0}]
+    spec = chart.get_spec(data, x_col='g', y_col='v', error='sem')
+    assert spec['xTickLabels'] == ['a', 'b']
+    point_a = spec['data'][0]
+    assert point_a['y'] == 2.0
+    assert abs(point_a['yerr'] - 1.0) < 1e-9
+    assert spec['data'][1]['yerr'] == 0.0
+
+
+def test_errorbars_aggregation_mode_bootstrap_ci():
+    chart = ErrorbarsChart()
+    data = [{'x': i % 3, 'v': float(i)} for i in range(60)]
+    spec = chart.get_spec(data, x_col='x', y_col='v', error='ci', n_boot=200, random_state=0)
+    assert 'xTickLabels' not in spec
+    for point in spec['data']:
+        assert point['ylo'] <= point['y'] <= point['yhi']
+
+
+def test_polar_binned_mode_counts_and_mean():
+    chart = PolarChart()
+    data = [
+        {'dir': 10, 'speed': 1.0, 'temp': 10.0},
+        {'dir': 20, 'speed': 1.5, 'temp': 20.0},
+        {'dir': 100, 'speed': 9.0, 'temp': 5.0},
+        {'dir': 370, 'speed': 0.5, 'temp': 30.0},
+    ]
+    spec = chart.get_spec(data, angle_col='dir', radius_col='speed', angle_unit='deg', sectors=4, rings=2)
+    assert spec['binned'] is True
+    cells = {(c['sector'], c['ring']): c for c in spec['data']}
+    assert cells[(0, 0)]['value'] == 3
+    assert cells[(1, 1)]['value'] == 1
+    spec_mean = chart.get_spec(data, angle_col='dir', radius_col='speed', angle_unit='deg',
+                               sectors=4, rings=2, agg='mean', value_col='temp')
+    cells = {(c['sector'], c['ring']): c for c in spec_mean['data']}
+    assert cells[(0, 0)]['value'] == 20.0
+
+
+def test_prepare_line_data_splits_series_sorted_by_x():
+    import pandas as pd
+    df = pd.DataFrame({
+        'x': [3, 1, 2, 2, 1],
+        'y': [30.0, 10.0, 20.0, 200.0, 100.0],
+        's': ['b', 'b', 'b', 'a', 'a'],
+    })
+    series = prepare_line_data(df, x_col='x', y_col='y', series_col='s')['series']
+    assert list(series.keys()) == ['b', 'a']
+    assert [p['x'] for p in series['b']] == [1.0, 2.0, 3.0]
+    assert [p['y'] for p in series['a']] == [100.0, 200.0]
+    assert series['a'][0]['series'] == 'a'
+
+
+def test_resolve_renderer_canvas_modes():
+    from BESTLIB.charts.spec_utils import CANVAS_AUTO_THRESHOLD, resolve_renderer
+    from BESTLIB.core.exceptions import ChartError
+    small = {'type': 'scatter', 'data': [{'x': 1, 'y': 2}]}
+    assert resolve_renderer(small) is small
+    dense = {'type': 'scatter', 'data': [{'x': i, 'y': i} for i in range(CANVAS_AUTO_THRESHOLD + 1)]}
+    assert resolve_renderer(dense)['renderer'] == 'canvas'
+    assert resolve_renderer({**dense, 'renderer': 'svg'})['renderer'] == 'svg'
+    forced = ParallelCoordinatesChart().get_spec([{'x': 1, 'y': 2}], dimensions=['x', 'y'], renderer='canvas')
+    assert resolve_renderer(forced)['renderer'] == 'canvas'
+    bar = {'type': 'bar', 'data': [], 'renderer': 'canvas'}
+    assert resolve_renderer(bar) is bar
+    with pytest.raises(ChartError):
+        resolve_renderer({'type': 'scatter', 'data': [], 'renderer': 'webgl'})
@@ -36,3 +36,60 @@ def test_comm_manager_legacy_handlers():
     CommManager.unregister_instance('div-legacy')
     assert calls and calls[0]['items'] == [1]
 
+
+
+def test_comm_manager_coalesces_pending_selects():
+    events = []
+    class DummyLayout:
+        _event_manager = DummyEventManager(events)
+    layout = DummyLayout()
+    CommManager.register_instance('div-coalesce', layout)
+    CommManager.reset_event_stats()
+    # Simular una ráfaga encolada antes de que el kernel drene los pendientes
+    CommManager._drain_scheduled = True
+    try:
+        for i in range(5):
+            msg = {'content': {'data': {'type': 'select',
+                                        'payload': {'items': [i], '__view_letter__': 'S'}}}}
+            CommManager._enqueue_message('div-coalesce', msg)
+        other = {'content': {'data': {'type': 'select',
+                                      'payload': {'items': ['x'], '__view_letter__': 'T'}}}}
+        CommManager._enqueue_message('div-coalesce', other)
+        CommManager.flush_pending()
+    finally:
+        CommManager._drain_scheduled = False
+        CommManager.unregister_instance('div-coalesce')
+    assert [p['items'] for _, p in events] == [[4], ['x']]
+    stats = CommManager.get_event_stats()
+    assert stats['received'] == 6 and stats['processed'] == 2 and stats['dropped'] == 4
+    assert stats['dropped_by_key'] == {'div-coalesce:S:select': 4}
+
+
+def test_comm_manager_sends_bundled_d3_on_request(sent_messages):
+    from BESTLIB.render.assets import AssetManager
+    sent = sent_messages
+    msg = {'content': {'data': {'type': 'd3_request', 'payload': {}}}}
+    CommManager._handle_message('__bestlib_assets__', msg)
+    assert [(div_id, event_type) for div_id, event_type, _ in sent] == [('__bestlib_assets__', 'd3_bundle')]
+    if AssetManager.load_d3():
+        assert sent[0][2]['js'] == AssetManager.d3_bundle_js()
+
+
+def test_comm_manager_keeps_order_of_click_after_select():
+    events = []
+    class DummyLayout:
+        _event_manager = DummyEventManager(events)
+    layout = DummyLayout()
+    CommManager.register_instance('div-order', layout)
+    CommManager._drain_scheduled = True
+    try:
+        for event_type, items in (('select', [1]), ('select', [2]), ('point_click', ['p'])):
+            msg = {'content': {'data': {'type': event_type,
+                                        'payload': {'items': items, '__view_letter__': 'S'}}}}
+            CommManager._enqueue_message('div-order', msg)
+        CommManager.flush_pending()
+    finally:
+        CommManager._drain_scheduled = False
+        CommManager.unregister_instance('div-order')
+    # El brush obsoleto se descarta; el click llega después del último brush
+    assert [(t, p['items']) for t, p in events] == [('select', [2]), ('point_click', ['p'])]
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from BESTLIB.data.confusion import ConfusionMatrixEngine
+from BESTLIB.layouts.reactive import ReactiveMatrixLayout
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(0)
+    y_true = rng.choice(['cat', 'dog', 'fox'], size=500)
+    y_pred = np.where(rng.random(500) < 0.7, y_true, rng.choice(['cat', 'dog', 'fox'], size=500))
+    return pd.DataFrame({'true': y_true, 'pred': y_pred})
+
+
+def _reference_counts(y_true, y_pred, labels):
+    k = len(labels)
+    cm = np.zeros((k, k), dtype=int)
+    pos = {label: i for i, label in enumerate(labels)}
+    for t, p in zip(y_true, y_pred):
+        cm[pos[t], pos[p]] += 1
+    return cm
+
+
+def test_counts_match_reference(predictions):
+    engine = ConfusionMatrixEngine(predictions['true'], predictions['pred'])
+    assert engine.labels == ['cat', 'dog', 'fox']
+    expected = _reference_counts(predictions['true'], predictions['pred'], engine.labels)
+    np.testing.assert_array_equal(engine.counts(), expected)
+
+
+def test_subset_by_positions_and_labels(predictions):
+    engine = ConfusionMatrixEngine(predictions['true'], predictions['pred'])
+    subset = predictions.iloc[10:60]
+    expected = _reference_counts(subset['true'], subset['pred'], engine.labels)
+    np.testing.assert_array_equal(engine.counts(np.arange(10, 60)), expected)
+    np.testing.assert_array_equal(engine.counts_from_labels(subset['true'], subset['pred']), expected)
+
+
+def test_normalize_rows_handles_empty_rows():
+    engine = ConfusionMatrixEngine(['a', 'a', 'b'], ['a', 'b', 'b'], labels=['a', 'b', 'c'])
+    cm = engine.matrix(normalize='true')
+    np.testing.assert_allclose(cm, [[0.5, 0.5, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 0.0]])
+    assert engine.matrix(normalize='all').sum() == pytest.approx(1.0)
+
+
+def test_to_long_layout():
+    engine = ConfusionMatrixEngine(['a', 'b'], ['b', 'b'])
+    long_df = engine.to_long(engine.counts())
+    row = long_df[(long_df['index'] == 'a') & (long_df['Pred'] == 'b')]
+    assert row['Value'].iloc[0] == 1.0
+    assert len(long_df) == 4
+
+
+def test_add_confusion_matrix_registers_heatmap(predictions):
+    layout = ReactiveMatrixLayout("C")
+    layout.set_data(predictions)
+    layout.add_confusion_matrix('C', y_true_col='true', y_pred_col='pred')
+    spec = layout._layout._map['C']
+    assert spec['type'] == 'heatmap'
+    assert len(spec['data']) == 9
+    assert len(layout._confusion_engines) == 1
+
+
+def test_confusion_update_uses_row_positions(predictions, monkeypatch):
+    from BESTLIB.core.comm import CommManager
+
+    data = predictions.assign(x=np.arange(len(predictions), dtype=float), y=0.0)
+    layout = ReactiveMatrixLayout("SC")
+    layout.set_data(data)
+    layout.add_scatter('S', x_col='x', y_col='y', interactive=True)
+    layout.add_confusion_matrix('C', y_true_col='true', y_pred_col='pred', normalize=False)
+    engine = next(iter(layout._confusion_engines.values()))
+
+    def by_labels(*args):
+        raise AssertionError("la selección por posiciones no debe recorrer registros")
+    monkeypatch.setattr(engine, 'counts_from_labels', by_labels)
+
+    msg = {'content': {'data': {'type': 'select', 'payload': {
+        'items': [], '__view_letter__': 'S', '__scatter_letter__': 'S',
+        '__brush__': {'dataset': 'main', 'extents': {'x': [10, 59], 'y': [-1, 1]}}}}}}
+    CommManager._handle_message(layout._layout.div_id, msg)
+
+    subset = predictions.iloc[10:60]
+    expected = _reference_counts(subset['true'], subset['pred'], engine.labels)
+    cells = {(cell['y'], cell['x']): cell['value'] for cell in layout._layout._map['C']['data']}
+    for i, t in enumerate(engine.labels):
+        for j, p in enumerate(engine.labels):
+            assert cells[(t, p)] == expected[i, j]
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from BESTLIB.charts import ChartRegistry
+from BESTLIB.core.exceptions import DataError
+from BESTLIB.data.pyramid import (
+    HeatmapPyramid,
+    build_heatmap_pyramid,
+    get_heatmap_pyramid,
+    resolve_heatmap_pyramid,
+    clear_pyramid_cache,
+)
+
+
+@pytest.fixture
+def long_df():
+    rows, cols = 20, 30
+    yy, xx = np.meshgrid(np.arange(rows), np.arange(cols), indexing='ij')
+    return pd.DataFrame({
+        'x': xx.ravel(),
+        'y': yy.ravel(),
+        'v': (xx * rows + yy).ravel().astype(float),
+    })
+
+
+def test_pyramid_levels_mean_and_max():
+    matrix = np.arange(16, dtype=float).reshape(4, 4)
+    mean_pyr = HeatmapPyramid(matrix, list('abcd'), list('wxyz'), agg='mean', tile_size=2)
+    max_pyr = HeatmapPyramid(matrix, list('abcd'), list('wxyz'), agg='max', tile_size=2)
+    assert mean_pyr.n_levels == 2
+    assert mean_pyr.level_shape(1) == (2, 2)
+    coarse = {(c['_row'], c['_col']): c['value'] for c in mean_pyr.get_tile(1)['cells']}
+    assert coarse[(0, 0)] == pytest.approx((0 + 1 + 4 + 5) / 4)
+    coarse_max = {(c['_row'], c['_col']): c['value'] for c in max_pyr.get_tile(1)['cells']}
+    assert coarse_max[(1, 1)] == 15.0
+
+
+def test_pyramid_mean_is_exact_with_odd_shapes_and_nans():
+    matrix = np.array([[1.0, np.nan, 3.0], [4.0, 5.0, 6.0], [7.0, 8.0, np.nan]])
+    pyr = HeatmapPyramid(matrix, list('abc'), list('xyz'), agg='mean', tile_size=2)
+    assert pyr.level_shape(1) == (2, 2)
+    top = {(c['_row'], c['_col']): c for c in pyr.get_tile(1)['cells']}
+    # Bloque [0:2, 0:2] ignora el NaN; bloque [2, 2] solo contiene NaN
+    assert top[(0, 0)]['value'] == pytest.approx((1 + 4 + 5) / 3)
+    assert (1, 1) not in top
+    assert top[(0, 0)]['x'] == 'a…b'
+
+
+def test_tiles_cover_full_resolution(long_df):
+    clear_pyramid_cache()
+    pyr = build_heatmap_pyramid(long_df, x_col='x', y_col='y', value_col='v', tile_size=8)
+    assert pyr.level_shape(0) == (20, 30)
+    assert pyr.level_shape(pyr.coarsest_level)[1] <= 8
+    meta = pyr.metadata()
+    level0 = meta['levels'][0]
+    total = sum(
+        len(pyr.get_tile(0, tx, ty)['cells'])
+        for tx in range(level0['tiles_x'])
+        for ty in range(level0['tiles_y'])
+    )
+    assert total == 20 * 30
+    with pytest.raises(DataError):
+        pyr.get_tile(0, level0['tiles_x'], 0)
+
+
+def test_pyramid_cached_per_dataset(long_df):
+    clear_pyramid_cache()
+    first = build_heatmap_pyramid(long_df, x_col='x', y_col='y', value_col='v', tile_size=8)
+    second = build_heatmap_pyramid(long_df.copy(), x_col='x', y_col='y', value_col='v', tile_size=8)
+    assert first is second
+    assert get_heatmap_pyramid(first.pyramid_id) is first
+    changed = long_df.copy()
+    changed.loc[0, 'v'] = -1.0
+    third = build_heatmap_pyramid(changed, x_col='x', y_col='y', value_col='v', tile_size=8)
+    assert third is not first
+
+
+def test_heatmap_spec_ships_coarsest_level(long_df):
+    chart = ChartRegistry.get('heatmap')
+    spec = chart.get_spec(long_df, x_col='x', y_col='y', value_col='v', pyramid=True, tile_size=8)
+    meta = spec['pyramid']
+    assert spec['type'] == 'heatmap'
+    assert len(spec['x_labels']) <= 8 and len(spec['y_labels']) <= 8
+    assert all(c['_level'] == meta['coarsest'] for c in spec['data'])
+    assert 'tile_size' not in spec and 'pyramid_agg' not in spec
+
+
+def test_evicted_pyramid_is_rebuilt_for_tiles(long_df, sent_messages):
+    from BESTLIB.layouts.matrix import MatrixLayout
+
+    clear_pyramid_cache()
+    pyr = build_heatmap_pyramid(long_df, x_col='x', y_col='y', value_col='v', tile_size=8)
+    clear_pyramid_cache()
+    rebuilt = resolve_heatmap_pyramid(pyr.pyramid_id)
+    assert rebuilt is not None and rebuilt.pyramid_id == pyr.pyramid_id
+
+    layout = MatrixLayout("A")
+    clear_pyramid_cache()
+    layout._handle_heatmap_tile({'pyramid_id': pyr.pyramid_id, 'level': 0, '__view_letter__': 'A'})
+    _, event_type, tile = sent_messages[-1]
+    assert event_type == 'heatmap_tile'
+    assert tile['cells'] and tile['__view_letter__'] == 'A'
+
+    # Sin datos de origen el navegador recibe un tile con error
+    layout._handle_heatmap_tile({'pyramid_id': 'desconocida', 'level': 0, '__view_letter__': 'A'})
+    tile = sent_messages[-1][2]
+    assert tile['error'] and 'cells' not in tile
@@ -0,0 +1,83 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from BESTLIB.utils.json import dumps_json, sanitize_for_json, _dumps_stdlib
+
+
+def test_dumps_json_writes_invalid_as_null():
+    obj = {
+        'nan': float('nan'),
+        'values': [1, np.int64(3), np.float32(2.5), -np.inf],
+        'text': 'NaN "quoted" Infinity',
+        'array': np.array([1.0, np.nan, np.inf]),
+        'missing': None,
+        'pair': (1, 2),
+    }
+    expected = json.loads(json.dumps(sanitize_for_json(obj)))
+    expected.update(nan=None, values=[1, 3, 2.5, None], array=[1.0, None, None])
+    assert json.loads(dumps_json(obj)) == expected
+    assert json.loads(_dumps_stdlib(obj)) == expected
+    # Con reemplazo explícito equivale a sanitize_for_json
+    assert json.loads(dumps_json(obj, replace_invalid_with=0.0)) == json.loads(json.dumps(sanitize_for_json(obj)))
+
+
+def test_dumps_json_replacement_and_pandas_columns():
+    series = pd.Series([1.5, np.nan])
+    assert json.loads(dumps_json({'s': series}, replace_invalid_with=-1)) == {'s': [1.5, -1]}
+    frame = pd.DataFrame({'a': [1, 2]})
+    assert json.loads(dumps_json(frame)) == [{'a': 1}, {'a': 2}]
+
+
+def test_dumps_json_non_string_keys_fall_back():
+    assert json.loads(dumps_json({(1, 2): 'x', np.int64(5): 'y'})) == {'(1, 2)': 'x', '5': 'y'}
+
+
+def test_dumps_json_keeps_orjson_output_with_nulls(monkeypatch):
+    pytest.importorskip('orjson')
+    from BESTLIB.utils import json as json_utils
+
+    def stdlib(*args, **kwargs):
+        raise AssertionError("la salida de orjson debe conservarse")
+    monkeypatch.setattr(json_utils, '_dumps_stdlib', stdlib)
+    obj = {'rows': [{'v': None, 'w': float('nan')}], 'col': pd.Series([np.nan, 2.0], dtype=object)}
+    assert json.loads(dumps_json(obj)) == {'rows': [{'v': None, 'w': None}], 'col': [None, 2.0]}
+
+
+def _best_of(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _large_spec(n=30000):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({'x': rng.random(n), 'y': rng.random(n), 'cat': rng.choice(['a', 'b'], n)})
+    return {'type': 'scatter', 'data': frame.to_dict('records'), 'col': frame['x'].to_numpy()}
+
+
+@pytest.mark.parametrize('orjson', [True, False])
+def test_dumps_json_is_faster_than_sanitize_with_and_without_nan(monkeypatch, orjson):
+    from BESTLIB.utils import json as json_utils
+    if orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(json_utils, '_orjson', None)
+    spec = _large_spec()
+    single_nan = dict(spec, col=spec['col'].copy())
+    single_nan['col'][123] = np.nan
+    for obj in (spec, single_nan):
+        baseline = _best_of(lambda: json.dumps(sanitize_for_json(obj)))
+        assert _best_of(lambda: dumps_json(obj)) < baseline
+    if orjson:
+        # Un NaN suelto en los registros no obliga a recorrer el objeto
+        records_nan = dict(spec, data=list(spec['data']))
+        records_nan['data'][7] = dict(records_nan['data'][7], x=float('nan'))
+        baseline = _best_of(lambda: json.dumps(sanitize_for_json(records_nan)))
+        assert _best_of(lambda: dumps_json(records_nan)) < baseline / 2
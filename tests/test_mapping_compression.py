@@ -0,0 +1,53 @@
+import base64
+import gzip
+import json
+import re
+
+import pytest
+
+from BESTLIB.render.assets import AssetManager
+from BESTLIB.render.builder import JSBuilder
+
+
+MAPPING = {'A': {'type': 'bar', 'data': [{'category': 'x', 'value': i} for i in range(50)]}}
+
+
+@pytest.fixture
+def cdn_d3():
+    """La compresión requiere red en el navegador (pako desde CDN): modo 'cdn'."""
+    AssetManager.set_d3_mode('cdn')
+    yield
+    AssetManager.set_d3_mode('auto')
+
+
+def test_small_mapping_stays_inline():
+    js = JSBuilder.build_render_call('div-1', 'A', MAPPING)
+    assert 'const mapping = {' in js
+    assert 'bestlibInflateMapping' not in js
+
+
+def test_compressed_mapping_round_trip(cdn_d3):
+    js = JSBuilder.build_full_js('/* lib */', 'div-1', 'A', MAPPING, compress=True)
+    assert 'DecompressionStream' in js and 'const mapping =' not in js
+    payload = re.search(r'bestlibInflateMapping\("([A-Za-z0-9+/=]+)"\)', js).group(1)
+    assert json.loads(gzip.decompress(base64.b64decode(payload))) == MAPPING
+
+
+def test_auto_mode_uses_threshold(cdn_d3):
+    original = JSBuilder.compress_threshold
+    JSBuilder.compress_threshold = 10
+    try:
+        assert 'bestlibInflateMapping("' in JSBuilder.build_render_call('div-1', 'A', MAPPING)
+    finally:
+        JSBuilder.compress_threshold = original
+
+
+def test_bundled_d3_mode_never_compresses():
+    if not AssetManager.load_d3():
+        pytest.skip("d3.min.js no está incluido")
+    AssetManager.set_d3_mode('bundled')
+    try:
+        js = JSBuilder.build_full_js('/* lib */', 'div-1', 'A', MAPPING, compress=True)
+    finally:
+        AssetManager.set_d3_mode('auto')
+    assert 'const mapping = {' in js and 'pako' not in js
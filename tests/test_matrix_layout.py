@@ -17,3 +17,176 @@ def test_validate_mapping_letters_detects_extra():
     with pytest.raises(LayoutError):
         layout._validate_mapping_letters({'B': {'type': 'dummy'}})
 
+
+
+def test_registered_specs_are_frozen_and_shared():
+    from BESTLIB.charts.spec_utils import FrozenSpec
+    rows = [{'category': 'a', 'value': 1}]
+    layout = MatrixLayout("A")
+    layout._register_spec('A', {'type': 'bar', 'data': rows})
+    stored = layout._map['A']
+    assert isinstance(stored, FrozenSpec)
+    assert stored['data'] is rows  # sin copia profunda
+    with pytest.raises(TypeError):
+        stored['title'] = 'x'
+    layout.update_spec_metadata('A', title='x')
+    assert layout._map['A']['title'] == 'x'
+    assert 'title' not in stored  # copy-on-write
+    assert layout._map['A']['data'] is rows
+    assert layout._prepare_repr_data()['mapping_merged']['A']['data'] is rows
+
+
+def _confirm_assets_loaded():
+    """Simula el mensaje del navegador que confirma que ejecutó matrix.js."""
+    from BESTLIB.core.comm import CommManager
+    from BESTLIB.render.assets import AssetManager
+    message = {'type': 'assets_loaded', 'payload': {'hash': AssetManager.asset_hash()}}
+    CommManager._handle_message('__bestlib_assets__', {'content': {'data': message}})
+
+
+def test_assets_injected_once_per_session():
+    """matrix.js viaja hasta que el navegador confirma la carga; luego solo el guard."""
+    from BESTLIB.render.assets import AssetManager
+    AssetManager.set_dedupe(True)
+    try:
+        first = MatrixLayout("A")
+        second = MatrixLayout("B")
+        js_first = first._repr_mimebundle_()['application/javascript']
+        asset_hash = AssetManager.asset_hash()
+        assert 'global.render = render' in js_first
+        assert f'window.__bestlib_assets__ = "{asset_hash}"' in js_first
+        assert "type: 'assets_loaded'" in js_first
+        # Sin confirmación (salida no mostrada, JupyterLab) la librería vuelve a viajar
+        assert 'global.render = render' in second._repr_mimebundle_()['application/javascript']
+        _confirm_assets_loaded()
+        bundle = second._repr_mimebundle_()
+        assert 'global.render = render' not in bundle['application/javascript']
+        assert f'const ASSETS = "{asset_hash}"' in bundle['application/javascript']
+        assert '<style></style>' in bundle['text/html']
+    finally:
+        AssetManager.set_dedupe(True)
+        AssetManager._injected_hash = None
+
+
+def test_bundled_d3_mode_skips_cdn():
+    """En modo 'bundled' D3 viaja embebido una vez y el HTML no usa el CDN."""
+    from BESTLIB.render.assets import AssetManager
+    AssetManager.set_d3_mode('bundled')
+    AssetManager.set_dedupe(True)
+    try:
+        bundle = MatrixLayout("A")._repr_mimebundle_()
+        assert 'cdn.jsdelivr.net' not in bundle['text/html']
+        assert "if (typeof window.d3 === 'undefined')" in bundle['application/javascript']
+        _confirm_assets_loaded()
+        again = MatrixLayout("B")._repr_mimebundle_()
+        assert 'd3js.org' not in again['application/javascript']
+        with pytest.raises(ValueError):
+            AssetManager.set_d3_mode('offline')
+    finally:
+        AssetManager.set_d3_mode('auto')
+        AssetManager._injected_hash = None
+
+
+def test_renderers_split_by_chart_type():
+    """El core no incluye renderers; cada salida agrega solo los de sus gráficos, una vez."""
+    from BESTLIB.render.assets import AssetManager
+    previous = AssetManager.dedupe_assets
+    AssetManager.set_dedupe(True)
+    try:
+        split = AssetManager.library_split()
+        assert split is not None
+        assert split.chart_renderers['bar'] == 'renderBarChartD3'
+        assert len(split.core) < len(AssetManager.load_js())
+        layout = MatrixLayout("A")
+        layout._register_spec('A', {'type': 'bar', 'data': [{'category': 'a', 'value': 1}]})
+        js_first = layout._repr_mimebundle_()['application/javascript']
+        assert 'loadedRenderers.renderBarChartD3' in js_first
+        assert 'loadedRenderers.renderScatterPlotD3' not in js_first
+        _confirm_assets_loaded()
+        js_again = layout._repr_mimebundle_()['application/javascript']
+        assert 'loadedRenderers.renderBarChartD3' not in js_again
+        # El guard exige el renderer que trajo la salida anterior
+        assert 'const RENDERERS = ["renderBarChartD3"]' in js_again
+        # Tras recargar la página el kernel envía todos los renderers
+        assert 'loadedRenderers.renderScatterPlotD3' in AssetManager.asset_payload()['js']
+    finally:
+        AssetManager.set_dedupe(previous)
+        AssetManager._injected_hash = None
+
+
+def test_large_grid_defers_offscreen_specs(monkeypatch, sent_messages):
+    """Con un comm confirmado, las celdas fuera de las primeras filas viajan sin datos."""
+    from BESTLIB.core.comm import CommManager
+    monkeypatch.setattr(CommManager, '_comm_registered', True)
+    layout = MatrixLayout("ABCD\nEFGH\nIJKL")
+    rows = [{'category': 'a', 'value': 1}]
+    for letter in "ABCDEFGHIJKL":
+        layout._register_spec(letter, {'type': 'bar', 'data': rows})
+    # Target registrado pero sin comm abierto por el navegador: specs completos
+    mapping = layout._prepare_repr_data()['mapping_merged']
+    assert mapping['__lazy__'] is True and mapping['I']['data'] is rows
+    monkeypatch.setattr(CommManager, '_browser_comm_seen', True)
+    mapping = layout._prepare_repr_data()['mapping_merged']
+    assert mapping['A']['data'] is rows
+    assert mapping['I']['__deferred__'] is True
+    assert 'data' not in mapping['I'] and mapping['I']['type'] == 'bar'
+    layout._handle_cell_spec({'letter': 'I'})
+    assert [m[1:] for m in sent_messages] == [
+        ('cell_spec', {'letter': 'I', 'spec': {'type': 'bar', 'data': rows}, '__view_letter__': 'I'})]
+    small = MatrixLayout("AB", lazy=False)
+    small._register_spec('A', {'type': 'bar', 'data': rows})
+    assert '__lazy__' not in small._prepare_repr_data()['mapping_merged']
+
+
+def test_repr_memoized_until_specs_change(monkeypatch):
+    """Repetir la salida de un layout sin cambios no vuelve a serializar el mapping."""
+    from BESTLIB.render import builder
+    calls = []
+    original = builder.dumps_json
+    monkeypatch.setattr(builder, 'dumps_json', lambda obj, **kw: calls.append(1) or original(obj, **kw))
+    layout = MatrixLayout("A")
+    layout._register_spec('A', {'type': 'bar', 'data': [{'category': 'a', 'value': 1}]})
+    first = layout._repr_html_()
+    assert layout._repr_html_() == first
+    assert layout._prepare_repr_data()['mapping_merged'] is layout._prepare_repr_data()['mapping_merged']
+    assert len(calls) == 1
+    layout.update_spec_metadata('A', title='x')
+    assert '"title":"x"' in layout._repr_html_()
+    assert len(calls) == 2
+
+
+def test_render_cache_lives_with_the_layout():
+    """El JS memoizado (con los datos embebidos) se libera junto con el layout."""
+    import gc
+    import weakref
+    layout = MatrixLayout("A")
+    layout._register_spec('A', {'type': 'bar', 'data': [{'category': 'a', 'value': 1}]})
+    layout._repr_mimebundle_()
+    assert len(layout._render_cache) == 1
+    ref = weakref.ref(layout)
+    del layout
+    gc.collect()
+    assert ref() is None
+
+
+def test_grid_geometry_cached_and_sent_to_browser():
+    """El layout se parsea una vez y el mapping lleva las regiones ya fusionadas."""
+    from BESTLIB.core.layout import LayoutEngine
+    grid = LayoutEngine.parse_ascii_layout("AAB\nAAC\n.DD")
+    assert LayoutEngine.parse_ascii_layout("AAB\nAAC\n.DD") is grid
+    assert grid.regions(True) == [['A', 0, 0, 2, 2], ['B', 0, 2, 1, 1],
+                                  ['C', 1, 2, 1, 1], ['D', 2, 1, 1, 2]]
+    assert len(grid.regions(False)) == 8
+    assert grid.regions(['D'])[-1] == ['D', 2, 1, 1, 2]
+    # El grid cacheado es compartido: solo una copia se puede modificar
+    with pytest.raises(LayoutError):
+        grid.add_cell('2_0', 2, 0, 'E')
+    own = grid.copy()
+    own.add_cell('2_0', 2, 0, 'E')
+    assert own.regions(True)[-2] == ['E', 2, 0, 1, 1]
+    assert LayoutEngine.parse_ascii_layout("AAB\nAAC\n.DD").get_cell('2_0')['letter'] == '.'
+    layout = MatrixLayout("AAB\nAAC\n.DD", row_heights=[200, 200, 150.0]).merge_all()
+    geometry = layout._prepare_repr_data()['mapping_merged']['__grid__']
+    assert geometry['regions'] == grid.regions(True)
+    assert geometry['templateRows'] == 'minmax(200px, auto) minmax(200px, auto) minmax(150px, auto)'
+    assert geometry['templateColumns'] == 'repeat(3, 1fr)'
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from BESTLIB.layouts.reactive import ReactiveMatrixLayout
+from BESTLIB.reactive.engine import DataflowGraph
+
+
+def test_graph_recomputes_once_in_topological_order():
+    """Diamante fuente -> (filtro, agregado) -> vista: la vista corre una sola vez por cambio."""
+    calls = []
+    graph = DataflowGraph()
+    graph.add_source('rows', [1, 2, 3])
+    graph.add_node('even', lambda rows: [r for r in rows if r % 2 == 0], ['rows'], kind='filter')
+    graph.add_node('total', lambda rows: sum(rows), ['rows'], kind='aggregate')
+    graph.add_node('view', lambda even, total: calls.append((even, total)), ['even', 'total'])
+    graph.set_source('rows', [1, 2, 3, 4])
+    assert calls == [([2, 4], 10)]
+    # 'even' no cambia pero 'total' sí: la vista se recalcula
+    graph.set_source('rows', [2, 4, 5])
+    assert calls[-1] == ([2, 4], 11)
+    # Mismo filtro y mismo total: la vista se omite
+    graph.set_source('rows', [2, 5, 4])
+    assert len(calls) == 2 and graph.stats['skipped'] == 1
+    with pytest.raises(ValueError):
+        graph.add_edge('view', 'rows')
+
+
+def test_chained_views_follow_upstream_changes():
+    """A -> B -> C: si B cambia su selección al recalcularse, C se actualiza en la misma pasada."""
+    order = []
+    graph = DataflowGraph()
+    graph.add_source('sel:A')
+    graph.add_source('sel:B')
+    graph.add_node('view:C', lambda sel: order.append(('C', sel)), ['sel:B'])
+    graph.add_node('view:B', lambda sel: (order.append(('B', sel)), graph.set_source('sel:B', [])), ['sel:A'])
+    graph.add_edge('view:B', 'sel:B')
+    graph.set_source('sel:A', ['x'])
+    assert order == [('B', ['x']), ('C', [])]
+
+
+def test_linked_views_registered_in_graph():
+    df = pd.DataFrame({'x': [1, 2, 3, 4], 'y': [1, 2, 3, 4], 'cat': ['a', 'a', 'b', 'c']})
+    layout = ReactiveMatrixLayout("SBH")
+    layout.set_data(df)
+    layout.add_scatter('S', x_col='x', y_col='y', category_col='cat')
+    layout.add_barchart('B', category_col='cat', linked_to='S')
+    layout.add_histogram('H', column='x', linked_to='S')
+    assert {'selection:S', 'view:B', 'view:H'} <= set(layout._graph._nodes)
+    selection = layout._scatter_selection_models['S']
+    # Un solo callback del grafo por modelo, sin importar cuántas vistas cuelguen de él
+    graph_callbacks = [cb for cb in selection._callbacks if cb.__qualname__.endswith('_selection_source.<locals>.<lambda>')]
+    assert len(graph_callbacks) == 1
+    before = layout._graph.stats['computed']
+    selection.update(df.to_dict('records')[:2])
+    assert layout._graph.stats['computed'] == before + 2
+
+
+def test_views_recompute_same_selection_after_redisplay():
+    """Tras volver a mostrar el layout, repetir la última selección actualiza la vista enlazada."""
+    calls = []
+    df = pd.DataFrame({'x': [1, 2, 3, 4], 'y': [1, 2, 3, 4]})
+    layout = ReactiveMatrixLayout("SB")
+    layout.set_data(df)
+    layout.add_scatter('S', x_col='x', y_col='y', interactive=True)
+    sel = layout._scatter_selection_models['S']
+    layout._link_view('B', sel, lambda items, count: calls.append(count))
+    rows = df.head(3).to_dict('records')
+    sel.update(rows)
+    sel.update(list(rows))
+    assert len(calls) == 1
+    layout._repr_mimebundle_()
+    sel.update(list(rows))
+    assert len(calls) == 2
@@ -226,3 +226,153 @@ def test_no_letters_not_in_layout_error(sample_iris_df):
     assert 'A' not in layout2._layout._map
     assert 'B' not in layout2._layout._map
 
+
+
+def test_shared_dataset_serialized_once(sample_iris_df):
+    """Scatter y bar chart sobre los mismos datos comparten __datasets__."""
+    layout = ReactiveMatrixLayout("SB")
+    layout.set_data(sample_iris_df)
+    layout.add_scatter('S', x_col='petal_length', y_col='petal_width', category_col='species')
+    layout.add_barchart('B', category_col='species')
+    mapping = layout._layout._prepare_repr_data()['mapping_merged']
+
+    table = mapping['__datasets__']['main']
+    assert table['length'] == len(sample_iris_df)
+    scatter_item = mapping['S']['data'][0]
+    assert '_original_row' not in scatter_item and scatter_item['_row'] == 0
+    bar_rows = [pos for item in mapping['B']['data'] for pos in item['_rows']]
+    assert sorted(bar_rows) == list(range(len(sample_iris_df)))
+    # El spec registrado conserva las filas originales
+    assert '_original_row' in layout._layout._map['S']['data'][0]
+
+
+def test_shared_dataset_keeps_duplicate_row_positions():
+    """Filas duplicadas conservan cada una su posición en el DataFrame."""
+    df = pd.DataFrame({'x': [1, 1, 2], 'y': [1, 1, 2], 'cat': ['a', 'a', 'b']})
+    layout = ReactiveMatrixLayout("SB")
+    layout.set_data(df)
+    layout.add_scatter('S', x_col='x', y_col='y', category_col='cat')
+    layout.add_barchart('B', category_col='cat')
+    mapping = layout._layout._prepare_repr_data()['mapping_merged']
+    assert [item['_row'] for item in mapping['S']['data']] == [0, 1, 2]
+    assert [item['_rows'] for item in mapping['B']['data']] == [[0, 1], [2]]
+    assert '_position' not in mapping['S']['data'][0]
+
+
+def test_selection_model_row_ids_backend(sample_iris_df):
+    """La selección por posiciones guarda un bitmask y materializa perezosamente."""
+    model = SelectionModel()
+    calls = []
+    model.on_change(lambda items, count: calls.append(count))
+
+    model.update_rows([5, 1, 3], source=sample_iris_df)
+    assert calls == [3]
+    selection = model.get_selection()
+    assert selection.row_ids.tolist() == [1, 3, 5]
+    assert selection.nbytes() == (len(sample_iris_df) + 7) // 8
+
+    # Misma selección (como máscara) -> igual en O(1), sin callbacks
+    mask = np.zeros(len(sample_iris_df), dtype=bool)
+    mask[[1, 3, 5]] = True
+    model.update_rows(mask=mask, source=sample_iris_df)
+    assert calls == [3]
+    assert hash(selection) == hash(model.get_selection())
+
+    df = model.to_dataframe()
+    assert df['petal_length'].tolist() == sample_iris_df['petal_length'].iloc[[1, 3, 5]].tolist()
+    assert model.get_items()[0]['species'] == sample_iris_df['species'].iloc[1]
+    entry = model.get_history()[-1]
+    assert entry['items'].selection is selection and entry['count'] == 3
+
+    model.update([{'x': 1}])
+    assert model.get_selection() is None and calls[1] == 1
+
+
+def test_positional_selection_replaces_previous_items(sample_iris_df):
+    """Tras una selección por posiciones, items e historial no quedan con la anterior."""
+    from BESTLIB.reactive.selection import HAS_WIDGETS
+    model = SelectionModel()
+    calls = []
+    model.on_change(lambda items, count: calls.append(count))
+    model.update([{'x': 1}, {'x': 2}])
+    model.update_rows([0, 4], source=sample_iris_df)
+    assert calls == [2, 2]
+    if HAS_WIDGETS:
+        # El trait sincronizado no materializa la selección
+        assert model.items == []
+    else:
+        assert model.items.selection is model.get_selection()
+    assert [set(entry) for entry in model.get_history()] == [{'timestamp', 'items', 'count'}] * 2
+    assert model.get_history()[-1]['items'][1] == sample_iris_df.iloc[4].to_dict()
+
+
+def test_selection_model_ignores_legacy_trait_observer_call():
+    """La llamada legacy _items_changed('items') de traitlets no re-notifica."""
+    model = SelectionModel()
+    calls = []
+    model.on_change(lambda items, count: calls.append(count))
+    model.update([{'x': 1}])
+    model._items_changed('items')
+    assert calls == [1]
+
+
+def test_scatter_brush_evaluated_in_python(sample_iris_df):
+    """El brush llega como extensiones y la selección se calcula en Python."""
+    from BESTLIB.core.comm import CommManager
+
+    layout = ReactiveMatrixLayout("S")
+    layout.set_data(sample_iris_df)
+    layout.add_scatter('S', x_col='petal_length', y_col='petal_width', interactive=True)
+    spec = layout._layout._map['S']
+    assert spec['__brush_columns__'] == {'x': 'petal_length', 'y': 'petal_width'}
+
+    extents = {'petal_length': [4.0, 6.0], 'petal_width': [1.0, 2.5]}
+    msg = {'content': {'data': {'type': 'select', 'payload': {
+        'items': [], '__view_letter__': 'S', '__scatter_letter__': 'S',
+        '__brush__': {'dataset': 'main', 'extents': extents}}}}}
+    CommManager._handle_message(layout._layout.div_id, msg)
+
+    expected = sample_iris_df[sample_iris_df['petal_length'].between(4.0, 6.0)
+                              & sample_iris_df['petal_width'].between(1.0, 2.5)]
+    selected = layout._scatter_selection_models['S'].get_selection()
+    assert selected.row_ids.tolist() == np.flatnonzero(sample_iris_df.index.isin(expected.index)).tolist()
+    assert len(layout.selection_model.to_dataframe()) == len(expected)
+
+
+def test_scatter_lasso_evaluated_in_python(sample_iris_df):
+    """El lasso llega como polígono y alimenta el SelectionModel del scatter."""
+    from BESTLIB.core.comm import CommManager
+    from BESTLIB.data.spatial import points_in_polygon
+
+    layout = ReactiveMatrixLayout("S")
+    layout.set_data(sample_iris_df)
+    layout.add_scatter('S', x_col='petal_length', y_col='petal_width', selectionMode='lasso')
+    assert layout._layout._map['S']['selectionMode'] == 'lasso'
+
+    polygon = [[1.0, 0.0], [6.0, 0.5], [6.0, 2.5], [3.0, 2.0]]
+    msg = {'content': {'data': {'type': 'select', 'payload': {
+        'items': [], '__view_letter__': 'S', '__scatter_letter__': 'S',
+        '__brush__': {'dataset': 'main', 'columns': ['petal_length', 'petal_width'],
+                      'polygon': polygon}}}}}
+    CommManager._handle_message(layout._layout.div_id, msg)
+
+    expected = np.flatnonzero(points_in_polygon(sample_iris_df['petal_length'].to_numpy(),
+                                                sample_iris_df['petal_width'].to_numpy(), polygon))
+    assert expected.size > 0
+    selected = layout._scatter_selection_models['S'].get_selection()
+    assert selected.row_ids.tolist() == expected.tolist()
+
+
+def test_brush_columns_only_on_views_that_send_extents(sample_iris_df):
+    """Solo se etiquetan las vistas cuyo renderer envía extensiones de brush."""
+    layout = ReactiveMatrixLayout("SHLC")
+    layout.set_data(sample_iris_df)
+    layout.add_scatter('S', x_col='petal_length', y_col='petal_width', interactive=True)
+    layout.add_histogram('H', column='petal_length')
+    layout.add_line_plot('L', x_col='petal_length', y_col='petal_width')
+    layout.add_line_plot('C', x_col='petal_length', y_col='petal_width', renderer='canvas')
+    specs = layout._layout._map
+    assert '__brush_columns__' in specs['S']
+    assert '__brush_columns__' not in specs['H']
+    assert '__brush_columns__' not in specs['L']
+    assert specs['C']['__brush_columns__'] == {'x': 'petal_length', 'y': 'petal_width'}
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from BESTLIB.data.datasets import DatasetTable
+from BESTLIB.data.spatial import GridIndex, points_in_polygon
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(1)
+    x = rng.normal(0, 1, 5000)
+    y = rng.normal(0, 2, 5000)
+    x[::97] = np.nan
+    return x, y
+
+
+def test_query_rect_matches_scan(points):
+    x, y = points
+    index = GridIndex(x, y)
+    result = index.query_rect(0.5, -1.0, -2.0, 3.0)
+    expected = np.flatnonzero((x >= -1.0) & (x <= 0.5) & (y >= -2.0) & (y <= 3.0))
+    assert result.tolist() == expected.tolist()
+    assert index.query_rect(50, 60, 50, 60).size == 0
+
+
+def test_query_polygon_matches_scan(points):
+    x, y = points
+    triangle = [[-2, -2], [2, -2], [0, 3]]
+    result = GridIndex(x, y).query_polygon(triangle)
+    expected = np.flatnonzero(points_in_polygon(x, y, triangle))
+    assert result.tolist() == expected.tolist()
+    assert points_in_polygon([0.0, 5.0], [0.0, 0.0], triangle).tolist() == [True, False]
+
+
+def test_query_knn_matches_scan(points):
+    x, y = points
+    result = GridIndex(x, y).query_knn(0.3, -0.4, k=10)
+    dist = np.hypot(x - 0.3, y + 0.4)
+    expected = np.argsort(np.where(np.isnan(dist), np.inf, dist), kind='stable')[:10]
+    assert result.tolist() == expected.tolist()
+
+
+def test_dataset_brush_uses_spatial_index(points):
+    x, y = points
+    table = DatasetTable('main', pd.DataFrame({'a': x, 'b': y}))
+    scan = table.select_extent({'a': [-1, 1], 'b': [0, 2]})
+    table.spatial_index('a', 'b')
+    assert table.select_extent({'b': [0, 2], 'a': [-1, 1]}).tolist() == scan.tolist()
@@ -0,0 +1,90 @@
+import pandas as pd
+
+from BESTLIB.core.binary import unpack_columns
+from BESTLIB.core.comm import CommManager
+from BESTLIB.layouts.reactive import ReactiveMatrixLayout
+from BESTLIB.reactive.patches import diff_records, patch_key
+
+
+def _received_patches(comm):
+    """Parches enviados, con las filas del buffer devueltas a cada alta (como matrix.js)."""
+    patches = []
+    for data, buffers in comm.sent:
+        if data['type'] != 'view_patch':
+            continue
+        patch = data['payload']
+        if '__binary__' in patch:
+            rows = unpack_columns(patch['__binary__'], [bytes(b) for b in buffers])['_rows'].tolist()
+            for item, count in zip(patch['upsert'], patch['row_counts']):
+                if count is not None:
+                    item['_rows'], rows = rows[:count], rows[count:]
+        patches.append(patch)
+    return patches
+
+
+def test_diff_records_only_changed_keys():
+    previous = [{'category': 'a', 'value': 1}, {'category': 'b', 'value': 2}]
+    current = [{'category': 'a', 'value': 1}, {'category': 'b', 'value': 5}]
+    patch = diff_records(previous, current, 'category')
+    assert patch == {'upsert': [{'category': 'b', 'value': 5}], 'remove': []}
+    assert diff_records(current, current, 'category') is None
+
+
+def test_diff_records_removed_and_reordered():
+    previous = [{'bin': 1.0, 'count': 1}, {'bin': 2.5, 'count': 3}]
+    current = [{'bin': 2.5, 'count': 3}]
+    patch = diff_records(previous, current, 'bin')
+    assert patch['remove'] == ['1'] and patch['order'] == ['2.5']
+    assert patch_key(2.0) == '2' and patch_key(True) == 'true'
+
+
+def test_linked_bar_sends_patch(open_comm):
+    df = pd.DataFrame({'x': [1, 2, 3, 4], 'y': [1, 2, 3, 4], 'cat': ['a', 'a', 'b', 'c']})
+    layout = ReactiveMatrixLayout("SB")
+    layout.set_data(df)
+    layout.add_scatter('S', x_col='x', y_col='y', category_col='cat')
+    layout.add_barchart('B', category_col='cat', linked_to='S')
+    comm = open_comm(layout._layout.div_id)
+    selection = layout._scatter_selection_models['S']
+    selection.update_rows([0, 2], source=df)
+    selection.update_rows([0, 2, 3], source=df)
+    patches = _received_patches(comm)
+    assert len(patches) == 2
+    first, second = patches
+    assert first['letter'] == 'B' and first['key'] == 'category'
+    assert first['dataset'] == 'main'
+    assert first['remove'] == ['c']
+    assert {r['category']: r['_rows'] for r in first['upsert']}['a'] == [0]
+    # El segundo parche solo lleva la barra que reaparece, con sus filas
+    assert second['remove'] == [] and second['order'] == ['a', 'b', 'c']
+    assert second['upsert'] == [{'category': 'c', 'value': 1, 'color': '#4a90e2', '_rows': [3]}]
+
+
+def test_click_on_patched_bar_selects_filtered_rows(open_comm):
+    from BESTLIB.data.datasets import encode_row_ids
+
+    df = pd.DataFrame({'x': range(6), 'y': range(6), 'cat': ['a', 'a', 'a', 'b', 'b', 'c']})
+    layout = ReactiveMatrixLayout("SB")
+    layout.set_data(df)
+    layout.add_scatter('S', x_col='x', y_col='y', category_col='cat')
+    layout.add_barchart('B', category_col='cat', linked_to='S')
+    received = []
+    layout._layout._event_manager.on('select', received.append)
+    comm = open_comm(layout._layout.div_id)
+    selection = layout._scatter_selection_models['S']
+    selection.update_rows([1, 2, 4], source=df)
+    selection.update_rows([1, 2, 4, 5], source=df)
+    upserts = {}
+    for patch in _received_patches(comm):
+        upserts.update({r['category']: r for r in patch['upsert']})
+
+    # Click en la barra parcheada ('a') y en la que reaparece ('c'): el navegador
+    # envía las posiciones que trajo el parche
+    for category, expected in (('a', [1, 2]), ('c', [5])):
+        row_ids = dict(encode_row_ids(upserts[category]['_rows'], len(df)), dataset='main')
+        msg = {'content': {'data': {'type': 'select', 'payload': {
+            'items': [], '__view_letter__': 'B', '__row_ids__': row_ids}}}}
+        CommManager._handle_message(layout._layout.div_id, msg)
+        CommManager.flush_pending()
+        assert received[-1]['row_ids'].tolist() == expected
+        assert received[-1]['__frame__'].equals(df.take(expected))